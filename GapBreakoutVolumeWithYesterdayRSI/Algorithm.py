@@ -1,5 +1,9 @@
 from AlgorithmImports import *
 from QuantConnect.Indicators import RollingWindow
+from collections import deque
+from profiling import RunProfiler, profiled
+from journal import ObjectStoreSink, RateLimitedLog, TradeJournal
+from metrics import StreamingMetrics, format_metrics
 
 class GapBreakoutVolumeWithYesterdayRSI(QCAlgorithm):
     """
@@ -18,11 +22,21 @@ class GapBreakoutVolumeWithYesterdayRSI(QCAlgorithm):
         self.rsi_period      = int(self.get_parameter("rsi_period")      or 14)   # RSI period
         self.universe_count  = int(self.get_parameter("universe_count")  or 100)  # top N by dollar volume
         self.min_price       = float(self.get_parameter("min_price")     or 10)   # min price filter
+        self.symbol_grace_days = int(self.get_parameter("symbol_grace_days") or 5)  # keep state this long after leaving universe
+        self.max_symbol_data   = int(self.get_parameter("max_symbol_data")   or 3 * self.universe_count)  # cap on tracked symbols
+
+        # hot-path timings / counters, reported at the end of the run
+        self.profiler = RunProfiler(enabled=(self.get_parameter("profile") or "true").lower() == "true")
+        # fills + BUY/SELL events in columnar batches (object store); per-symbol errors aggregated per day
+        self.journal = TradeJournal(ObjectStoreSink(self.object_store, f"journal/{type(self).__name__}/{self.algorithm_id}"))
+        self.debug_log = RateLimitedLog(self.debug)
 
         # ---- backtest setup ----
         self.set_start_date(2024, 6, 1)
         self.set_end_date(2025, 1, 1)
         self.set_cash(100000)
+        # standard metrics (CAGR, Sharpe, MaxDD, ...) from fills + daily close equity, O(1) per update
+        self.metrics = StreamingMetrics(self.portfolio.total_portfolio_value)
 
         # Daily universe
         self.universe_settings.resolution = Resolution.DAILY
@@ -32,6 +46,8 @@ class GapBreakoutVolumeWithYesterdayRSI(QCAlgorithm):
         self.symbol_data: dict[Symbol, SymbolData] = {}
         self.active_positions: dict[Symbol, datetime] = {}  # entry time per symbol
         self.daily_universe: set[Symbol] = set()            # updated each day by coarse
+        self.pending_warmup: set[Symbol] = set()            # universe entrants not yet seeded from history
+        self.lifecycle = SymbolDataLifecycle(self.symbol_data, self.symbol_grace_days, self.max_symbol_data)
 
         # run selection step ~10 min before close so "today bar" exists
         self.schedule.on(
@@ -41,75 +57,101 @@ class GapBreakoutVolumeWithYesterdayRSI(QCAlgorithm):
         )
 
     # ----------------- UNIVERSE SELECTION -----------------
+    @profiled()
     def coarse_selection_function(self, coarse: List[CoarseFundamental]) -> List[Symbol]:
         # filter: has fundamental, tradable price
         filtered = [c for c in coarse if c.has_fundamental_data and c.price is not None and c.price > self.min_price]
         # sort by dollar volume desc and take top N
         selected = sorted(filtered, key=lambda x: x.dollar_volume or 0, reverse=True)[:self.universe_count]
         symbols = [c.symbol for c in selected]
+        # entrants (vs. yesterday's universe) get their history in one batch before selection_step
+        universe = set(symbols)
+        self.pending_warmup |= universe - self.daily_universe
         # cache universe for the day
-        self.daily_universe = set(symbols)
+        self.daily_universe = universe
         return symbols
 
     # ----------------- DAILY SELECTION LOGIC -----------------
+    @profiled()
     def selection_step(self):
         """
         Compute today's selection list near the close using daily bars & indicators.
         """
         self.filtered: list[Symbol] = []
+        self.lifecycle.evict(self.time, keep=self.daily_universe | set(self.active_positions))
+        self.warm_up_entrants()
 
         # iterate over today's universe only
         for symbol in list(self.daily_universe):
             try:
-                # ensure SymbolData exists
+                # state is seeded once on entry, then kept current by on_data
                 sd = self.symbol_data.get(symbol)
-                if sd is None:
-                    sd = SymbolData(self, symbol, self.rsi_period)
-                    self.symbol_data[symbol] = sd
-
-                # update RSI rolling window (stores "today" at index 0, "yesterday" at index 1)
-                sd.update()
-                if not sd.is_ready():
+                if sd is None or not sd.is_ready() or not sd.bars_ready():
                     continue
 
-                # pull enough daily history so that we have [lookback_days] + yesterday + today
-                bars_needed = self.lookback_days + 2
-                hist = self.history(symbol, bars_needed, Resolution.DAILY)
-                if hist is None or hist.empty or len(hist) < bars_needed:
-                    continue
-
-                # QC daily history here is typically indexed by time only (for single symbol)
-                # Ensure required fields exist
-                for col in ("open", "high", "close", "volume"):
-                    if col not in hist.columns:
-                        raise ValueError(f"history missing column: {col}")
-
-                # last two rows are yesterday & today
-                yesterday = hist.iloc[-2]
-                today     = hist.iloc[-1]
-
-                closes  = hist["close"].iloc[: -1]  # up to yesterday
-                highs   = hist["high"].iloc[: -1]   # up to yesterday (for context)
-                volumes = hist["volume"].iloc[: -1] # up to yesterday
-
-                # conditions
-                gap_up        = today["open"] > yesterday["high"]
-                breakout_lvl  = closes.iloc[-self.lookback_days:].max()  # highest close in lookback (excluding today)
-                breakout      = today["close"] > breakout_lvl
-                vol_ma        = volumes.iloc[-self.volume_ma_days:].mean()
-                volume_confirm= today["volume"] > vol_ma
+                # conditions (today vs. yesterday / rolling windows up to yesterday)
                 rsi_yesterday = sd.rsi_window[1].value  # yesterday's RSI
                 rsi_confirm   = rsi_yesterday > 50
 
-                if gap_up and breakout and volume_confirm and rsi_confirm:
+                if sd.breakout_signal() and rsi_confirm:
                     self.filtered.append(symbol)
 
             except Exception as e:
-                self.debug(f"[selection_step] {symbol.Value}: {e}")
+                self.debug_log.note(f"[selection_step] {type(e).__name__}", f"{symbol.Value}: {e}")
                 continue
+        self.debug_log.flush()
+
+    @profiled()
+    def warm_up_entrants(self):
+        """
+        Seed RSI + rolling windows of every new universe member from a single multi-symbol
+        daily history request (instead of one request and one registered RSI per symbol).
+        """
+        entrants = [s for s in self.pending_warmup if s in self.daily_universe]
+        self.pending_warmup.clear()
+        if not entrants:
+            return
+
+        for symbol in entrants:
+            if symbol not in self.symbol_data:
+                self.symbol_data[symbol] = SymbolData(self, symbol, self.rsi_period,
+                                                      self.lookback_days, self.volume_ma_days)
+
+        # enough bars for lookback + yesterday + today, the volume MA + today, and RSI plus its 2-length window
+        bars_needed = max(self.lookback_days + 2, self.volume_ma_days + 1, self.rsi_period + 2)
+        hist = self.profiler.history(self.history(entrants, bars_needed, Resolution.DAILY))
+        if hist is None or hist.empty:
+            return
+
+        for symbol in entrants:
+            try:
+                df = hist.loc[symbol]
+            except KeyError:
+                continue  # no history yet (e.g. fresh listing): on_data fills the windows over time
+            sd = self.symbol_data[symbol]
+            sd.warm_up(df)
+            if not sd.bars_ready() or not sd.is_ready():
+                # fewer bars than requested (fresh listing / gaps): the symbol waits for live bars
+                self.profiler.add("warmup_short")
+                self.debug_log.note("[warm_up] not ready after seed", f"{symbol.Value}: {len(df)} bars")
+
+    def on_securities_changed(self, changes: SecurityChanges):
+        # a removed symbol stops receiving daily bars: it stays dormant for the grace period
+        # (re-entry tops its windows up from the batched history) and is evicted afterwards
+        for security in changes.added_securities:
+            self.lifecycle.on_added(security.symbol)
+        for security in changes.removed_securities:
+            self.lifecycle.on_removed(security.symbol, self.time)
 
     # ----------------- EXECUTION -----------------
+    @profiled(per_call=("orders",))
     def on_data(self, data: Slice):
+        # keep per-symbol rolling windows current (O(1) per bar)
+        for symbol, bar in data.bars.items():
+            sd = self.symbol_data.get(symbol)
+            if sd is not None:
+                sd.update_bar(bar.end_time, bar.open, bar.high, bar.close, bar.volume)
+
         # entries
         for symbol in getattr(self, "filtered", []):
             if symbol not in self.daily_universe:
@@ -125,8 +167,9 @@ class GapBreakoutVolumeWithYesterdayRSI(QCAlgorithm):
             # equal weight
             target = 1.0 / max(1, self.max_positions)
             self.set_holdings(symbol, target)
+            self.profiler.add("orders")
             self.active_positions[symbol] = self.time
-            self.log(f"BUY  {symbol.Value} | px={self.securities[symbol].price:.2f} | date={self.time.date()}")
+            self.journal.event(self.time, symbol, "buy", self.securities[symbol].price)
 
         # exits (time-based)
         to_exit = []
@@ -137,26 +180,165 @@ class GapBreakoutVolumeWithYesterdayRSI(QCAlgorithm):
         for symbol in to_exit:
             if symbol in self.securities and self.securities[symbol].is_tradable:
                 self.liquidate(symbol)
-                self.log(f"SELL {symbol.Value} | px={self.securities[symbol].price:.2f} | date={self.time.date()}")
+                self.profiler.add("orders")
+                self.journal.event(self.time, symbol, "sell", self.securities[symbol].price)
             self.active_positions.pop(symbol, None)
 
+        # daily bars arrive once per trading day at the close: that is the equity sample
+        self.metrics.on_equity(self.portfolio.total_portfolio_value, self.time.date())
+
+    @profiled()
+    def on_order_event(self, order_event: OrderEvent):
+        if order_event.status == OrderStatus.FILLED:
+            self.journal.fill(self.time, order_event.symbol, order_event.fill_quantity, order_event.fill_price,
+                              order_event.order_fee.value.amount, order_event.order_id)
+            self.metrics.on_fill(order_event.symbol, order_event.fill_quantity, order_event.fill_price,
+                                 order_event.order_fee.value.amount)
+
+    def on_end_of_algorithm(self):
+        self.log(f"[symbol_data] {self.lifecycle.summary()}")
+        self.journal.flush()
+        self.log(f"[journal] {self.journal.summary()}")
+        self.log(f"[metrics] {format_metrics(self.metrics.result())}")
+        for line in self.profiler.report():
+            self.log(line)
+
+
+class SymbolDataLifecycle:
+    """
+    Bounded lifecycle for `symbol_data`, driven by universe add/remove events:
+    - Live    : in the universe (or never removed)
+    - Dormant : removed from the universe; kept `grace_days` so a quick re-entry only tops up its windows
+    - Evicted : dormant past the grace period, or oldest dormant first while above `cap` entries
+    Symbols in `keep` (today's universe, open positions) are never evicted. SymbolData indicators are
+    updated manually from on_data bars, so dropping the entry is all it takes to stop their updates.
+    """
+    def __init__(self, symbol_data: dict, grace_days: int, cap: int):
+        self.symbol_data = symbol_data
+        self.grace_days = grace_days
+        self.cap = cap
+        self.dormant: dict = {}     # symbol -> removal time, oldest first
+        self.evicted = 0
+
+    def on_added(self, symbol: Symbol):
+        self.dormant.pop(symbol, None)
+
+    def on_removed(self, symbol: Symbol, now: datetime):
+        if symbol in self.symbol_data:
+            self.dormant.pop(symbol, None)
+            self.dormant[symbol] = now
+
+    def evict(self, now: datetime, keep: set) -> int:
+        before = self.evicted
+        for symbol in [s for s, t in self.dormant.items() if (now - t).days >= self.grace_days and s not in keep]:
+            self._drop(symbol)
+        over = len(self.symbol_data) - self.cap
+        if over > 0:
+            for symbol in [s for s in self.dormant if s not in keep][:over]:
+                self._drop(symbol)
+        return self.evicted - before
+
+    def _drop(self, symbol: Symbol):
+        self.dormant.pop(symbol, None)
+        if self.symbol_data.pop(symbol, None) is not None:
+            self.evicted += 1
+
+    @property
+    def live(self) -> int:
+        return len(self.symbol_data) - len(self.dormant)
+
+    def summary(self) -> str:
+        return f"live={self.live} dormant={len(self.dormant)} evicted={self.evicted}"
+
 
 class SymbolData:
     """
-    Per-symbol indicator container: Daily RSI with a RollingWindow(2) to access "yesterday" value at index 1.
+    Per-symbol state, fed from daily bars (history seed + on_data):
+    - Daily RSI (Wilder) with a RollingWindow(2): index 0 is today's RSI, index 1 is yesterday's.
+    - Rolling breakout/volume windows over the bars *before* today, updated per daily bar in O(1) amortized:
+      highest close over `lookback_days` (monotonic deque) and mean volume over `volume_ma_days` (running sum).
     """
-    def __init__(self, algorithm: QCAlgorithm, symbol: Symbol, rsi_period: int):
+    def __init__(self, algorithm: QCAlgorithm, symbol: Symbol, rsi_period: int,
+                 lookback_days: int = 20, volume_ma_days: int = 10):
         self.symbol = symbol
         self.algorithm = algorithm
-        # Daily RSI (Wilder)
-        self.rsi = algorithm.rsi(symbol, rsi_period, MovingAverageType.WILDERS, Resolution.DAILY)
+        # Daily RSI (Wilder), updated manually from the same bars as the rolling windows
+        self.rsi = RelativeStrengthIndex(rsi_period, MovingAverageType.WILDERS)
         # Rolling window to store [today, yesterday]
-        self.rsi_window: RollingWindow
+        self.rsi_window = RollingWindow[IndicatorDataPoint](2)
 
-    def update(self):
-        # push today's RSI into window when ready
-        if self.rsi.is_ready:
-            self.rsi_window.add(self.rsi.current)
+        self.lookback_days = lookback_days
+        self.volume_ma_days = volume_ma_days
+        self.reset_bars()
 
     def is_ready(self) -> bool:
         return self.rsi_window.is_ready
+
+    # ---- rolling bar state ----
+    def reset_bars(self):
+        self.rsi.reset()
+        self.rsi_window.reset()
+        self.today = None          # (open, high, close, volume) of the latest bar
+        self.yesterday = None
+        self.last_end_time = None
+        self.prior_count = 0       # bars that have moved into the "before today" windows
+        self._max_closes = deque() # (index, close), closes decreasing -> front is the rolling max
+        self._volumes = deque()
+        self._volume_sum = 0.0
+
+    def warm_up(self, history):
+        """Seed the rolling windows from a daily history frame (single symbol, oldest first)."""
+        if history is None or history.empty:
+            return
+        for col in ("open", "high", "close", "volume"):
+            if col not in history.columns:
+                raise ValueError(f"history missing column: {col}")
+        first = history.index[0]
+        first = first[-1] if isinstance(first, tuple) else first
+        if self.last_end_time is not None and first > self.last_end_time:
+            self.reset_bars()   # bars missed while out of the universe are not all covered: start over
+        for idx, row in zip(history.index, history[["open", "high", "close", "volume"]].itertuples(index=False)):
+            end_time = idx[-1] if isinstance(idx, tuple) else idx
+            if hasattr(end_time, "to_pydatetime"):
+                end_time = end_time.to_pydatetime()
+            self.update_bar(end_time, row.open, row.high, row.close, row.volume)
+
+    def update_bar(self, end_time, open_: float, high: float, close: float, volume: float):
+        if self.last_end_time is not None and end_time <= self.last_end_time:
+            return  # already seen (history seed overlapping the live feed)
+        self.last_end_time = end_time
+
+        self.rsi.update(end_time, float(close))
+        if self.rsi.is_ready:
+            self.rsi_window.add(self.rsi.current)
+
+        prev = self.today
+        if prev is not None:
+            # yesterday's bar enters the "before today" windows
+            i = self.prior_count
+            self.prior_count += 1
+            while self._max_closes and self._max_closes[-1][1] <= prev[2]:
+                self._max_closes.pop()
+            self._max_closes.append((i, prev[2]))
+            if self._max_closes[0][0] <= i - self.lookback_days:
+                self._max_closes.popleft()
+
+            self._volumes.append(prev[3])
+            self._volume_sum += prev[3]
+            if len(self._volumes) > self.volume_ma_days:
+                self._volume_sum -= self._volumes.popleft()
+
+        self.yesterday = prev
+        self.today = (float(open_), float(high), float(close), float(volume))
+
+    def bars_ready(self) -> bool:
+        # same depth the history version required: lookback_days + yesterday + today
+        return self.today is not None and self.prior_count >= max(self.lookback_days + 1, self.volume_ma_days)
+
+    def breakout_signal(self) -> bool:
+        """Gap-up, N-day closing-high breakout and volume above its moving average."""
+        t_open, _, t_close, t_volume = self.today
+        gap_up         = t_open > self.yesterday[1]
+        breakout       = t_close > self._max_closes[0][1]   # highest close in lookback (excluding today)
+        volume_confirm = t_volume > self._volume_sum / len(self._volumes)
+        return gap_up and breakout and volume_confirm
@@ -0,0 +1,522 @@
+"""
+Offline point-in-time panel backtest of GapBreakoutVolumeWithYesterdayRSI on daily bars.
+
+Runs the same rules as Algorithm.py over a (days x symbols) panel, every condition as a rolling
+array operation across all symbols at once:
+- Universe : top `universe_count` by dollar volume (close x volume) with close > min_price, ranked
+             per day on that day's bar only (point-in-time, like coarse selection)
+- Signal   : gap-up (open > previous high), close > highest close of the prior `lookback_days` bars,
+             volume > mean volume of the prior `volume_ma_days` bars, RSI (Wilder) of the previous bar > 50
+- Entry    : equal weight 1 / max_positions, at most `max_positions` open, candidates by dollar volume
+- Exit     : time-based, `holding_days` calendar days after the entry order
+
+Timing follows the Lean algorithm on daily data: coarse selection on day d sees bar d-1,
+selection_step (before the close of d) sees bars up to d-1, orders go out in on_data at the close
+of d and fill at the next open (market-on-open). So a signal on bar s fills at open s+2; exits are
+checked in the same on_data after the entries and fill at the next open as well.
+Only the per-day order loop is Python; it touches the candidates and open positions, not the panel.
+
+Known approximations vs Lean: candidates are taken in dollar-volume order (the algorithm iterates
+a set), RSI is warmed on the full history (the algorithm seeds it from max(lookback_days + 2,
+volume_ma_days + 1, rsi_period + 2) bars on universe entry), a missing bar breaks the windows that
+contain it, no delisting / fundamental filter unless `eligible` is given, IB fees and no slippage.
+
+Panels are built once from Lean daily zips ({data}/equity/usa/daily/{ticker}.zip) and saved as .npz.
+
+CLI:
+    python panel_backtest.py build ~/lean/data data/daily_panel.npz --tickers-file tickers.txt
+    python panel_backtest.py run data/daily_panel.npz --start 2019-01-01 --set holding_days=5
+    python panel_backtest.py sweep data/daily_panel.npz results/gap_sweep.jsonl \
+        --grid lookback_days=10,20,30 --grid holding_days=5,10 --csv results/gap_sweep.csv
+"""
+import argparse
+import glob
+import io
+import os
+import sys
+import zipfile
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from common.metrics import StreamingMetrics, format_metrics  # noqa: E402
+from common.sweep import check_knobs, run_sweep, write_summary_csv  # noqa: E402
+
+STRATEGY = "GapBreakoutVolumeWithYesterdayRSI"
+PRICE_SCALE = 10000.0
+FREE_PORTFOLIO_PCT = 0.0025       # Lean Settings.free_portfolio_value_percentage default
+
+# fill kinds
+BUY, SELL = 0, 1
+
+FILL_DTYPE = np.dtype([
+    ("day",    "datetime64[D]"),
+    ("symbol", np.int32),
+    ("kind",   np.int8),
+    ("qty",    np.float64),
+    ("price",  np.float64),
+    ("fee",    np.float64),
+])
+
+
+def ib_equity_fee(qty: float, price: float) -> float:
+    """InteractiveBrokers US equity fee: $0.005/share, min $1, max 0.5% of trade value."""
+    q = abs(qty)
+    if q == 0:
+        return 0.0
+    return min(max(1.0, 0.005 * q), 0.005 * q * price)
+
+
+class DailyPanel:
+    """
+    Daily OHLCV of many symbols on a common trading-day axis: (n_days, n_symbols) float64 arrays,
+    NaN where a symbol has no bar. `eligible` optionally masks symbols out of the universe
+    (e.g. ETFs / no fundamentals), either per symbol (n_symbols,) or per day (n_days, n_symbols).
+    """
+
+    FIELDS = ("open", "high", "low", "close", "volume")
+
+    def __init__(self, days: np.ndarray, symbols, open_, high, low, close, volume, eligible=None):
+        self.days = np.asarray(days, dtype="datetime64[D]")
+        self.symbols = list(symbols)
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.eligible = None if eligible is None else np.asarray(eligible, dtype=bool)
+        if self.close.shape != (self.days.size, len(self.symbols)):
+            raise ValueError(f"close has shape {self.close.shape}, expected {(self.days.size, len(self.symbols))}")
+
+    @property
+    def n_days(self) -> int:
+        return int(self.days.size)
+
+    @property
+    def n_symbols(self) -> int:
+        return len(self.symbols)
+
+    @classmethod
+    def from_lean(cls, data_root: str, tickers=None, market: str = "usa") -> "DailyPanel":
+        """Panel from Lean daily trade zips; all tickers with a daily zip when `tickers` is None."""
+        folder = os.path.join(data_root, "equity", market, "daily")
+        if tickers is None:
+            tickers = sorted(os.path.basename(p)[:-4].upper() for p in glob.glob(os.path.join(folder, "*.zip")))
+        parsed = {}
+        for ticker in tickers:
+            path = os.path.join(folder, f"{ticker.lower()}.zip")
+            if os.path.exists(path):
+                bars = read_lean_daily_zip(path)
+                if bars is not None:
+                    parsed[ticker.upper()] = bars
+        if not parsed:
+            raise ValueError(f"no daily zips found under {folder}")
+        days = np.unique(np.concatenate([b[0] for b in parsed.values()]))
+        symbols = list(parsed)
+        cols = [np.full((days.size, len(symbols)), np.nan) for _ in cls.FIELDS]
+        for j, ticker in enumerate(symbols):
+            d, values = parsed[ticker]
+            row = np.searchsorted(days, d)
+            for k, col in enumerate(cols):
+                col[row, j] = values[:, k]
+        return cls(days, symbols, *cols)
+
+    def save(self, path: str):
+        """Single .npz (keys: days, symbols, open/high/low/close/volume[, eligible])."""
+        arrays = {"days": self.days, "symbols": np.array(self.symbols, dtype=str)}
+        for name in self.FIELDS:
+            arrays[name] = getattr(self, name)
+        if self.eligible is not None:
+            arrays["eligible"] = self.eligible
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "DailyPanel":
+        with np.load(path) as z:
+            return cls(z["days"], z["symbols"].tolist(), *(z[name] for name in cls.FIELDS),
+                       eligible=z["eligible"] if "eligible" in z.files else None)
+
+    def window(self, start: str = None, end: str = None) -> "DailyPanel":
+        """Sub-panel over trading days in [start, end] (views, no copy)."""
+        lo = 0 if start is None else int(np.searchsorted(self.days, np.datetime64(start, "D"), "left"))
+        hi = self.n_days if end is None else int(np.searchsorted(self.days, np.datetime64(end, "D"), "right"))
+        eligible = self.eligible
+        if eligible is not None and eligible.ndim == 2:
+            eligible = eligible[lo:hi]
+        return DailyPanel(self.days[lo:hi], self.symbols, *(getattr(self, n)[lo:hi] for n in self.FIELDS),
+                          eligible=eligible)
+
+
+def read_lean_daily_zip(path: str):
+    """One Lean daily zip -> (days datetime64[D], (n, 5) open/high/low/close/volume) or None."""
+    with zipfile.ZipFile(path) as zf:
+        names = [n for n in zf.namelist() if n.endswith(".csv")]
+        if not names:
+            return None
+        text = zf.read(names[0]).decode("ascii")
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return None
+    # "YYYYMMDD 00:00,open,high,low,close,volume" with deci-cent prices
+    stamps = [line[:8] for line in lines]
+    days = np.array([f"{s[:4]}-{s[4:6]}-{s[6:]}" for s in stamps], dtype="datetime64[D]")
+    values = np.loadtxt(io.StringIO(text), delimiter=",", usecols=(1, 2, 3, 4, 5), ndmin=2)
+    values[:, :4] /= PRICE_SCALE
+    return days, values
+
+
+# ---- rolling features, (n_days, n_symbols) in -> same shape out ----
+def prior_max(x: np.ndarray, n: int) -> np.ndarray:
+    """out[t] = max(x[t-n .. t-1]); NaN while fewer than n prior rows or any of them is NaN."""
+    out = np.full(x.shape, np.nan)
+    if n <= 0 or x.shape[0] <= n:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(x[:-1], n, axis=0)    # (D-n, S, n) view
+    out[n:] = windows.max(axis=-1)
+    return out
+
+
+def prior_mean(x: np.ndarray, n: int) -> np.ndarray:
+    """out[t] = mean(x[t-n .. t-1]); NaN while fewer than n prior rows or any of them is NaN."""
+    out = np.full(x.shape, np.nan)
+    if n <= 0 or x.shape[0] <= n:
+        return out
+    finite = np.isfinite(x)
+    csum = np.zeros((x.shape[0] + 1,) + x.shape[1:])
+    np.cumsum(np.where(finite, x, 0.0), axis=0, out=csum[1:])
+    ccount = np.zeros(csum.shape, dtype=np.int64)
+    np.cumsum(finite, axis=0, out=ccount[1:])
+    total = csum[n:-1] - csum[:-n - 1]
+    count = ccount[n:-1] - ccount[:-n - 1]
+    out[n:] = np.where(count == n, total / n, np.nan)
+    return out
+
+
+def wilder_rsi(close: np.ndarray, period: int) -> np.ndarray:
+    """
+    Lean RelativeStrengthIndex(period, WILDERS) per symbol: NaN until ready (period + 1 closes).
+    The loop runs over days with every symbol updated at once; a NaN close skips that symbol's update.
+    """
+    n_days, n_symbols = close.shape
+    out = np.full(close.shape, np.nan)
+    prev = np.full(n_symbols, np.nan)
+    avg_gain = np.zeros(n_symbols)
+    avg_loss = np.zeros(n_symbols)
+    samples = np.zeros(n_symbols, dtype=np.int64)     # gain/loss samples seen
+    for t in range(n_days):
+        c = close[t]
+        has = np.isfinite(c)
+        step = has & np.isfinite(prev)
+        change = np.where(step, c - prev, 0.0)
+        gain, loss = np.maximum(change, 0.0), np.maximum(-change, 0.0)
+        samples += step
+        # simple average over the first `period` samples, Wilder smoothing afterwards
+        k = np.where(samples <= period, samples, period).astype(np.float64)
+        k = np.where(step, k, 1.0)
+        avg_gain = np.where(step, avg_gain + (gain - avg_gain) / k, avg_gain)
+        avg_loss = np.where(step, avg_loss + (loss - avg_loss) / k, avg_loss)
+        ready = has & (samples >= period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(avg_loss == 0.0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+        out[t] = np.where(ready, rsi, np.nan)
+        prev = np.where(has, c, prev)
+    return out
+
+
+def universe_mask(panel: DailyPanel, count: int, min_price: float) -> np.ndarray:
+    """(n_days, n_symbols) bool: top `count` by that day's dollar volume among close > min_price."""
+    with np.errstate(invalid="ignore"):
+        ok = np.isfinite(panel.close) & np.isfinite(panel.volume) & (panel.close > min_price)
+    if panel.eligible is not None:
+        ok &= panel.eligible
+    dv = np.where(ok, panel.close * panel.volume, -np.inf)
+    mask = np.zeros(dv.shape, dtype=bool)
+    k = min(count, dv.shape[1])
+    if k <= 0:
+        return mask
+    top = np.argpartition(-dv, k - 1, axis=1)[:, :k]
+    np.put_along_axis(mask, top, True, axis=1)
+    return mask & ok
+
+
+@dataclass
+class PanelParams:
+    """Mirror of the get_parameter knobs that change trading (the memory knobs have no effect here)."""
+    lookback_days: int = 20
+    volume_ma_days: int = 10
+    holding_days: int = 10
+    max_positions: int = 10
+    rsi_period: int = 14
+    universe_count: int = 100
+    min_price: float = 10.0
+    cash: float = 100000.0
+
+    @classmethod
+    def from_knobs(cls, params: dict, cash: float = 100000.0) -> "PanelParams":
+        """Sweep / get_parameter style values (strings ok); unknown and memory-only knobs are ignored."""
+        types = {f.name: f.type for f in fields(cls)}
+        kw = {"cash": cash}
+        for name, value in params.items():
+            if name in types and name != "cash":
+                kw[name] = float(value) if types[name] in (float, "float") else int(float(value))
+        return cls(**kw)
+
+
+class FeatureCache:
+    """
+    Rolling features of one panel, computed once per window length / universe setting; a sweep
+    worker keeps one cache, so e.g. a holding_days x max_positions grid computes the signals once.
+    """
+
+    def __init__(self, panel: DailyPanel):
+        self.panel = panel
+        self._cache = {}
+
+    def _get(self, key, fn):
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = fn()
+        return value
+
+    def universe(self, count: int, min_price: float) -> np.ndarray:
+        return self._get(("universe", count, min_price), lambda: universe_mask(self.panel, count, min_price))
+
+    def breakout(self, lookback: int) -> np.ndarray:
+        def compute():
+            with np.errstate(invalid="ignore"):
+                return self.panel.close > prior_max(self.panel.close, lookback)
+        return self._get(("breakout", lookback), compute)
+
+    def volume_confirm(self, days: int) -> np.ndarray:
+        def compute():
+            with np.errstate(invalid="ignore"):
+                return self.panel.volume > prior_mean(self.panel.volume, days)
+        return self._get(("volume", days), compute)
+
+    def gap_up(self) -> np.ndarray:
+        def compute():
+            out = np.zeros(self.panel.close.shape, dtype=bool)
+            with np.errstate(invalid="ignore"):
+                out[1:] = self.panel.open[1:] > self.panel.high[:-1]
+            return out
+        return self._get(("gap",), compute)
+
+    def rsi_yesterday_above(self, period: int, level: float = 50.0) -> np.ndarray:
+        def compute():
+            rsi = wilder_rsi(self.panel.close, period)
+            out = np.zeros(rsi.shape, dtype=bool)
+            with np.errstate(invalid="ignore"):
+                # rsi_window[1] > 50 with the window full (today's RSI ready too)
+                out[1:] = (rsi[:-1] > level) & np.isfinite(rsi[1:])
+            return out
+        return self._get(("rsi", period, level), compute)
+
+    def history_ready(self, bars: int) -> np.ndarray:
+        """At least `bars` bars before today (SymbolData.bars_ready)."""
+        def compute():
+            seen = np.cumsum(np.isfinite(self.panel.close), axis=0)
+            return (seen - 1) >= bars
+        return self._get(("ready", bars), compute)
+
+    def signals(self, p: PanelParams) -> np.ndarray:
+        """(n_days, n_symbols) bool: selection_step would pick the symbol with bar t as 'today'."""
+        return (self.universe(p.universe_count, p.min_price)
+                & self.history_ready(max(p.lookback_days + 1, p.volume_ma_days))
+                & self.gap_up()
+                & self.breakout(p.lookback_days)
+                & self.volume_confirm(p.volume_ma_days)
+                & self.rsi_yesterday_above(p.rsi_period))
+
+
+@dataclass
+class PanelResult:
+    days: np.ndarray                  # datetime64[D] per simulated day
+    equity: np.ndarray                # marked-to-market equity at each day's close
+    fills: np.ndarray                 # FILL_DTYPE records in execution order
+    n_signals: np.ndarray             # selected symbols per signal bar
+    symbols: list
+
+    @property
+    def final_equity(self) -> float:
+        return float(self.equity[-1]) if self.equity.size else float("nan")
+
+
+def _next_valid(x: np.ndarray) -> np.ndarray:
+    """nxt[t, j] = first row >= t where x[:, j] is finite (n_days if none)."""
+    n = x.shape[0]
+    rows = np.where(np.isfinite(x), np.arange(n)[:, None], n)
+    return np.minimum.accumulate(rows[::-1], axis=0)[::-1]
+
+
+def _ffill(x: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs down each column (leading NaNs stay NaN)."""
+    idx = np.where(np.isfinite(x), np.arange(x.shape[0])[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return np.take_along_axis(x, idx, axis=0)
+
+
+def backtest(panel: DailyPanel, params: PanelParams = None, features: FeatureCache = None) -> PanelResult:
+    """Run the strategy over the whole panel; see the module docstring for the timing model."""
+    p = params or PanelParams()
+    features = features or FeatureCache(panel)
+    if features.panel is not panel:
+        raise ValueError("feature cache belongs to a different panel")
+    signals = features.signals(p)
+    dollar_volume = panel.close * panel.volume
+    mark = _ffill(panel.close)
+    fill_row = _next_valid(panel.open)
+    n_days = panel.n_days
+    target = 1.0 / max(1, p.max_positions)
+
+    cash = p.cash
+    held = {}             # symbol -> shares (filled)
+    active = {}           # symbol -> entry order day (active_positions)
+    pending = {}          # fill row -> [[symbol, qty, kind], ...]
+    fills = []
+    equity = np.empty(n_days)
+
+    for d in range(n_days):
+        # market-on-open fills of yesterday's orders
+        for sym, qty, kind in pending.pop(d, ()):
+            price = panel.open[d, sym]
+            fee = ib_equity_fee(qty, price)
+            cash -= qty * price + fee
+            shares = held.get(sym, 0.0) + qty
+            if shares == 0:
+                held.pop(sym, None)
+            else:
+                held[sym] = shares
+            fills.append((panel.days[d], sym, kind, qty, price, fee))
+
+        tpv = cash + sum(q * mark[d, s] for s, q in held.items())
+        equity[d] = tpv
+        if d + 1 >= n_days:
+            break
+
+        # on_data at the close of d: entries from the bar d-1 selection, then time exits
+        if d >= 1:
+            candidates = np.flatnonzero(signals[d - 1])
+            if candidates.size:
+                candidates = candidates[np.argsort(-dollar_volume[d - 1, candidates], kind="stable")]
+            for sym in candidates.tolist():
+                if len(active) >= p.max_positions:
+                    break
+                if sym in active or not np.isfinite(panel.close[d, sym]):
+                    continue
+                row = int(fill_row[d + 1, sym])
+                qty = float(np.trunc(target * tpv * (1.0 - FREE_PORTFOLIO_PCT) / panel.close[d, sym]))
+                active[sym] = panel.days[d]
+                if qty > 0 and row < n_days:
+                    pending.setdefault(row, []).append([sym, qty, BUY])
+
+        today = panel.days[d]
+        for sym in [s for s, t in active.items() if (today - t).astype(int) >= p.holding_days]:
+            del active[sym]
+            _cancel(pending, sym)           # liquidate() also cancels an unfilled entry
+            qty = held.get(sym, 0.0)
+            row = int(fill_row[d + 1, sym])
+            if qty != 0 and row < n_days:
+                pending.setdefault(row, []).append([sym, -qty, SELL])
+
+    return PanelResult(days=panel.days, equity=equity[:n_days],
+                       fills=np.array(fills, dtype=FILL_DTYPE), n_signals=signals.sum(axis=1),
+                       symbols=panel.symbols)
+
+
+def _cancel(pending: dict, sym: int):
+    for orders in pending.values():
+        orders[:] = [o for o in orders if o[0] != sym]
+
+
+def summarize(result: PanelResult, cash: float) -> dict:
+    """Standard metrics (common/metrics.py) from the daily equity and fills."""
+    engine = StreamingMetrics(cash)
+    for value in result.equity.tolist():
+        engine.on_equity(value)
+    for f in result.fills.tolist():
+        engine.on_fill(f[1], f[3], f[4], f[5])      # symbol, qty, price, fee
+    return engine.result()
+
+
+class PanelEvaluator:
+    """Per-worker sweep evaluator (common/sweep.run_sweep): loads the panel once, keeps one feature cache."""
+
+    def __init__(self, panel_path: str, cash: float = 100000.0, start: str = None, end: str = None):
+        self.panel = DailyPanel.load(panel_path).window(start, end)
+        self.features = FeatureCache(self.panel)
+        self.cash = cash
+
+    def __call__(self, params: dict) -> dict:
+        p = PanelParams.from_knobs(params, self.cash)
+        return summarize(backtest(self.panel, p, self.features), self.cash)
+
+
+def _parse_assignments(items: list) -> dict:
+    out = {}
+    for item in items or ():
+        name, _, values = item.partition("=")
+        if not values:
+            raise ValueError(f"expected name=v1,v2, got {item!r}")
+        out[name.strip()] = [v.strip() for v in values.split(",") if v.strip()]
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Panel backtest / sweeps for the gap breakout strategy.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="build a panel .npz from Lean daily zips")
+    b.add_argument("data", help="Lean data folder (contains equity/usa/daily)")
+    b.add_argument("out", help="output .npz")
+    b.add_argument("--tickers", default=None, help="comma separated (default: every daily zip)")
+    b.add_argument("--tickers-file", default=None, help="one ticker per line")
+
+    for name in ("run", "sweep"):
+        s = sub.add_parser(name)
+        s.add_argument("panel", help="panel .npz (panel_backtest.py build)")
+        if name == "sweep":
+            s.add_argument("store", help="JSON Lines result store (created or resumed)")
+            s.add_argument("--grid", action="append", default=[], help="name=v1,v2 (repeatable)")
+            s.add_argument("--workers", type=int, default=None)
+            s.add_argument("--csv", default=None, help="also write a summary CSV here")
+        else:
+            s.add_argument("--set", action="append", default=[], help="name=value (repeatable)")
+        s.add_argument("--cash", type=float, default=100000.0)
+        s.add_argument("--start", default=None, help="first trading day (YYYY-MM-DD)")
+        s.add_argument("--end", default=None, help="last trading day (YYYY-MM-DD)")
+    args = ap.parse_args(argv)
+
+    if args.command == "build":
+        tickers = [t.strip() for t in args.tickers.split(",")] if args.tickers else None
+        if args.tickers_file:
+            with open(args.tickers_file, "r", encoding="utf-8") as f:
+                tickers = [line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()]
+        panel = DailyPanel.from_lean(args.data, tickers)
+        panel.save(args.out)
+        print(f"[panel] {panel.n_days} days x {panel.n_symbols} symbols -> {args.out}")
+    elif args.command == "run":
+        knobs = {k: v[0] for k, v in _parse_assignments(args.set).items()}
+        check_knobs(STRATEGY, knobs)
+        evaluator = PanelEvaluator(args.panel, args.cash, args.start, args.end)
+        print(format_metrics(evaluator(knobs)))
+    else:
+        grid = _parse_assignments(args.grid)
+        if not grid:
+            ap.error("sweep needs at least one --grid name=v1,v2")
+        check_knobs(STRATEGY, grid)
+        context = {"evaluator": "panel", "panel": os.path.abspath(args.panel), "cash": args.cash,
+                   "start": args.start, "end": args.end}
+        run_sweep(grid, args.store, PanelEvaluator, (args.panel, args.cash, args.start, args.end),
+                  workers=args.workers, context=context)
+        if args.csv:
+            n = write_summary_csv(args.store, args.csv, sort_by="sharpe")
+            print(f"[sweep] wrote {n} rows to {args.csv}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+from AlgorithmImports import *
+import numpy as np
+from session_open import SessionOpenTracker
+from profiling import RunProfiler, profiled
+from journal import ObjectStoreSink, TradeJournal
+from metrics import StreamingMetrics, format_metrics
+from pair_engine import DEFAULT_PAIRS, PairEngine, parse_pairs
+
+class LeveragedETFIntradayMulti(QCAlgorithm):
+    """
+    V1 / V2 rules over a configurable pair universe (100+ ETF pairs):
+    - Pairs   : `pairs` parameter ("SPXL:SPY,NVDL:NVDA,...") or an object store CSV (`pairs_key`);
+                default SPXL/SPY, NVDL/NVDA, TMF/TLT
+    - Policy  : version=1 multi-entry (target_pct default 1/6), version=2 single position (default 1/3)
+    - Entry / exit / EOD rules as in LeveragedETFIntradayV1/V2; per-pair state lives in PairEngine
+      NumPy arrays and every slice is one vectorized pass, only pairs that act are touched in Python
+    - New Lean snake_case API
+    """
+
+    def initialize(self):
+        # ---- Parameters ----
+        self.version = int(self.get_parameter("version") or 1)
+        self.entry = float(self.get_parameter("entry") or 0.995)
+        self.sl    = float(self.get_parameter("sl")    or 0.993)
+        self.tp    = float(self.get_parameter("tp")    or 1.015)
+        self.target_pct = float(self.get_parameter("target_pct") or (1.0/6.0 if self.version == 1 else 1.0/3.0))
+        self.use_eod_liq = (self.get_parameter("eod_liq") or "true").lower() == "true"
+
+        self.profiler = RunProfiler(enabled=(self.get_parameter("profile") or "true").lower() == "true")
+        self.journal = TradeJournal(ObjectStoreSink(self.object_store, f"journal/{type(self).__name__}/{self.algorithm_id}"))
+
+        # ---- Dates & Cash ----
+        self.set_start_date(2024, 1, 1)
+        self.set_end_date(2025, 1, 1)
+        self.set_cash(100000)
+        # standard metrics (CAGR, Sharpe, MaxDD, ...) from fills + daily close equity, O(1) per update
+        self.metrics = StreamingMetrics(self.portfolio.total_portfolio_value)
+
+        self.set_brokerage_model(BrokerageName.INTERACTIVE_BROKERS, AccountType.CASH)
+
+        # ---- Universe: pair i = (trade_symbols[i], signal_symbols[i]) ----
+        mapping = self._load_pairs()
+        self.signal_symbols, self.trade_symbols = [], []
+        for etf, underlier in mapping.items():
+            self.signal_symbols.append(self.add_equity(underlier, Resolution.MINUTE).symbol)
+            self.trade_symbols.append(self.add_equity(etf, Resolution.MINUTE).symbol)
+        # an underlier can drive several ETFs (e.g. a bull and a bear fund)
+        self.pairs_of_signal = {}
+        for i, sig in enumerate(self.signal_symbols):
+            self.pairs_of_signal.setdefault(sig, []).append(i)
+
+        # ---- State (arrays, one slot per pair) ----
+        self.engine = PairEngine(len(mapping), self.version, self.entry, self.sl, self.tp)
+        self.px = np.full(len(mapping), np.nan)     # signal prices of the current slice
+        self.open_tracker = SessionOpenTracker(self.pairs_of_signal.keys())
+
+        if self.use_eod_liq:
+            self.schedule.on(
+                self.date_rules.every_day(),
+                self.time_rules.at(15, 59),
+                self._eod_liquidate
+            )
+        self.schedule.on(
+            self.date_rules.every_day(self.signal_symbols[0]),
+            self.time_rules.at(16, 0),
+            self._record_equity
+        )
+        self.log(f"[pairs] {len(mapping)} pairs, version={self.version}")
+
+    def _load_pairs(self) -> dict:
+        text = self.get_parameter("pairs")
+        key = self.get_parameter("pairs_key")
+        if not text and key and self.object_store.contains_key(key):
+            text = self.object_store.read(key)
+        return parse_pairs(text) if text else dict(DEFAULT_PAIRS)
+
+    # ----- helpers -----
+    @profiled("open_capture")
+    def _on_session_open(self, signal_symbol: Symbol):
+        open_px = self.open_tracker.open_ref[signal_symbol]
+        for i in self.pairs_of_signal[signal_symbol]:
+            self.engine.set_open(i, open_px)
+        self.journal.event(self.time, signal_symbol, "open_ref", open_px)
+
+    @profiled(per_call=("orders",))
+    def _eod_liquidate(self):
+        for i in np.flatnonzero(self.engine.held()):
+            tra = self.trade_symbols[i]
+            if self.portfolio[tra].invested:
+                self.liquidate(tra)
+                self.profiler.add("orders")
+                self.journal.event(self.time, tra, "eod_liq", self.securities[tra].price)
+        self.engine.clear()
+
+    # ----- core callbacks -----
+
+    def _record_equity(self):
+        self.metrics.on_equity(self.portfolio.total_portfolio_value, self.time.date())
+
+    @profiled(per_call=("orders",))
+    def on_data(self, data: Slice):
+        for sig in self.open_tracker.update(data):
+            self._on_session_open(sig)
+
+        if self.time.hour < 9 or (self.time.hour == 9 and self.time.minute < 31) or self.time.hour >= 16:
+            return
+
+        # signal prices of this slice (NaN = no bar), one pass over the bars that arrived
+        px = self.px
+        px.fill(np.nan)
+        for sym, bar in data.bars.items():
+            pairs = self.pairs_of_signal.get(sym)
+            if pairs is not None:
+                px[pairs] = bar.close
+
+        day = self.time.toordinal()
+        engine = self.engine
+        exits = [i for i in engine.exit_candidates(px) if self.securities[self.trade_symbols[i]].is_tradable]
+        exits = np.array(exits, dtype=np.int64)
+        exit_qty = dict(zip(exits.tolist(), engine.close_crossed(exits, px).tolist()))
+        entries = set(engine.entries(px, day).tolist())     # evaluated after the exits (V2: flat again)
+
+        # per pair in universe order: netted exit first, then the entry (same as V1/V2)
+        for i in sorted(exit_qty.keys() | entries):
+            tra = self.trade_symbols[i]
+            qty = exit_qty.get(i, 0.0)
+            if qty != 0:
+                self.market_order(tra, -qty)
+                self.profiler.add("orders")
+                self.journal.event(self.time, tra, "exit", px[i])
+            if i in entries and self.securities[tra].is_tradable:
+                size = self.calculate_order_quantity(tra, self.target_pct)
+                if size != 0:
+                    self.market_order(tra, size)
+                    self.profiler.add("orders")
+                    self.journal.event(self.time, tra, "entry", px[i])
+                    engine.open_lot(i, float(px[i]), float(size), day)
+
+    @profiled()
+    def on_order_event(self, order_event: OrderEvent):
+        if order_event.status == OrderStatus.FILLED:
+            self.journal.fill(self.time, order_event.symbol, order_event.fill_quantity, order_event.fill_price,
+                              order_event.order_fee.value.amount, order_event.order_id)
+            self.metrics.on_fill(order_event.symbol, order_event.fill_quantity, order_event.fill_price,
+                                 order_event.order_fee.value.amount)
+
+    def on_end_of_algorithm(self):
+        self.log(f"[open_capture] {self.open_tracker.summary()}")
+        self.journal.flush()
+        self.log(f"[journal] {self.journal.summary()}")
+        self.log(f"[metrics] {format_metrics(self.metrics.result())}")
+        for line in self.profiler.report():
+            self.log(line)
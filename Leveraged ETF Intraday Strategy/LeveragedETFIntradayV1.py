@@ -1,11 +1,18 @@
 from AlgorithmImports import *
+import heapq
+from array import array
+from session_open import SessionOpenTracker
+from profiling import RunProfiler, profiled
+from journal import ObjectStoreSink, TradeJournal
+from metrics import StreamingMetrics, format_metrics
 
 class LeveragedETFIntradayV1(QCAlgorithm):
     """
     Version 1 (multi-entry):
     - Signals from underliers (SPY/NVDA/TLT), trade leveraged ETFs (SPXL/NVDL/TMF)
     - Entry   : signal_price < open_ref * entry (default 0.995)
-    - Exit    : take-profit at tp (1.015×entry_price) or stop-loss at sl (0.993×entry_price)
+    - Exit    : take-profit at tp (1.015×entry_price) or stop-loss at sl (0.993×entry_price);
+                lots crossing on the same bar are netted into one order
     - Sizing  : each fill ~ target_pct (default 1/6)
     - RTH only; optional EOD liquidation (15:59)
     - New Lean snake_case API
@@ -19,10 +26,17 @@ class LeveragedETFIntradayV1(QCAlgorithm):
         self.target_pct = float(self.get_parameter("target_pct") or (1.0/6.0))
         self.use_eod_liq = (self.get_parameter("eod_liq") or "true").lower() == "true"
 
+        # hot-path timings / counters, reported at the end of the run
+        self.profiler = RunProfiler(enabled=(self.get_parameter("profile") or "true").lower() == "true")
+        # fills + signal events in columnar batches (object store), instead of one log line per fill
+        self.journal = TradeJournal(ObjectStoreSink(self.object_store, f"journal/{type(self).__name__}/{self.algorithm_id}"))
+
         # ---- Dates & Cash ----
         self.set_start_date(2024, 1, 1)
         self.set_end_date(2025, 1, 1)
         self.set_cash(100000)
+        # standard metrics (CAGR, Sharpe, MaxDD, ...) from fills + daily close equity, O(1) per update
+        self.metrics = StreamingMetrics(self.portfolio.total_portfolio_value)
 
         # Brokerage/costs (example; adjust as needed)
         self.set_brokerage_model(BrokerageName.INTERACTIVE_BROKERS, AccountType.CASH)
@@ -39,19 +53,11 @@ class LeveragedETFIntradayV1(QCAlgorithm):
         # ---- State ----
         self.open_ref = {sig: None for sig in self.signal_assets.values()}   # day's open reference for signal
         self.last_trade_date = {tra: None for tra in self.trade_assets.values()}
-        # multiple partial positions per traded symbol
-        self.positions = {tra: [] for tra in self.trade_assets.values()}     # list of dicts: {'entry': px, 'qty': qty}
+        # multiple partial positions per traded symbol, indexed by their sl/tp trigger prices
+        self.positions = {tra: LotBook(self.sl, self.tp) for tra in self.trade_assets.values()}
 
-        # Warmup a bit to ensure indicators/history available if needed
-        self.set_warmup(timedelta(days=5))
-
-        # ---- Schedule: capture "open" reference at 09:31 (first 1-min bar open at 09:30 is ready) ----
-        for etf, sig in self.signal_assets.items():
-            self.schedule.on(
-                self.date_rules.every_day(sig),
-                self.time_rules.at(9, 31),
-                self._make_open_capture(sig)
-            )
+        # ---- Open reference: first RTH bar OPEN (09:30 bar), captured from the on_data stream ----
+        self.open_tracker = SessionOpenTracker(self.signal_assets.values())
 
         # ---- Optional EOD liquidation ----
         if self.use_eod_liq:
@@ -60,61 +66,46 @@ class LeveragedETFIntradayV1(QCAlgorithm):
                 self.time_rules.at(15, 59),
                 self._eod_liquidate
             )
+        self.schedule.on(
+            self.date_rules.every_day(next(iter(self.signal_assets.values()))),
+            self.time_rules.at(16, 0),
+            self._record_equity
+        )
 
     # ----- helpers -----
-    def _make_open_capture(self, signal_symbol: Symbol):
-        def _cb():
-            # Try to read today's 09:30 1-min bar OPEN via history; fallback to current price
-            day = self.time.date()
-            open_px = None
-            try:
-                hist = self.history(signal_symbol, 40, Resolution.MINUTE)  # ~ last 40 minutes
-                if not hist.empty:
-                    # hist is pandas DataFrame with MultiIndex (symbol,time) in most cases
-                    df = hist if 'open' in hist.columns else None
-                    if df is not None:
-                        # filter today's 09:30
-                        # some environments use timezone-aware index; rely on .index for hour/minute
-                        df_today = df.loc[(slice(None)), :]  # no-op, keep for clarity
-                        # fallback: linear scan to find 09:30 bar for today
-                        for ts, row in df.iterrows():
-                            # ts may be (symbol, time) or just time; normalize
-                            if isinstance(ts, tuple):
-                                _, tstamp = ts
-                            else:
-                                tstamp = ts
-                            if tstamp.date() == day and tstamp.hour == 9 and tstamp.minute == 30:
-                                open_px = float(row["open"])
-                                break
-            except Exception as e:
-                self.debug(f"[open_capture] history error for {signal_symbol.Value}: {e}")
-
-            if open_px is None:
-                # fallback to current price (less ideal but robust)
-                open_px = self.securities[signal_symbol].price
-
-            self.open_ref[signal_symbol] = open_px
-            # reset "traded today" flag for the paired traded symbol
-            for etf, sig in self.signal_assets.items():
-                if sig == signal_symbol:
-                    tra = self.trade_assets[etf]
-                    self.last_trade_date[tra] = None
-
-            self.debug(f"[open_capture] {signal_symbol.Value} open_ref={open_px:.4f} at {self.time}")
-
-        return _cb
+    @profiled("open_capture")
+    def _on_session_open(self, signal_symbol: Symbol):
+        open_px = self.open_tracker.open_ref[signal_symbol]
+        self.open_ref[signal_symbol] = open_px
+        # reset "traded today" flag for the paired traded symbol
+        for etf, sig in self.signal_assets.items():
+            if sig == signal_symbol:
+                tra = self.trade_assets[etf]
+                self.last_trade_date[tra] = None
+
+        self.journal.event(self.time, signal_symbol, "open_ref", open_px)
 
+    @profiled(per_call=("orders",))
     def _eod_liquidate(self):
         for etf, tra in self.trade_assets.items():
             if self.portfolio[tra].invested:
                 self.liquidate(tra)
+                self.profiler.add("orders")
+                self.journal.event(self.time, tra, "eod_liq", self.securities[tra].price)
             # reset intraday book-keeping if desired
-            self.positions[tra] = []
-        self.debug(f"[EOD] Liquidated all at {self.time}")
+            self.positions[tra].clear()
 
     # ----- core callbacks -----
+
+    def _record_equity(self):
+        self.metrics.on_equity(self.portfolio.total_portfolio_value, self.time.date())
+
+    @profiled(per_call=("orders",))
     def on_data(self, data: Slice):
-        # RTH guard: 09:31 ~ 16:00 (we captured open_ref at 09:31)
+        for sig in self.open_tracker.update(data):
+            self._on_session_open(sig)
+
+        # RTH guard: 09:31 ~ 16:00 (the 09:30 bar arrives at 09:31)
         if self.time.hour < 9 or (self.time.hour == 9 and self.time.minute < 31) or self.time.hour >= 16:
             return
 
@@ -133,30 +124,114 @@ class LeveragedETFIntradayV1(QCAlgorithm):
 
             px = data[sig].price
 
-            # --- exits for all partial positions ---
-            survivors = []
-            for pos in self.positions[tra]:
-                entry = pos["entry"]; qty = pos["qty"]
-                if px <= entry * self.sl or px >= entry * self.tp:
-                    self.market_order(tra, -qty)
-                else:
-                    survivors.append(pos)
-            self.positions[tra] = survivors
+            # --- exits: only lots whose sl/tp trigger was crossed, netted into one order ---
+            qty_out, n_sl, n_tp = self.positions[tra].pop_crossed(px)
+            if qty_out != 0:
+                self.market_order(tra, -qty_out)
+                self.profiler.add("orders")
+                if n_sl:
+                    self.journal.event(self.time, tra, "sl", px)
+                if n_tp:
+                    self.journal.event(self.time, tra, "tp", px)
 
             # --- entry: once per day per symbol (but multiple partial positions over time allowed) ---
             if self.last_trade_date[tra] != current_date and px < self.open_ref[sig] * self.entry:
                 qty = self.calculate_order_quantity(tra, self.target_pct)
                 if qty != 0:
                     self.market_order(tra, qty)
-                    self.positions[tra].append({"entry": px, "qty": qty})
+                    self.profiler.add("orders")
+                    self.journal.event(self.time, tra, "entry", px)
+                    self.positions[tra].add(px, qty)
                     self.last_trade_date[tra] = current_date
 
+    @profiled()
     def on_order_event(self, order_event: OrderEvent):
         if order_event.status == OrderStatus.FILLED:
-            order = self.transactions.get_order_by_id(order_event.order_id)
-            self.log(
-                f"TRADE | {self.time} | {order.symbol.Value} | "
-                f"{'BUY' if order.direction == OrderDirection.BUY else 'SELL'} | "
-                f"Qty: {order_event.fill_quantity} | Price: {order_event.fill_price:.4f}"
-            )
-
+            # fill fields come with the event: no order lookup, no string formatting per fill
+            self.journal.fill(self.time, order_event.symbol, order_event.fill_quantity, order_event.fill_price,
+                              order_event.order_fee.value.amount, order_event.order_id)
+            self.metrics.on_fill(order_event.symbol, order_event.fill_quantity, order_event.fill_price,
+                                 order_event.order_fee.value.amount)
+
+    def on_end_of_algorithm(self):
+        self.log(f"[open_capture] {self.open_tracker.summary()}")
+        self.journal.flush()
+        self.log(f"[journal] {self.journal.summary()}")
+        self.log(f"[metrics] {format_metrics(self.metrics.result())}")
+        for line in self.profiler.report():
+            self.log(line)
+
+
+class LotBook:
+    """
+    Open lots of one traded symbol, indexed by their exit triggers:
+    - Slots    : entry / qty / generation arrays indexed by lot slot; closed slots are reused
+    - Triggers : a max-heap of stop triggers (entry × sl) and a min-heap of take-profit triggers (entry × tp),
+                 so a bar only touches lots whose trigger was crossed (stale heap entries are skipped lazily
+                 and compacted when they outnumber the live lots)
+    - Netting  : pop_crossed() returns the total quantity of all crossed lots for one exit order
+    """
+    def __init__(self, sl: float, tp: float):
+        self.sl = sl
+        self.tp = tp
+        self.clear()
+
+    def clear(self):
+        self.entry = array("d")
+        self.qty = array("d")
+        self.gen = array("q")       # bumped when a slot is closed: heap entries of the old lot go stale
+        self.free: list[int] = []
+        self.stops: list = []       # (-entry*sl, slot, gen)
+        self.targets: list = []     # (entry*tp, slot, gen)
+        self.live = 0
+
+    def __len__(self) -> int:
+        return self.live
+
+    def add(self, entry: float, qty: float) -> int:
+        if self.free:
+            i = self.free.pop()
+            self.entry[i], self.qty[i] = entry, qty
+        else:
+            i = len(self.entry)
+            self.entry.append(entry)
+            self.qty.append(qty)
+            self.gen.append(0)
+        g = self.gen[i]
+        heapq.heappush(self.stops, (-(entry * self.sl), i, g))
+        heapq.heappush(self.targets, (entry * self.tp, i, g))
+        self.live += 1
+        return i
+
+    def _close(self, i: int) -> float:
+        qty = self.qty[i]
+        self.qty[i] = 0.0
+        self.gen[i] += 1
+        self.free.append(i)
+        self.live -= 1
+        return qty
+
+    def pop_crossed(self, px: float):
+        """Close every lot with px <= entry*sl or px >= entry*tp; returns (total qty, n stopped, n taken)."""
+        total, n_sl, n_tp = 0.0, 0, 0
+        stops, targets, gen = self.stops, self.targets, self.gen
+        while stops and px <= -stops[0][0]:
+            _, i, g = heapq.heappop(stops)
+            if gen[i] == g:
+                total += self._close(i)
+                n_sl += 1
+        while targets and px >= targets[0][0]:
+            _, i, g = heapq.heappop(targets)
+            if gen[i] == g:
+                total += self._close(i)
+                n_tp += 1
+        if len(stops) + len(targets) > 4 * self.live + 64:
+            self._compact()
+        return total, n_sl, n_tp
+
+    def _compact(self):
+        live = [(i, self.gen[i]) for i in range(len(self.entry)) if self.qty[i] != 0.0]
+        self.stops = [(-(self.entry[i] * self.sl), i, g) for i, g in live]
+        self.targets = [(self.entry[i] * self.tp, i, g) for i, g in live]
+        heapq.heapify(self.stops)
+        heapq.heapify(self.targets)
@@ -1,4 +1,8 @@
 from AlgorithmImports import *
+from session_open import SessionOpenTracker
+from profiling import RunProfiler, profiled
+from journal import ObjectStoreSink, TradeJournal
+from metrics import StreamingMetrics, format_metrics
 
 class LeveragedETFIntradayV2(QCAlgorithm):
     """
@@ -19,10 +23,17 @@ class LeveragedETFIntradayV2(QCAlgorithm):
         self.target_pct = float(self.get_parameter("target_pct") or (1.0/3.0))
         self.use_eod_liq = (self.get_parameter("eod_liq") or "true").lower() == "true"
 
+        # hot-path timings / counters, reported at the end of the run
+        self.profiler = RunProfiler(enabled=(self.get_parameter("profile") or "true").lower() == "true")
+        # fills + signal events in columnar batches (object store), instead of one log line per fill
+        self.journal = TradeJournal(ObjectStoreSink(self.object_store, f"journal/{type(self).__name__}/{self.algorithm_id}"))
+
         # ---- Dates & Cash ----
         self.set_start_date(2024, 1, 1)
         self.set_end_date(2025, 1, 1)
         self.set_cash(100000)
+        # standard metrics (CAGR, Sharpe, MaxDD, ...) from fills + daily close equity, O(1) per update
+        self.metrics = StreamingMetrics(self.portfolio.total_portfolio_value)
 
         self.set_brokerage_model(BrokerageName.INTERACTIVE_BROKERS, AccountType.CASH)
 
@@ -41,15 +52,8 @@ class LeveragedETFIntradayV2(QCAlgorithm):
         # single active position per traded symbol: dict or None
         self.position = {tra: None for tra in self.trade_assets.values()}
 
-        self.set_warmup(timedelta(days=5))
-
-        # capture open at 09:31
-        for etf, sig in self.signal_assets.items():
-            self.schedule.on(
-                self.date_rules.every_day(sig),
-                self.time_rules.at(9, 31),
-                self._make_open_capture(sig)
-            )
+        # open reference from the first RTH bar, pushed through on_data
+        self.open_tracker = SessionOpenTracker(self.signal_assets.values())
 
         if self.use_eod_liq:
             self.schedule.on(
@@ -57,39 +61,39 @@ class LeveragedETFIntradayV2(QCAlgorithm):
                 self.time_rules.at(15, 59),
                 self._eod_liquidate
             )
+        self.schedule.on(
+            self.date_rules.every_day(next(iter(self.signal_assets.values()))),
+            self.time_rules.at(16, 0),
+            self._record_equity
+        )
+
+    @profiled("open_capture")
+    def _on_session_open(self, signal_symbol: Symbol):
+        open_px = self.open_tracker.open_ref[signal_symbol]
+        self.open_ref[signal_symbol] = open_px
+        for etf, sig in self.signal_assets.items():
+            if sig == signal_symbol:
+                tra = self.trade_assets[etf]
+                self.last_trade_date[tra] = None
+        self.journal.event(self.time, signal_symbol, "open_ref", open_px)
 
-    def _make_open_capture(self, signal_symbol: Symbol):
-        def _cb():
-            day = self.time.date()
-            open_px = None
-            try:
-                hist = self.history(signal_symbol, 40, Resolution.MINUTE)
-                if not hist.empty and 'open' in hist.columns:
-                    for ts, row in hist.iterrows():
-                        tstamp = ts[1] if isinstance(ts, tuple) else ts
-                        if tstamp.date() == day and tstamp.hour == 9 and tstamp.minute == 30:
-                            open_px = float(row["open"])
-                            break
-            except Exception as e:
-                self.debug(f"[open_capture] history error for {signal_symbol.Value}: {e}")
-            if open_px is None:
-                open_px = self.securities[signal_symbol].price
-            self.open_ref[signal_symbol] = open_px
-            for etf, sig in self.signal_assets.items():
-                if sig == signal_symbol:
-                    tra = self.trade_assets[etf]
-                    self.last_trade_date[tra] = None
-            self.debug(f"[open_capture] {signal_symbol.Value} open_ref={open_px:.4f} at {self.time}")
-        return _cb
-
+    @profiled(per_call=("orders",))
     def _eod_liquidate(self):
         for etf, tra in self.trade_assets.items():
             if self.portfolio[tra].invested:
                 self.liquidate(tra)
+                self.profiler.add("orders")
+                self.journal.event(self.time, tra, "eod_liq", self.securities[tra].price)
             self.position[tra] = None
-        self.debug(f"[EOD] Liquidated all at {self.time}")
 
+    def _record_equity(self):
+        self.metrics.on_equity(self.portfolio.total_portfolio_value, self.time.date())
+
+    @profiled(per_call=("orders",))
     def on_data(self, data: Slice):
+        for sig in self.open_tracker.update(data):
+            self._on_session_open(sig)
+
         if self.time.hour < 9 or (self.time.hour == 9 and self.time.minute < 31) or self.time.hour >= 16:
             return
 
@@ -113,6 +117,8 @@ class LeveragedETFIntradayV2(QCAlgorithm):
                 entry = pos["entry"]; qty = pos["qty"]
                 if px <= entry * self.sl or px >= entry * self.tp:
                     self.market_order(tra, -qty)
+                    self.profiler.add("orders")
+                    self.journal.event(self.time, tra, "tp" if px >= entry * self.tp else "sl", px)
                     self.position[tra] = None
 
             # entry only if flat AND not traded yet today
@@ -122,14 +128,24 @@ class LeveragedETFIntradayV2(QCAlgorithm):
                 qty = self.calculate_order_quantity(tra, self.target_pct)
                 if qty != 0:
                     self.market_order(tra, qty)
+                    self.profiler.add("orders")
+                    self.journal.event(self.time, tra, "entry", px)
                     self.position[tra] = {"entry": px, "qty": qty}
                     self.last_trade_date[tra] = current_date
 
+    @profiled()
     def on_order_event(self, order_event: OrderEvent):
         if order_event.status == OrderStatus.FILLED:
-            order = self.transactions.get_order_by_id(order_event.order_id)
-            self.log(
-                f"TRADE | {self.time} | {order.symbol.Value} | "
-                f"{'BUY' if order.direction == OrderDirection.BUY else 'SELL'} | "
-                f"Qty: {order_event.fill_quantity} | Price: {order_event.fill_price:.4f}"
-            )
+            # fill fields come with the event: no order lookup, no string formatting per fill
+            self.journal.fill(self.time, order_event.symbol, order_event.fill_quantity, order_event.fill_price,
+                              order_event.order_fee.value.amount, order_event.order_id)
+            self.metrics.on_fill(order_event.symbol, order_event.fill_quantity, order_event.fill_price,
+                                 order_event.order_fee.value.amount)
+
+    def on_end_of_algorithm(self):
+        self.log(f"[open_capture] {self.open_tracker.summary()}")
+        self.journal.flush()
+        self.log(f"[journal] {self.journal.summary()}")
+        self.log(f"[metrics] {format_metrics(self.metrics.result())}")
+        for line in self.profiler.report():
+            self.log(line)
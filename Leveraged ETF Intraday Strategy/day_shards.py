@@ -0,0 +1,242 @@
+"""
+Day-sharded, incremental replay for eod_liq=true runs of LeveragedETFIntradayV1/V2.
+
+With EOD liquidation every day starts flat, so the *timing* of a day's fills (which bar enters,
+which bar exits, at what prices) depends only on that day's bars and the timing knobs
+(version, entry, sl, tp, open_ref) -- not on equity, cash or target_pct. Sizing is the only
+part that needs the previous day's equity.
+
+- Shard : per-(timing params, day) skeleton of fills + the traded-ETF prices needed to size them,
+          computed in parallel over blocks of days
+- Chain : sequential sizing pass over the skeleton fills (a few per day) carrying cash/equity
+- Cache : one .npz per timing key, per-day CRC of the bars; extending the date range or
+          re-running a sweep (e.g. over target_pct) only computes days not yet seen
+
+Days that are not independent fall back to an exact replay() of that single day with the
+carried state: a lot entered after the 15:59 liquidation (held overnight), or a fill that
+sizes to 0 shares (Lean then retries on later bars).
+"""
+import hashlib
+import json
+import os
+import zlib
+from dataclasses import dataclass, replace
+from multiprocessing import Pool
+
+import numpy as np
+
+from replay import (BARS_PER_DAY, ENTRY, FILL_DTYPE, PAIRS, ReplayParams, ReplayResult, SessionGrid,
+                    _ffill, ib_equity_fee, order_quantity, replay)
+
+TIMING_FIELDS = ("version", "entry", "sl", "tp", "open_ref")
+SHARD_CASH = 1e12      # skeleton runs never size to 0 shares
+
+
+@dataclass
+class DayShard:
+    day: np.datetime64
+    crc: int
+    fills: np.ndarray      # FILL_DTYPE, flat start (qty/fee are placeholders)
+    marks: np.ndarray      # (n_fills, n_pairs) traded ETF last prices at each fill's bar
+    entry_px: np.ndarray   # (n_fills,) signal price recorded as the lot's entry (NaN for exits)
+    close: np.ndarray      # (n_pairs,) traded ETF last prices at the 16:00 close
+    carry: bool            # a lot is still open after the close
+
+
+def timing_key(params: ReplayParams, pairs: dict) -> str:
+    fields = {name: getattr(params, name) for name in TIMING_FIELDS}
+    return json.dumps({"params": fields, "pairs": pairs}, sort_keys=True)
+
+
+def day_crcs(grid: SessionGrid, pairs: dict) -> np.ndarray:
+    """CRC of each day's relevant bars (and the previous day's, which provides price context)."""
+    tickers = sorted(set(pairs) | set(pairs.values()))
+    per_day = np.zeros(grid.n_days, dtype=np.uint32)
+    for d in range(grid.n_days):
+        crc = 0
+        for t in tickers:
+            crc = zlib.crc32(np.ascontiguousarray(grid.opens[t][d]).tobytes(), crc)
+            crc = zlib.crc32(np.ascontiguousarray(grid.closes[t][d]).tobytes(), crc)
+        per_day[d] = crc
+    prev = np.concatenate(([0], per_day[:-1])).astype(np.uint32)
+    return per_day ^ (prev * np.uint32(2654435761))
+
+
+def _shard_block(window: SessionGrid, params: ReplayParams, pairs: dict, has_context: bool,
+                 crcs: list) -> list:
+    """Skeleton shards for every day of `window` (row 0 is context only when has_context)."""
+    etfs = list(pairs)
+    tra = np.stack([_ffill(window.closes[etf].ravel()) for etf in etfs], axis=1)   # (bars, n_pairs)
+    sig = {etf: window.closes[pairs[etf]].ravel() for etf in etfs}
+    skeleton = replace(params, cash=SHARD_CASH)
+    out = []
+    first = 1 if has_context else 0
+    for i, d in enumerate(range(first, window.n_days)):
+        ctx = 1 if d > 0 else 0
+        res = replay(window.window(d - ctx, d + 1), skeleton, pairs, first_day=ctx)
+        f = res.fills
+        g = (d * BARS_PER_DAY + f["slot"]).astype(np.int64)
+        entry_px = np.full(f.size, np.nan)
+        for k in np.flatnonzero(f["kind"] == ENTRY):
+            entry_px[k] = sig[etfs[f["pair"][k]]][g[k]]
+        out.append(DayShard(day=window.days[d], crc=int(crcs[i]), fills=f, marks=tra[g],
+                            entry_px=entry_px, close=tra[(d + 1) * BARS_PER_DAY - 1].copy(),
+                            carry=bool(res.open_lots)))
+    return out
+
+
+def compute_shards(grid: SessionGrid, params: ReplayParams, day_rows: list, pairs: dict = None,
+                   crcs: np.ndarray = None, workers: int = 1, block: int = 20) -> list:
+    """Skeleton shards for grid rows `day_rows`, fanned out over a process pool in blocks of days."""
+    pairs = pairs or PAIRS
+    crcs = day_crcs(grid, pairs) if crcs is None else crcs
+    tasks = []
+    rows = sorted(day_rows)
+    for i in range(0, len(rows), block):
+        chunk = rows[i:i + block]
+        # contiguous runs only, so a block never simulates days it was not asked for
+        for run in np.split(np.array(chunk), np.flatnonzero(np.diff(chunk) != 1) + 1):
+            lo, hi = int(run[0]), int(run[-1]) + 1
+            ctx = 1 if lo > 0 else 0
+            tasks.append((grid.window(lo - ctx, hi), params, pairs, bool(ctx), [int(c) for c in crcs[lo:hi]]))
+    if workers > 1 and len(tasks) > 1:
+        with Pool(workers) as pool:
+            blocks = pool.starmap(_shard_block, tasks)
+    else:
+        blocks = [_shard_block(*t) for t in tasks]
+    return [s for b in blocks for s in b]
+
+
+class ShardCache:
+    """One .npz per timing key under `folder`; shards are re-used while their day CRC matches."""
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, hashlib.sha1(key.encode()).hexdigest()[:20] + ".npz")
+
+    def load(self, key: str) -> dict:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return {}
+        with np.load(path) as z:
+            if str(z["key"]) != key:
+                return {}
+            offsets, crcs, close, carry = z["offsets"], z["crcs"], z["close"], z["carry"]
+            fills, marks, entry_px = z["fills"], z["marks"], z["entry_px"]
+            shards = {}
+            for i, day in enumerate(z["days"]):
+                lo, hi = offsets[i], offsets[i + 1]
+                shards[day] = DayShard(day=day, crc=int(crcs[i]), fills=fills[lo:hi], marks=marks[lo:hi],
+                                       entry_px=entry_px[lo:hi], close=close[i], carry=bool(carry[i]))
+            return shards
+
+    def save(self, key: str, shards: dict, n_pairs: int):
+        ordered = [shards[d] for d in sorted(shards)]
+        sizes = [s.fills.size for s in ordered]
+        path = self._path(key)
+        tmp = path + f".{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp,
+            key=np.array(key),
+            days=np.array([s.day for s in ordered], dtype="datetime64[D]"),
+            crcs=np.array([s.crc for s in ordered], dtype=np.uint32),
+            offsets=np.concatenate(([0], np.cumsum(sizes))).astype(np.int64),
+            fills=np.concatenate([s.fills for s in ordered]) if ordered else np.empty(0, FILL_DTYPE),
+            marks=np.concatenate([s.marks for s in ordered]) if ordered else np.empty((0, n_pairs)),
+            entry_px=np.concatenate([s.entry_px for s in ordered]) if ordered else np.empty(0),
+            close=np.array([s.close for s in ordered]).reshape(len(ordered), n_pairs),
+            carry=np.array([s.carry for s in ordered], dtype=bool),
+        )
+        os.replace(tmp, path)    # atomic: concurrent sweep workers never see a half-written cache
+
+
+def sharded_replay(grid: SessionGrid, params: ReplayParams = None, pairs: dict = None,
+                   cache_dir: str = None, workers: int = 1) -> ReplayResult:
+    """
+    Same result as replay(grid, params) for eod_liq=true, computed from per-day shards.
+    Only days missing from (or stale in) the cache are simulated.
+    """
+    params = params or ReplayParams()
+    pairs = pairs or PAIRS
+    if not params.eod_liq:
+        raise ValueError("day sharding needs eod_liq=true: without EOD liquidation lots carry across days")
+    n_pairs = len(pairs)
+    key = timing_key(params, pairs)
+    crcs = day_crcs(grid, pairs)
+
+    cache = ShardCache(cache_dir) if cache_dir else None
+    shards = cache.load(key) if cache else {}
+    missing = [d for d in range(grid.n_days)
+               if grid.days[d] not in shards or shards[grid.days[d]].crc != int(crcs[d])]
+    if missing:
+        for s in compute_shards(grid, params, missing, pairs, crcs, workers):
+            shards[s.day] = s
+        if cache:
+            cache.save(key, shards, n_pairs)
+    return chain(grid, [shards[d] for d in grid.days], params, pairs)
+
+
+def chain(grid: SessionGrid, shards: list, params: ReplayParams, pairs: dict) -> ReplayResult:
+    """Size the skeleton fills day by day from the running cash/equity."""
+    etfs = list(pairs)
+    target = params.resolved_target()
+    cash = float(params.cash)
+    hold = np.zeros(len(etfs))
+    lots: list[tuple] = []        # open (etf, entry_px, qty) after the previous close
+    equity = np.empty(len(shards))
+    fills: list[np.ndarray] = []
+
+    for d, sh in enumerate(shards):
+        sized = None if lots else _size_day(sh, target, cash, hold.copy())
+        if sized is None:
+            # not independent (carried lot or a 0-share fill): exact single-day replay with the carried state
+            ctx = 1 if d > 0 else 0
+            res = replay(grid.window(d - ctx, d + 1), replace(params, cash=cash), pairs,
+                         initial_lots=lots, first_day=ctx)
+            day_fills, lots = res.fills, res.open_lots
+            hold[:] = 0.0
+            for etf, _, qty in lots:
+                hold[etfs.index(etf)] += qty
+            equity[d] = res.equity[-1]
+            cash = equity[d] - float(hold @ sh.close)
+        else:
+            day_fills, cash, lots = sized
+            hold[:] = 0.0
+            for etf_idx, _, qty in lots:
+                hold[etf_idx] += qty
+            lots = [(etfs[p], px, q) for p, px, q in lots]
+            equity[d] = cash + float(hold @ sh.close)
+        fills.append(day_fills)
+
+    daily_pnl = np.diff(equity, prepend=float(params.cash))
+    return ReplayResult(
+        days=grid.days.copy(),
+        equity=equity,
+        daily_pnl=daily_pnl,
+        fills=np.concatenate(fills) if fills else np.empty(0, FILL_DTYPE),
+        open_lots=lots,
+    )
+
+
+def _size_day(sh: DayShard, target: float, cash: float, hold: np.ndarray):
+    """Fast path for a flat start: returns (fills, cash, open lots) or None when a fill sizes to 0."""
+    out = sh.fills.copy()
+    entry_px = {}
+    for i in range(out.size):
+        p, price = int(out["pair"][i]), float(out["price"][i])
+        if out["kind"][i] == ENTRY:
+            qty = order_quantity(target, cash + float(hold @ sh.marks[i]), hold[p], price, cash)
+            if qty == 0:
+                return None
+            entry_px[p] = float(sh.entry_px[i])
+        else:
+            qty = -hold[p]
+        fee = ib_equity_fee(qty, price)
+        cash -= qty * price + fee
+        hold[p] += qty
+        out["qty"][i], out["fee"][i] = qty, fee
+    lots = [(p, entry_px[p], float(hold[p])) for p in np.flatnonzero(hold)]
+    return out, cash, lots
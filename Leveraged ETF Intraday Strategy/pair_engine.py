@@ -0,0 +1,149 @@
+"""
+Array-backed state + vectorized per-slice rules for the leveraged ETF intraday strategy over any
+number of (traded ETF, signal underlier) pairs. Used by LeveragedETFIntradayMulti.py; no Lean imports,
+so the same engine runs in offline tools and benchmarks.
+
+- State  : per-pair NumPy arrays (open_ref, traded day, lot entry / qty matrix, nearest sl / tp trigger)
+- Slice  : exit_candidates() and entries() evaluate every pair in one vectorized pass; only pairs that actually
+           act come back as index arrays, so the Python work per bar is proportional to the orders sent
+- Policy : version=1 multi-lot (one new lot per pair per day), version=2 single position per pair
+"""
+import numpy as np
+
+DEFAULT_PAIRS = {"SPXL": "SPY", "NVDL": "NVDA", "TMF": "TLT"}
+# column names a pairs CSV may start with; such a first row is a header, not a pair
+HEADER_NAMES = {"etf", "traded", "trade", "leveraged", "underlier", "underlying", "signal", "symbol", "ticker"}
+
+
+def parse_pairs(text: str) -> dict:
+    """
+    "SPXL:SPY,NVDL:NVDA" or one pair per line ("ETF,UNDERLIER" / "ETF:UNDERLIER", '#' comments)
+    -> {etf: underlier}, in the given order. A first row of column names ("etf,underlier") is skipped.
+    """
+    text = "\n".join(line.split("#", 1)[0] for line in text.splitlines())
+    if ":" in text:
+        items, sep = text.replace("\n", ",").replace(";", ",").split(","), ":"
+    else:
+        items, sep = text.splitlines(), ","     # CSV file: one "ETF,UNDERLIER" row per line
+    pairs = {}
+    first = True
+    for item in items:
+        if not item.strip():
+            continue
+        etf, found, underlier = item.partition(sep)
+        if not found or not etf.strip() or not underlier.strip():
+            raise ValueError(f"expected ETF{sep}UNDERLIER, got {item.strip()!r}")
+        if first and {etf.strip().lower(), underlier.strip().lower()} <= HEADER_NAMES:
+            first = False
+            continue
+        first = False
+        pairs[etf.strip().upper()] = underlier.strip().upper()
+    if not pairs:
+        raise ValueError("empty pair list")
+    return pairs
+
+
+class PairEngine:
+    """
+    Intraday entry / exit rules for n pairs on NumPy arrays.
+    Per slice the caller passes the signal prices as one (n,) array (NaN = no bar for that pair):
+        idx = engine.exit_candidates(px)      # pairs with a crossed trigger (filter e.g. by tradability)
+        qty = engine.close_crossed(idx, px)   # netted quantity to sell per pair
+        idx = engine.entries(px, day)         # pairs whose entry condition holds
+        engine.open_lot(i, px[i], qty, day)   # after the order for pair i was sized and sent
+    """
+
+    def __init__(self, n_pairs: int, version: int = 1, entry: float = 0.995, sl: float = 0.993,
+                 tp: float = 1.015, lot_capacity: int = 4):
+        if version not in (1, 2):
+            raise ValueError(f"version must be 1 or 2, got {version}")
+        self.n = n_pairs
+        self.version = version
+        self.entry = entry
+        self.sl = sl
+        self.tp = tp
+        self.open_ref = np.full(n_pairs, np.nan)
+        self.traded_day = np.full(n_pairs, -1, dtype=np.int64)
+        cap = 1 if version == 2 else lot_capacity
+        self.lot_entry = np.full((n_pairs, cap), np.nan)    # NaN = free slot
+        self.lot_qty = np.zeros((n_pairs, cap))
+        self.n_lots = np.zeros(n_pairs, dtype=np.int64)
+        self.stop_at = np.full(n_pairs, -np.inf)            # highest entry*sl among open lots
+        self.take_at = np.full(n_pairs, np.inf)             # lowest entry*tp among open lots
+
+    # ---- session ----
+    def set_open(self, i: int, open_px: float):
+        """New session open reference for pair i; also resets its 'traded today' flag."""
+        self.open_ref[i] = open_px
+        self.traded_day[i] = -1
+
+    def held(self) -> np.ndarray:
+        return self.lot_qty.sum(axis=1)
+
+    def clear(self, idx=None):
+        """Forget the lots of `idx` (all pairs by default), e.g. after the EOD liquidation."""
+        idx = slice(None) if idx is None else idx
+        self.lot_entry[idx] = np.nan
+        self.lot_qty[idx] = 0.0
+        self.n_lots[idx] = 0
+        self.stop_at[idx] = -np.inf
+        self.take_at[idx] = np.inf
+
+    # ---- per slice ----
+    def exit_candidates(self, px: np.ndarray) -> np.ndarray:
+        """Pairs with at least one lot whose sl / tp trigger is crossed at px (no state change)."""
+        with np.errstate(invalid="ignore"):
+            return np.flatnonzero((px <= self.stop_at) | (px >= self.take_at))
+
+    def close_crossed(self, idx: np.ndarray, px: np.ndarray) -> np.ndarray:
+        """
+        Close every lot of pairs `idx` with px <= entry*sl or px >= entry*tp.
+        Returns the total quantity per pair: one netted order per pair.
+        """
+        if idx.size == 0:
+            return np.empty(0)
+        entry = self.lot_entry[idx]
+        qty = self.lot_qty[idx]
+        p = px[idx, None]
+        with np.errstate(invalid="ignore"):
+            hit = (p <= entry * self.sl) | (p >= entry * self.tp)
+        self.lot_entry[idx] = np.where(hit, np.nan, entry)
+        self.lot_qty[idx] = np.where(hit, 0.0, qty)
+        self.n_lots[idx] -= hit.sum(axis=1)
+        self._triggers(idx)
+        return np.where(hit, qty, 0.0).sum(axis=1)
+
+    def entries(self, px: np.ndarray, day: int) -> np.ndarray:
+        """Pairs not yet traded on `day` whose signal price is below open_ref × entry (V2: flat only)."""
+        with np.errstate(invalid="ignore"):
+            ok = (self.traded_day != day) & (px < self.open_ref * self.entry)
+        if self.version == 2:
+            ok &= self.n_lots == 0
+        return np.flatnonzero(ok)
+
+    def open_lot(self, i: int, entry_px: float, qty: float, day: int):
+        row = self.lot_entry[i]
+        free = np.flatnonzero(np.isnan(row))
+        if free.size == 0:
+            self._grow()
+            slot = self.lot_entry.shape[1] // 2
+        else:
+            slot = int(free[0])
+        self.lot_entry[i, slot] = entry_px
+        self.lot_qty[i, slot] = qty
+        self.n_lots[i] += 1
+        self.traded_day[i] = day
+        self.stop_at[i] = max(self.stop_at[i], entry_px * self.sl)
+        self.take_at[i] = min(self.take_at[i], entry_px * self.tp)
+
+    # ---- internals ----
+    def _triggers(self, idx: np.ndarray):
+        entry = self.lot_entry[idx]
+        live = ~np.isnan(entry)
+        self.stop_at[idx] = np.where(live, entry * self.sl, -np.inf).max(axis=1)
+        self.take_at[idx] = np.where(live, entry * self.tp, np.inf).min(axis=1)
+
+    def _grow(self):
+        n, cap = self.lot_entry.shape
+        self.lot_entry = np.concatenate([self.lot_entry, np.full((n, cap), np.nan)], axis=1)
+        self.lot_qty = np.concatenate([self.lot_qty, np.zeros((n, cap))], axis=1)
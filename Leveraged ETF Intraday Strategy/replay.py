@@ -0,0 +1,438 @@
+"""
+Offline NumPy replay of LeveragedETFIntradayV1 / LeveragedETFIntradayV2.
+
+Runs the same minute-bar rules as the Lean algorithms without the engine:
+- open_ref   : first RTH bar OPEN of the signal asset ("open"), or the previous close ("prev_close")
+- Entry      : signal_price < open_ref * entry, at most once per day per traded symbol
+- Exit       : per-lot stop-loss (entry_px * sl) / take-profit (entry_px * tp) on the signal price
+- Sizing     : calculate_order_quantity(target_pct) on a cash account (IB fee model)
+- EOD        : optional liquidation at 15:59 (scheduled event, before that minute's on_data)
+
+Bars live on a (days x 390) grid per symbol; slot j is the bar ending 09:31 + j minutes.
+Trigger scans are array operations per day/lot, the Python loop only touches fill events,
+so one parameter set over a year of minute data replays in milliseconds.
+
+Known approximations vs Lean: fills at the traded ETF's bar close (no slippage model),
+no T+1 settlement on the cash account, EOD liquidation fills at the last price before 15:59.
+"""
+import heapq
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# same order as the `mapping` dict in both algorithms (on_data iterates pairs in this order)
+PAIRS = {"SPXL": "SPY", "NVDL": "NVDA", "TMF": "TLT"}
+
+BARS_PER_DAY = 390                # 09:31 ... 16:00 bar end times
+FIRST_BAR_END = 9 * 60 + 31       # minutes after midnight of slot 0
+EOD_SLOT = 15 * 60 + 59 - FIRST_BAR_END   # 15:59 -> slot 388
+LAST_ON_DATA_SLOT = EOD_SLOT      # on_data returns for hour >= 16, so slot 389 never trades
+
+FREE_PORTFOLIO_PCT = 0.0025       # Lean Settings.free_portfolio_value_percentage default
+
+# fill kinds
+ENTRY, EXIT, EOD = 0, 1, 2
+
+FILL_DTYPE = np.dtype([
+    ("day",   "datetime64[D]"),
+    ("slot",  np.int16),
+    ("pair",  np.int16),
+    ("kind",  np.int8),
+    ("qty",   np.float64),
+    ("price", np.float64),
+    ("fee",   np.float64),
+])
+
+
+def ib_equity_fee(qty: float, price: float) -> float:
+    """InteractiveBrokers US equity fee: $0.005/share, min $1, max 0.5% of trade value."""
+    q = abs(qty)
+    if q == 0:
+        return 0.0
+    return min(max(1.0, 0.005 * q), 0.005 * q * price)
+
+
+def order_quantity(target: float, tpv: float, held: float, price: float, cash: float) -> float:
+    """
+    calculate_order_quantity(symbol, target) on a cash account: delta to reach target * (TPV - free buffer),
+    truncated toward zero, buys shrunk until shares + fee fit in both the delta and the available cash.
+    """
+    delta = target * tpv * (1.0 - FREE_PORTFOLIO_PCT) - held * price
+    qty = float(np.trunc(delta / price))
+    if qty > 0:
+        budget = min(delta, cash)
+        cap = float(np.floor(budget / price))
+        if cap * price + ib_equity_fee(cap, price) > budget:
+            # largest share count whose cost plus fee still fits (fee <= max($1, $0.005/share))
+            cap = max(0.0, float(np.floor(min((budget - 1.0) / price, budget / (price + 0.005)))))
+            while (cap + 1) * price + ib_equity_fee(cap + 1, price) <= budget:
+                cap += 1
+        qty = min(qty, cap)
+    return qty
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs along a 1-D array (leading NaNs stay NaN)."""
+    idx = np.where(np.isfinite(values), np.arange(values.size), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return values[idx]
+
+
+class SessionGrid:
+    """
+    Minute bars of several symbols aligned on a common (days x 390) RTH grid.
+    Missing bars are NaN, i.e. "symbol not in slice" for that minute.
+    """
+
+    def __init__(self, days: np.ndarray, opens: dict, closes: dict):
+        self.days = np.asarray(days, dtype="datetime64[D]")
+        self.opens = opens       # symbol -> (n_days, 390) float64
+        self.closes = closes     # symbol -> (n_days, 390) float64
+
+    @property
+    def n_days(self) -> int:
+        return int(self.days.size)
+
+    @classmethod
+    def from_bars(cls, bars: dict) -> "SessionGrid":
+        """
+        bars: {ticker: (end_times, open, close)} with end_times as datetime64 (exchange local time).
+        Bars outside 09:31..16:00 end times are dropped.
+        """
+        parsed, all_days = {}, []
+        for ticker, (times, opens, closes) in bars.items():
+            t = np.asarray(times, dtype="datetime64[m]")
+            day = t.astype("datetime64[D]")
+            slot = (t - day).astype(np.int64) - FIRST_BAR_END
+            keep = (slot >= 0) & (slot < BARS_PER_DAY)
+            parsed[ticker] = (day[keep], slot[keep],
+                              np.asarray(opens, dtype=np.float64)[keep],
+                              np.asarray(closes, dtype=np.float64)[keep])
+            all_days.append(day[keep])
+
+        days = np.unique(np.concatenate(all_days)) if all_days else np.array([], dtype="datetime64[D]")
+        opens, closes = {}, {}
+        for ticker, (day, slot, o, c) in parsed.items():
+            row = np.searchsorted(days, day)
+            opens[ticker] = np.full((days.size, BARS_PER_DAY), np.nan)
+            closes[ticker] = np.full((days.size, BARS_PER_DAY), np.nan)
+            opens[ticker][row, slot] = o
+            closes[ticker][row, slot] = c
+        return cls(days, opens, closes)
+
+    @classmethod
+    def from_store(cls, store, tickers, start=None, end=None) -> "SessionGrid":
+        """
+        Grid from a memory-mapped minute store (common/minute_store.py MinuteStore) for trading
+        days in [start, end]; no zip parsing. The store keeps bars in time order, so this scatters
+        them into new dense arrays: save() the result once and load() it to share it between processes.
+        """
+        bars = {}
+        for ticker in tickers:
+            cols = store.bars(ticker, start, end)
+            end_times = (np.asarray(cols["time"], dtype=np.int64) + 1).astype("datetime64[m]")
+            bars[ticker] = (end_times, cols["open"], cols["close"])
+        return cls.from_bars(bars)
+
+    def save(self, path: str):
+        """
+        Write the grid to a folder of plain .npy files (days, open_<ticker>, close_<ticker>) that
+        load() memory-maps. The folder is written under a temp name and renamed into place.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".tmp_", dir=parent)
+        np.save(os.path.join(tmp, "days.npy"), self.days)
+        for ticker in self.closes:
+            np.save(os.path.join(tmp, f"open_{ticker}.npy"), np.ascontiguousarray(self.opens[ticker]))
+            np.save(os.path.join(tmp, f"close_{ticker}.npy"), np.ascontiguousarray(self.closes[ticker]))
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.rename(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SessionGrid":
+        """
+        A grid folder written by save(), memory-mapped read-only: processes that load the same folder
+        share its pages, and window() slices stay views. A legacy .npz is read into memory.
+        """
+        if os.path.isdir(path):
+            opens, closes = {}, {}
+            for name in sorted(os.listdir(path)):
+                stem, ext = os.path.splitext(name)
+                kind, _, ticker = stem.partition("_")
+                if ext == ".npy" and kind in ("open", "close") and ticker:
+                    arr = np.load(os.path.join(path, name), mmap_mode="r")
+                    (opens if kind == "open" else closes)[ticker] = arr
+            return cls(np.load(os.path.join(path, "days.npy")), opens, closes)
+        with np.load(path) as z:
+            opens = {k.split(":", 1)[1]: z[k] for k in z.files if k.startswith("open:")}
+            closes = {k.split(":", 1)[1]: z[k] for k in z.files if k.startswith("close:")}
+            return cls(z["days"], opens, closes)
+
+    def window(self, start: int, stop: int) -> "SessionGrid":
+        """Sub-grid over day rows [start, stop) (views, no copy)."""
+        return SessionGrid(self.days[start:stop],
+                           {k: v[start:stop] for k, v in self.opens.items()},
+                           {k: v[start:stop] for k, v in self.closes.items()})
+
+
+@dataclass
+class ReplayParams:
+    """Mirror of the get_parameter knobs read in initialize()."""
+    version: int = 1
+    entry: float = 0.995
+    sl: float = 0.993
+    tp: float = 1.015
+    target_pct: float = None          # None -> 1/6 (V1) or 1/3 (V2), same defaults as the algorithms
+    eod_liq: bool = True
+    cash: float = 100000.0
+    open_ref: str = "open"            # "open" | "prev_close"
+
+    def resolved_target(self) -> float:
+        if self.target_pct is not None:
+            return float(self.target_pct)
+        return 1.0 / 6.0 if self.version == 1 else 1.0 / 3.0
+
+
+@dataclass
+class ReplayResult:
+    days: np.ndarray                  # datetime64[D] per simulated day
+    equity: np.ndarray                # marked-to-market equity at each day's 16:00 close
+    daily_pnl: np.ndarray
+    fills: np.ndarray                 # FILL_DTYPE records in execution order
+    open_lots: list = field(default_factory=list)   # lots still open after the last day
+
+    @property
+    def final_equity(self) -> float:
+        return float(self.equity[-1]) if self.equity.size else float("nan")
+
+
+class _Lot:
+    __slots__ = ("pair", "entry_px", "qty", "alive")
+
+    def __init__(self, pair: int, entry_px: float, qty: float):
+        self.pair = pair
+        self.entry_px = entry_px
+        self.qty = qty
+        self.alive = True
+
+
+class _PairArrays:
+    """Flattened per-pair arrays used by the event loop."""
+
+    def __init__(self, grid: SessionGrid, etf: str, underlier: str, params: ReplayParams):
+        sig_open = grid.opens[underlier]
+        sig_close = grid.closes[underlier]
+        n_days = grid.n_days
+
+        # signal price as seen by on_data: NaN when the bar is missing or on_data is skipped (16:00 bar)
+        sig = sig_close.copy()
+        sig[:, LAST_ON_DATA_SLOT + 1:] = np.nan
+        self.sig = sig.ravel()
+
+        # traded ETF last price (Securities[tra].Price): forward-filled close, across days too
+        self.tra = _ffill(grid.closes[etf].ravel())
+
+        if params.open_ref == "prev_close":
+            last_close = _ffill(sig_close.ravel())
+            starts = np.arange(n_days) * BARS_PER_DAY
+            ref = np.full(n_days, np.nan)
+            ref[1:] = last_close[starts[1:] - 1]
+        else:
+            have = np.isfinite(sig_open)
+            first = have.argmax(axis=1)
+            ref = np.where(have.any(axis=1), sig_open[np.arange(n_days), first], np.nan)
+        self.open_ref = ref
+
+        # entry trigger mask for every bar at once
+        with np.errstate(invalid="ignore"):
+            self.entry_mask = (sig < (ref * params.entry)[:, None]).ravel()
+
+
+def _first_true(mask: np.ndarray, start: int, stop: int) -> int:
+    if start >= stop:
+        return -1
+    seg = mask[start:stop]
+    i = int(seg.argmax())
+    return start + i if seg[i] else -1
+
+
+def _first_exit(sig: np.ndarray, start: int, stop: int, lo: float, hi: float,
+                chunk: int = BARS_PER_DAY * 5) -> int:
+    """First index in [start, stop) where sig <= lo or sig >= hi (chunked so long holds stay cheap)."""
+    while start < stop:
+        end = min(stop, start + chunk)
+        seg = sig[start:end]
+        with np.errstate(invalid="ignore"):
+            hit = (seg <= lo) | (seg >= hi)
+        i = int(hit.argmax())
+        if hit[i]:
+            return start + i
+        start = end
+    return -1
+
+
+def replay(grid: SessionGrid, params: ReplayParams = None, pairs: dict = None,
+           initial_lots: list = None, first_day: int = 0) -> ReplayResult:
+    """
+    Replay V1 (params.version == 1) or V2 (params.version == 2) over the days of `grid`.
+
+    initial_lots: optional [(etf, entry_px, qty), ...] carried in from a previous run,
+                  cash is then params.cash net of those holdings.
+    first_day:    simulate from this grid row on; earlier rows only provide price context
+                  (last traded price, previous close for open_ref="prev_close").
+    """
+    params = params or ReplayParams()
+    pairs = pairs or PAIRS
+    etfs = list(pairs)
+    arrays = [_PairArrays(grid, etf, pairs[etf], params) for etf in etfs]
+    n_pairs, n_days = len(etfs), grid.n_days
+    target = params.resolved_target()
+    multi_lot = params.version == 1
+
+    cash = float(params.cash)
+    lots: list[list[_Lot]] = [[] for _ in range(n_pairs)]
+    fills: list[tuple] = []
+    equity = np.empty(n_days - first_day)
+    last_trade_day = [-1] * n_pairs
+    heap: list = []     # (global_bar, phase, pair, rank, seq, kind, lot)
+    seq = 0
+
+    def push(g: int, phase: int, p: int, kind: int, lot: _Lot = None):
+        # per bar: EOD event first, then pairs in mapping order, exits before the entry
+        nonlocal seq
+        heapq.heappush(heap, (g, phase, p, 0 if kind == EXIT else 1, seq, kind, lot))
+        seq += 1
+
+    def holdings_value(g: int) -> float:
+        total = 0.0
+        for p in range(n_pairs):
+            px = arrays[p].tra[g]
+            for lot in lots[p]:
+                total += lot.qty * px
+        return total
+
+    def fill(g: int, p: int, qty: float, price: float, kind: int):
+        nonlocal cash
+        fee = ib_equity_fee(qty, price)
+        cash -= qty * price + fee
+        d, s = divmod(g, BARS_PER_DAY)
+        fills.append((grid.days[d], s, p, kind, qty, price, fee))
+
+    def schedule_exit(lot: _Lot, g_from: int):
+        a = arrays[lot.pair]
+        d = g_from // BARS_PER_DAY
+        if params.eod_liq:
+            stop = d * BARS_PER_DAY + EOD_SLOT
+            if g_from > stop:       # entered after the 15:59 liquidation: held into the next day
+                stop = (d + 1) * BARS_PER_DAY + EOD_SLOT
+            stop = min(stop, n_days * BARS_PER_DAY)
+        else:
+            stop = n_days * BARS_PER_DAY
+        g = _first_exit(a.sig, g_from, stop, lot.entry_px * params.sl, lot.entry_px * params.tp)
+        if g >= 0:
+            push(g, 1, lot.pair, EXIT, lot)
+
+    def schedule_entry(p: int, g_from: int):
+        d = g_from // BARS_PER_DAY
+        g = _first_true(arrays[p].entry_mask, g_from, d * BARS_PER_DAY + LAST_ON_DATA_SLOT + 1)
+        if g >= 0:
+            push(g, 1, p, ENTRY)
+
+    for etf, entry_px, qty in initial_lots or []:
+        p = etfs.index(etf)
+        lot = _Lot(p, float(entry_px), float(qty))
+        lots[p].append(lot)
+        schedule_exit(lot, first_day * BARS_PER_DAY)
+
+    for d in range(first_day, n_days):
+        day_start = d * BARS_PER_DAY
+        # 09:31 open capture resets "traded today"; V2 may only enter while flat
+        for p in range(n_pairs):
+            if multi_lot or not lots[p]:
+                schedule_entry(p, day_start)
+        if params.eod_liq:
+            push(day_start + EOD_SLOT, 0, -1, EOD)
+
+        day_end = day_start + BARS_PER_DAY
+        while heap and heap[0][0] < day_end:
+            g, _, p, _, _, kind, lot = heapq.heappop(heap)
+
+            if kind == EOD:
+                for q in range(n_pairs):
+                    px = arrays[q].tra[g - 1]
+                    had = bool(lots[q])
+                    net = sum(l.qty for l in lots[q])
+                    for l in lots[q]:
+                        l.alive = False
+                    lots[q] = []
+                    if net != 0:
+                        fill(g, q, -net, px, EOD)
+                    if had and not multi_lot and last_trade_day[q] != d:
+                        schedule_entry(q, g)
+                continue
+
+            a = arrays[p]
+            if kind == EXIT:
+                # every lot of this pair crossing on this bar leaves in one netted order (V1 LotBook)
+                qty = 0.0
+                while True:
+                    if lot.alive:
+                        lot.alive = False
+                        lots[p].remove(lot)
+                        qty += lot.qty
+                    if not (heap and heap[0][:4] == (g, 1, p, 0)):
+                        break
+                    lot = heapq.heappop(heap)[6]
+                if qty == 0:
+                    continue
+                fill(g, p, -qty, a.tra[g], EXIT)
+                if not multi_lot and last_trade_day[p] != d:
+                    schedule_entry(p, g)
+                continue
+
+            # ENTRY
+            if last_trade_day[p] == d or (not multi_lot and lots[p]):
+                continue
+            price = a.tra[g]
+            if not np.isfinite(price) or price <= 0:
+                schedule_entry(p, g + 1)
+                continue
+            held = sum(l.qty for l in lots[p])
+            qty = order_quantity(target, cash + holdings_value(g), held, price, cash)
+            if qty == 0:
+                schedule_entry(p, g + 1)
+                continue
+            fill(g, p, qty, price, ENTRY)
+            lot = _Lot(p, float(a.sig[g]), qty)
+            lots[p].append(lot)
+            last_trade_day[p] = d
+            schedule_exit(lot, g + 1)
+
+        equity[d - first_day] = cash + holdings_value(day_end - 1)
+
+    open_lots = [(etfs[p], l.entry_px, l.qty) for p in range(n_pairs) for l in lots[p]]
+    start_value = float(params.cash) + _initial_value(arrays, etfs, initial_lots, first_day)
+    daily_pnl = np.diff(equity, prepend=start_value)
+    return ReplayResult(
+        days=grid.days[first_day:].copy(),
+        equity=equity,
+        daily_pnl=daily_pnl,
+        fills=np.array(fills, dtype=FILL_DTYPE),
+        open_lots=open_lots,
+    )
+
+
+def _initial_value(arrays: list, etfs: list, initial_lots: list, first_day: int) -> float:
+    """Mark-to-market of carried-in lots at the previous close (first bar when there is none)."""
+    total = 0.0
+    g = max(0, first_day * BARS_PER_DAY - 1)
+    for etf, _, qty in initial_lots or []:
+        px = arrays[etfs.index(etf)].tra[g]
+        if np.isfinite(px):
+            total += qty * px
+    return total
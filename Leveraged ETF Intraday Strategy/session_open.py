@@ -0,0 +1,50 @@
+from AlgorithmImports import *
+
+
+class SessionOpenTracker:
+    """
+    Push-based daily open reference, shared by LeveragedETFIntradayV1/V2.
+    - Source  : the OPEN of the first regular-hours TradeBar of each day, read from on_data slices
+    - Cost    : O(1) per slice (no history requests, no DataFrame scans, no warmup needed)
+    - Fallback: if the first bar of the day does not start at the session open (missing 09:30 bar),
+                that bar's OPEN is used instead and counted in `fallbacks`
+    """
+
+    def __init__(self, symbols, session_open: time = time(9, 30)):
+        self.session_open = session_open
+        self.open_ref = {sym: None for sym in symbols}   # latest captured open per symbol
+        self._day = {sym: None for sym in symbols}       # date of the latest capture per symbol
+        self._done_day = None                            # every symbol captured for this date
+        self.captures = 0
+        self.fallbacks = 0
+        self.fallbacks_by_symbol = {sym: 0 for sym in symbols}
+
+    def update(self, data: Slice) -> list:
+        """Feed every slice; returns the symbols whose open was captured on this slice."""
+        today = data.time.date()
+        if today == self._done_day:
+            return []
+
+        captured = []
+        bars = data.bars
+        for sym, day in self._day.items():
+            if day == today or sym not in bars:
+                continue
+            bar = bars[sym]
+            if bar.time.time() < self.session_open:
+                continue    # pre-market bar (extended hours)
+            if bar.time.time() != self.session_open:
+                self.fallbacks += 1
+                self.fallbacks_by_symbol[sym] += 1
+            self.open_ref[sym] = float(bar.open)
+            self._day[sym] = today
+            self.captures += 1
+            captured.append(sym)
+
+        if all(day == today for day in self._day.values()):
+            self._done_day = today
+        return captured
+
+    def summary(self) -> str:
+        by_sym = ", ".join(f"{sym.Value}={n}" for sym, n in self.fallbacks_by_symbol.items())
+        return f"captures={self.captures} fallbacks={self.fallbacks} ({by_sym})"
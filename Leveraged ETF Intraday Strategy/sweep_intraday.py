@@ -0,0 +1,153 @@
+"""
+Offline entry/sl/tp/target_pct/eod_liq sweep for LeveragedETFIntradayV1/V2 on top of replay.py.
+
+Each worker loads the bar grid once, then replays one parameter set per task; rows land in a
+resumable JSON Lines store (see common/sweep.py), so re-running the same command after a kill
+only computes what is missing; the store records version / cash / grid / date range and refuses
+to resume under different settings. With --shard-cache, eod_liq=true combinations go through
+day_shards.py and re-use per-day results across runs, date-range extensions and target_pct values.
+The grid is a SessionGrid folder (SessionGrid.save) or a minute store folder (common/minute_store.py,
+--start / --end cut the date range). A store is turned into a grid folder once, cached under
+{store}/.grids/ per tickers, range and store build, before the workers start. Workers then
+memory-map the same grid files read-only, so the bars are one page-cached copy and each worker
+only holds views. A legacy .npz grid is still read, into each worker's memory.
+
+Example:
+    python sweep_intraday.py bars_grid results/sweep_v1.jsonl --version 1 \
+        --entry 0.993,0.995,0.997 --sl 0.99,0.993,0.995 --tp 1.01,1.015,1.02 --csv results/sweep_v1.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+for path in (HERE, REPO_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from common.metrics import StreamingMetrics  # noqa: E402
+from common.minute_store import MinuteStore  # noqa: E402
+from common.sweep import run_sweep, write_summary_csv  # noqa: E402
+from day_shards import sharded_replay  # noqa: E402
+from replay import PAIRS, ReplayParams, SessionGrid, replay  # noqa: E402
+
+
+class ReplayEvaluator:
+    """Per-worker evaluator: holds the loaded grid, maps sweep params -> summary metrics."""
+
+    def __init__(self, grid_path: str, version: int, cash: float, shard_cache: str = None,
+                 start: str = None, end: str = None):
+        self.grid = load_grid(grid_path, start, end)
+        self.version = version
+        self.cash = cash
+        self.shard_cache = shard_cache
+
+    def __call__(self, params: dict) -> dict:
+        p = ReplayParams(version=self.version, cash=self.cash, **_coerce(params))
+        if self.shard_cache and p.eod_liq:
+            res = sharded_replay(self.grid, p, cache_dir=self.shard_cache)
+        else:
+            res = replay(self.grid, p)
+        return summarize(res.equity, res.fills, self.cash)
+
+
+def load_grid(path: str, start: str = None, end: str = None) -> SessionGrid:
+    """
+    A SessionGrid folder / .npz, or a minute store folder (common/minute_store.py), cut to
+    [start, end]. Folders are memory-mapped; a store goes through its cached grid folder.
+    """
+    if os.path.isdir(path) and not os.path.exists(os.path.join(path, "days.npy")):
+        path, start, end = store_grid(path, start, end), None, None
+    grid = SessionGrid.load(path)
+    lo = 0 if start is None else int(np.searchsorted(grid.days, np.datetime64(start, "D"), "left"))
+    hi = grid.n_days if end is None else int(np.searchsorted(grid.days, np.datetime64(end, "D"), "right"))
+    return grid.window(lo, hi)
+
+
+def store_grid(store_root: str, start: str = None, end: str = None) -> str:
+    """
+    Grid folder for the PAIRS tickers of a minute store over [start, end], built on first use.
+    The cache key includes every ticker-year's build id, so converting new zips gives a new grid;
+    delete {store}/.grids/ to reclaim old ones.
+    """
+    store = MinuteStore(store_root)
+    tickers = sorted(set(PAIRS) | set(PAIRS.values()))
+    builds = {t: {y: store.build(t, y) for y in store.years(t)} for t in tickers}
+    key = json.dumps({"tickers": tickers, "start": start, "end": end, "builds": builds}, sort_keys=True)
+    path = os.path.join(store_root, ".grids", hashlib.sha1(key.encode()).hexdigest()[:20])
+    if not os.path.isdir(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        SessionGrid.from_store(store, tickers, start, end).save(tmp)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)     # another process cached the same grid first
+    return path
+
+
+def _coerce(params: dict) -> dict:
+    out = {}
+    for name, value in params.items():
+        if name == "eod_liq":
+            out[name] = value if isinstance(value, bool) else str(value).lower() == "true"
+        else:
+            out[name] = float(value)
+    return out
+
+
+def summarize(equity: np.ndarray, fills: np.ndarray, cash: float) -> dict:
+    """Standard metrics (common/metrics.py) from the replay's daily equity and fills."""
+    engine = StreamingMetrics(cash)
+    for value in equity.tolist():
+        engine.on_equity(value)
+    for f in fills.tolist():
+        engine.on_fill(f[2], f[4], f[5], f[6])      # pair, qty, price, fee
+    return engine.result()
+
+
+def _floats(text: str) -> list:
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Offline entry/sl/tp sweep for the leveraged ETF intraday strategy.")
+    ap.add_argument("grid", help="SessionGrid folder (SessionGrid.save) or minute store folder (common/minute_store.py)")
+    ap.add_argument("store", help="JSON Lines result store (created or resumed)")
+    ap.add_argument("--version", type=int, choices=(1, 2), default=1)
+    ap.add_argument("--cash", type=float, default=100000.0)
+    ap.add_argument("--start", default=None, help="first trading day (YYYY-MM-DD)")
+    ap.add_argument("--end", default=None, help="last trading day (YYYY-MM-DD)")
+    ap.add_argument("--entry", type=_floats, default=[0.995])
+    ap.add_argument("--sl", type=_floats, default=[0.993])
+    ap.add_argument("--tp", type=_floats, default=[1.015])
+    ap.add_argument("--target-pct", type=_floats, default=None)
+    ap.add_argument("--eod-liq", default="true", help="true, false or true,false")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--shard-cache", default=None, help="folder for per-day shard caches (eod_liq=true only)")
+    ap.add_argument("--csv", default=None, help="also write a summary CSV here")
+    args = ap.parse_args(argv)
+
+    grid = {"entry": args.entry, "sl": args.sl, "tp": args.tp,
+            "eod_liq": [v.strip().lower() == "true" for v in args.eod_liq.split(",")]}
+    if args.target_pct:
+        grid["target_pct"] = args.target_pct
+
+    # everything besides the grid that changes results; the shard cache only changes speed
+    load_grid(args.grid, args.start, args.end)     # builds a store's grid folder once, before the workers
+    context = {"evaluator": "replay", "grid": os.path.abspath(args.grid), "version": args.version,
+               "cash": args.cash, "start": args.start, "end": args.end}
+    run_sweep(grid, args.store, ReplayEvaluator, (args.grid, args.version, args.cash, args.shard_cache, args.start, args.end),
+              workers=args.workers, context=context)
+    if args.csv:
+        n = write_summary_csv(args.store, args.csv, sort_by="sharpe")
+        print(f"[sweep] wrote {n} rows to {args.csv}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
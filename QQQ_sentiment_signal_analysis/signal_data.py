@@ -0,0 +1,40 @@
+from AlgorithmImports import *
+from signal_store import SIGNALS_CSV, signal_store
+
+
+class SentimentSignal(PythonData):
+    """
+    Custom data type for signals.csv: `self.add_data(SentimentSignal, "QQQSENT", Resolution.DAILY)`.
+    - Lean streams the CSV lines, but rows are not parsed: the reader walks the cached arrays in step
+      with the lines and only compares the line prefix with the cached date string (re-syncs by date on mismatch)
+    - Each value is stamped at its date and emitted at the end of that day (no same-day look-ahead)
+    - `source` can point at the copy under the Lean data folder / object store
+    """
+    source = SIGNALS_CSV
+
+    def get_source(self, config: SubscriptionDataConfig, date: datetime, is_live: bool) -> SubscriptionDataSource:
+        signal_store(self.source).refresh()     # picks up rows appended since the last conversion
+        return SubscriptionDataSource(self.source, SubscriptionTransportMedium.LOCAL_FILE)
+
+    def reader(self, config: SubscriptionDataConfig, line: str, date: datetime, is_live: bool) -> BaseData:
+        if not line or not line[0].isdigit():
+            return None
+        store = signal_store(self.source)
+        row = getattr(self, "_row", 0)
+        if row >= len(store) or store.date_strings()[row] != line[:10]:
+            # out of step with the cached rows (first line, reopened file): re-sync once by date
+            row = store.row_of(datetime.strptime(line[:10], "%Y-%m-%d").date())
+            if row is None:
+                return None
+        self._row = row + 1
+        value = float(store.values[row])
+        if value != value:
+            return None
+
+        data = SentimentSignal()
+        data.symbol = config.symbol
+        data.time = datetime.fromordinal(int(store.ordinals[row]))
+        data.end_time = data.time + timedelta(days=1)
+        data.value = value
+        data["signal"] = value
+        return data
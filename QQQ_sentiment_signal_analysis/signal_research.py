@@ -0,0 +1,266 @@
+"""
+Vectorized research toolkit for the QQQ sentiment signal.
+
+- align            : signal (SignalStore) x daily closes of QQQ / leveraged ETFs on common dates
+- forward_returns  : (days x horizons) close-to-close forward returns, entry `lag` days after the signal date
+- ic               : Pearson and Spearman information coefficients per horizon
+- decile_returns   : mean forward return per signal decile and horizon
+- threshold_grid   : mean excess forward return for every (threshold, horizon) pair in one matrix product
+- rolling_ic       : rolling-window Spearman IC (stability over time)
+- bootstrap_grid   : moving-block bootstrap p-values for the whole threshold grid, batches run in a process pool
+
+Everything is array math over the full sample; there are no per-row Python loops.
+Default lag=1 matches the SentimentSignal feed, which emits each value at the end of its date.
+
+Example:
+    python signal_research.py --prices QQQ=qqq.csv --prices TQQQ=tqqq.csv --horizons 1,5,10,20 --out results/
+"""
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from signal_store import SIGNALS_CSV, SignalStore
+
+
+# ---------------- data ----------------
+def load_close_csv(path: str):
+    """Daily closes from a CSV with a date column and a close column ('Adj Close' preferred)."""
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    header = [h.strip().lower() for h in rows[0]]
+    d_col = next(i for i, h in enumerate(header) if "date" in h or h == "time")
+    c_col = next((i for i, h in enumerate(header) if h in ("adj close", "adj_close", "adjclose")), None)
+    if c_col is None:
+        c_col = header.index("close")
+    body = [r for r in rows[1:] if len(r) > max(d_col, c_col) and r[c_col].strip()]
+    dates = np.array([r[d_col].strip()[:10] for r in body], dtype="datetime64[D]")
+    closes = np.array([float(r[c_col]) for r in body])
+    order = np.argsort(dates, kind="stable")
+    return dates[order], closes[order]
+
+
+def align(sig_dates: np.ndarray, sig_values: np.ndarray, prices: dict):
+    """
+    Intersect signal dates with the trading dates common to every price series.
+    prices: {name: (dates, closes)}. Returns (dates, signal, {name: closes}).
+    """
+    common = None
+    for dates, _ in prices.values():
+        common = dates if common is None else np.intersect1d(common, dates)
+    common = np.intersect1d(common, sig_dates)
+    signal = sig_values[np.searchsorted(sig_dates, common)]
+    closes = {name: c[np.searchsorted(d, common)] for name, (d, c) in prices.items()}
+    return common, signal, closes
+
+
+# ---------------- core statistics ----------------
+def forward_returns(closes: np.ndarray, horizons, lag: int = 1) -> np.ndarray:
+    """(n, H) simple returns from close[t + lag] to close[t + lag + h]; NaN where the window runs off the end."""
+    n = closes.size
+    out = np.full((n, len(horizons)), np.nan)
+    for j, h in enumerate(horizons):
+        m = n - lag - h
+        if m > 0:
+            out[:m, j] = closes[lag + h:lag + h + m] / closes[lag:lag + m] - 1.0
+    return out
+
+
+def _rank(x: np.ndarray) -> np.ndarray:
+    """Average ranks along axis 0 (ties get the mean rank, per column for 2-D input), NaN-free input."""
+    n = x.shape[0]
+    order = np.argsort(x, axis=0, kind="mergesort")
+    xs = np.take_along_axis(x, order, axis=0)
+    pos = np.arange(n, dtype=np.float64).reshape(-1, *([1] * (x.ndim - 1)))
+    # first / last sorted position of each tie group, per column
+    starts = np.zeros(xs.shape, dtype=bool)
+    starts[0] = True
+    starts[1:] = xs[1:] != xs[:-1]
+    ends = np.zeros(xs.shape, dtype=bool)
+    ends[-1] = True
+    ends[:-1] = starts[1:]
+    first = np.maximum.accumulate(np.where(starts, pos, 0.0), axis=0)
+    last = np.minimum.accumulate(np.where(ends, pos, float(n))[::-1], axis=0)[::-1]
+    ranks = np.empty(x.shape, dtype=np.float64)
+    np.put_along_axis(ranks, order, (first + last) / 2.0, axis=0)
+    return ranks
+
+
+def _corr_cols(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Column-wise Pearson correlation of x (n,) against each column of y (n, H), pairwise NaN handling."""
+    valid = np.isfinite(y) & np.isfinite(x)[:, None]
+    n = valid.sum(axis=0)
+    xv = np.where(valid, x[:, None], 0.0)
+    yv = np.where(valid, y, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx, my = xv.sum(0) / n, yv.sum(0) / n
+        cov = (xv * yv).sum(0) / n - mx * my
+        vx = (xv * xv).sum(0) / n - mx * mx
+        vy = (yv * yv).sum(0) / n - my * my
+        return cov / np.sqrt(vx * vy)
+
+
+def ic(signal: np.ndarray, fwd: np.ndarray) -> dict:
+    """Pearson and Spearman IC per horizon column of `fwd` (rows with a NaN signal are dropped)."""
+    ok = np.isfinite(signal)
+    s, f = signal[ok], fwd[ok]
+    spearman = np.empty(f.shape[1])
+    for j in range(f.shape[1]):
+        v = np.isfinite(f[:, j])
+        spearman[j] = _corr_cols(_rank(s[v]), _rank(f[v, j])[:, None])[0] if v.sum() > 2 else np.nan
+    return {"pearson": _corr_cols(s, f), "spearman": spearman, "n": np.isfinite(f).sum(axis=0)}
+
+
+def decile_returns(signal: np.ndarray, fwd: np.ndarray, n_bins: int = 10):
+    """Mean forward return per signal quantile bin: returns (bin_edges, means (bins x H), counts (bins x H))."""
+    ok = np.isfinite(signal)
+    edges = np.quantile(signal[ok], np.linspace(0, 1, n_bins + 1))
+    bins = np.clip(np.searchsorted(edges, signal, side="right") - 1, 0, n_bins - 1)
+    means = np.full((n_bins, fwd.shape[1]), np.nan)
+    counts = np.zeros((n_bins, fwd.shape[1]), dtype=np.int64)
+    for j in range(fwd.shape[1]):
+        v = ok & np.isfinite(fwd[:, j])
+        counts[:, j] = np.bincount(bins[v], minlength=n_bins)
+        sums = np.bincount(bins[v], weights=fwd[v, j], minlength=n_bins)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means[:, j] = sums / counts[:, j]
+    return edges, means, counts
+
+
+def threshold_grid(signal: np.ndarray, fwd: np.ndarray, thresholds: np.ndarray, side: str = "above"):
+    """
+    Mean forward return when signal > thr (side="above") or signal < thr (side="below"),
+    minus the unconditional mean, for every (threshold, horizon) pair: returns (excess (T x H), counts (T x H)).
+    """
+    valid = np.isfinite(fwd) & np.isfinite(signal)[:, None]
+    f = np.where(valid, fwd, 0.0)
+    thr = np.asarray(thresholds, dtype=np.float64)[:, None]
+    with np.errstate(invalid="ignore"):
+        mask = (signal[None, :] > thr) if side == "above" else (signal[None, :] < thr)
+    mask = mask.astype(np.float64)
+    counts = mask @ valid.astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cond = (mask @ f) / counts
+        uncond = f.sum(0) / valid.sum(0)
+    return cond - uncond[None, :], counts
+
+
+def rolling_ic(signal: np.ndarray, fwd_col: np.ndarray, window: int = 252) -> np.ndarray:
+    """Spearman IC over trailing windows (value at the window's last row); windows with NaNs give NaN."""
+    n = signal.size
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+    s = np.lib.stride_tricks.sliding_window_view(signal, window)
+    f = np.lib.stride_tricks.sliding_window_view(fwd_col, window)
+    ok = np.isfinite(s).all(1) & np.isfinite(f).all(1)
+    if not ok.any():
+        return out
+    rs = _rank(s[ok].T).T
+    rf = _rank(f[ok].T).T
+    rs -= rs.mean(1, keepdims=True)
+    rf -= rf.mean(1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rho = (rs * rf).sum(1) / np.sqrt((rs * rs).sum(1) * (rf * rf).sum(1))
+    out[window - 1:][ok] = rho
+    return out
+
+
+# ---------------- bootstrap ----------------
+def _block_indices(rng: np.random.Generator, n: int, block: int, reps: int) -> np.ndarray:
+    """Moving-block bootstrap row indices, shape (reps, n) (keeps overlapping-return autocorrelation)."""
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n - block + 1, size=(reps, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block)[None, None, :]).reshape(reps, -1)
+    return idx[:, :n]
+
+
+def _bootstrap_batch(signal, fwd, thresholds, side, block, reps, seed, observed):
+    rng = np.random.default_rng(seed)
+    exceed = np.zeros(observed.shape, dtype=np.int64)
+    for idx in _block_indices(rng, signal.size, block, reps):
+        boot, _ = threshold_grid(signal[idx], fwd[idx], thresholds, side)
+        # centered bootstrap: how often does resampling noise move the statistic as far as it sits from 0
+        with np.errstate(invalid="ignore"):
+            exceed += np.abs(boot - observed) >= np.abs(observed)
+    return exceed
+
+
+def bootstrap_grid(signal: np.ndarray, fwd: np.ndarray, thresholds, side: str = "above",
+                   n_boot: int = 1000, block: int = 20, workers: int = None, seed: int = 7):
+    """
+    Two-sided p-values for threshold_grid's excess returns (T x H) from a moving-block bootstrap.
+    Resamples are split into per-worker batches with independent seeds; results are reproducible for a given seed.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    observed, counts = threshold_grid(signal, fwd, thresholds, side)
+    workers = workers or os.cpu_count() or 1
+    n_batches = max(1, min(n_boot, workers * 4))
+    sizes = np.full(n_batches, n_boot // n_batches)
+    sizes[: n_boot % n_batches] += 1
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    args = [(signal, fwd, thresholds, side, block, int(k), s, observed) for k, s in zip(sizes, seeds)]
+    if workers == 1:
+        parts = [_bootstrap_batch(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(_bootstrap_batch, *zip(*args)))
+    pvalues = (np.sum(parts, axis=0) + 1.0) / (n_boot + 1.0)
+    pvalues[~np.isfinite(observed)] = np.nan
+    return observed, counts, pvalues
+
+
+# ---------------- CLI ----------------
+def _write_matrix(path: str, row_name: str, rows, horizons, matrix):
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow([row_name] + [f"h{h}" for h in horizons])
+        for r, vals in zip(rows, matrix):
+            w.writerow([r] + [f"{v:.6g}" for v in vals])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="IC / decile / threshold research for the QQQ sentiment signal.")
+    ap.add_argument("--prices", action="append", required=True, help="NAME=path.csv (date + close columns), repeatable")
+    ap.add_argument("--signals", default=SIGNALS_CSV)
+    ap.add_argument("--horizons", default="1,5,10,20")
+    ap.add_argument("--lag", type=int, default=1)
+    ap.add_argument("--thresholds", default=None, help="comma list; default: 41 signal quantiles (5%%..95%%)")
+    ap.add_argument("--n-boot", type=int, default=1000)
+    ap.add_argument("--block", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--out", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "results"))
+    args = ap.parse_args(argv)
+
+    store = SignalStore(args.signals)
+    prices = {}
+    for item in args.prices:
+        name, _, path = item.partition("=")
+        prices[name] = load_close_csv(path)
+    horizons = [int(h) for h in args.horizons.split(",")]
+    dates, signal, closes = align(store.dates(), np.asarray(store.values), prices)
+    thresholds = (np.array([float(t) for t in args.thresholds.split(",")]) if args.thresholds
+                  else np.quantile(signal[np.isfinite(signal)], np.linspace(0.05, 0.95, 41)))
+    os.makedirs(args.out, exist_ok=True)
+    print(f"{dates.size} aligned days {dates[0]} .. {dates[-1]}")
+
+    for name, c in closes.items():
+        fwd = forward_returns(c, horizons, args.lag)
+        res = ic(signal, fwd)
+        print(f"[{name}] IC pearson  " + " ".join(f"h{h}={v:+.4f}" for h, v in zip(horizons, res["pearson"])))
+        print(f"[{name}] IC spearman " + " ".join(f"h{h}={v:+.4f}" for h, v in zip(horizons, res["spearman"])))
+        edges, means, _ = decile_returns(signal, fwd)
+        _write_matrix(os.path.join(args.out, f"{name}_deciles.csv"), "decile", range(1, means.shape[0] + 1),
+                      horizons, means)
+        for side in ("above", "below"):
+            excess, counts, p = bootstrap_grid(signal, fwd, thresholds, side, args.n_boot, args.block, args.workers)
+            _write_matrix(os.path.join(args.out, f"{name}_{side}_excess.csv"), "threshold", thresholds, horizons, excess)
+            _write_matrix(os.path.join(args.out, f"{name}_{side}_pvalue.csv"), "threshold", thresholds, horizons, p)
+        print(f"[{name}] wrote deciles / threshold excess / p-values to {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Date-indexed binary cache for signals.csv (pure NumPy, usable from Lean and offline research).
+"""
+import glob
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from datetime import date
+
+import numpy as np
+
+SIGNALS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "signals.csv")
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class SignalStore:
+    """
+    Date-indexed binary cache of a `date,signal` CSV.
+    - One-time conversion into `<csv>.cache/` (.npy arrays, opened memory-mapped)
+      `current.json` names the current build folder `v.<id>/` (arrays + meta.json); a conversion
+      writes a new build and swaps the pointer with one os.replace, so a reader (or a concurrent
+      refresh) sees either the old or the new cache, never a mix
+    - get(day)   : O(1) value on that exact date (None if no row)
+    - as_of(day) : O(1) latest value on or before that date (None before the first row)
+    - refresh()  : parses only the bytes appended to the CSV since the last conversion;
+                   a rewritten/truncated CSV triggers a full rebuild
+    """
+
+    CHECK_BYTES = 64    # bytes hashed at the head and before the consumed offset to detect edits
+    POINTER = "current.json"
+
+    def __init__(self, csv_path: str = SIGNALS_CSV, cache_dir: str = None):
+        self.csv_path = csv_path
+        self.cache_dir = cache_dir or csv_path + ".cache"
+        self.meta = None
+        self.refresh()
+
+    # ---- lookups ----
+    def get(self, day) -> float:
+        i = self._ordinal(day) - self.meta["base"]
+        if i < 0 or i >= self.by_day.size:
+            return None
+        v = self.by_day[i]
+        return None if v != v else float(v)
+
+    def as_of(self, day) -> float:
+        i = self._ordinal(day) - self.meta["base"]
+        if i < 0 or self.by_day.size == 0:
+            return None
+        v = self.asof[min(i, self.asof.size - 1)]
+        return None if v != v else float(v)
+
+    def row_of(self, day) -> int:
+        """CSV row index of `day` (None if absent); rows are expected in date order."""
+        o = self._ordinal(day)
+        i = int(np.searchsorted(self.ordinals, o))
+        return i if i < self.ordinals.size and self.ordinals[i] == o else None
+
+    def date_strings(self) -> np.ndarray:
+        """'YYYY-MM-DD' per row, built once per cache version."""
+        if self._date_strings is None:
+            self._date_strings = np.datetime_as_string(self.dates(), unit="D")
+        return self._date_strings
+
+    def dates(self) -> np.ndarray:
+        """Row dates as datetime64[D] (CSV order)."""
+        return (self.ordinals.astype(np.int64) - EPOCH_ORDINAL).astype("datetime64[D]")
+
+    def __len__(self) -> int:
+        return int(self.meta["n_rows"])
+
+    @staticmethod
+    def _ordinal(day) -> int:
+        if isinstance(day, np.datetime64):
+            return int(day.astype("datetime64[D]").astype(np.int64)) + EPOCH_ORDINAL
+        return day.toordinal()
+
+    # ---- conversion ----
+    def refresh(self) -> int:
+        """Bring the cache up to date with the CSV; returns the number of rows added."""
+        for _ in range(2):
+            try:
+                return self._refresh()
+            except FileNotFoundError:
+                continue        # the build was superseded and removed while being read: re-read the pointer
+        return self._refresh()
+
+    def _refresh(self) -> int:
+        meta = self._read_meta()
+        size = os.path.getsize(self.csv_path)
+        with open(self.csv_path, "rb") as f:
+            head = f.read(self.CHECK_BYTES)
+            valid = (meta is not None and meta["head_crc"] == zlib.crc32(head)
+                     and size >= meta["csv_offset"] and meta["tail_crc"] == self._crc_before(f, meta["csv_offset"]))
+            if valid and size == meta["csv_offset"]:
+                self._open(meta)
+                return 0
+            start = meta["csv_offset"] if valid else 0
+            f.seek(start)
+            chunk = f.read()
+
+        # only consume complete lines (the writer may be mid-append)
+        end = chunk.rfind(b"\n") + 1 if not chunk.endswith(b"\n") else len(chunk)
+        ords, vals = self._parse(chunk[:end])
+        if valid:
+            build = os.path.join(self.cache_dir, meta["build"])
+            ords = np.concatenate((np.load(os.path.join(build, "ordinals.npy")), ords))
+            vals = np.concatenate((np.load(os.path.join(build, "values.npy")), vals))
+            added = len(ords) - meta["n_rows"]
+        else:
+            added = len(ords)
+        with open(self.csv_path, "rb") as f:
+            offset = start + end
+            meta = {"n_rows": int(len(ords)), "csv_offset": int(offset),
+                    "head_crc": zlib.crc32(f.read(self.CHECK_BYTES)), "tail_crc": self._crc_before(f, offset)}
+        self._write(ords, vals, meta)
+        self._open(self._read_meta())
+        return added
+
+    @staticmethod
+    def _parse(text: bytes):
+        ords, vals = [], []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or not line[:1].isdigit():
+                continue        # header / blank
+            day, _, value = line.partition(b",")
+            y, m, d = day.split(b"-")
+            ords.append(date(int(y), int(m), int(d)).toordinal())
+            vals.append(float(value) if value.strip() else np.nan)
+        return np.array(ords, dtype=np.int32), np.array(vals, dtype=np.float64)
+
+    def _crc_before(self, f, offset: int) -> int:
+        lo = max(0, offset - self.CHECK_BYTES)
+        f.seek(lo)
+        return zlib.crc32(f.read(offset - lo))
+
+    def _write(self, ords: np.ndarray, vals: np.ndarray, meta: dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        base = int(ords.min()) if ords.size else 0
+        n_days = int(ords.max()) - base + 1 if ords.size else 0
+        by_day = np.full(n_days, np.nan)
+        by_day[ords - base] = vals          # later rows win on duplicate dates
+        # as-of array: forward-fill of by_day
+        idx = np.where(np.isfinite(by_day), np.arange(n_days), 0)
+        np.maximum.accumulate(idx, out=idx)
+        asof = by_day[idx] if n_days else by_day
+        meta["base"] = base
+
+        arrays = {"ordinals": ords, "values": vals, "by_day": by_day, "asof": asof}
+        tmp = tempfile.mkdtemp(prefix=".tmp_v.", dir=self.cache_dir)
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), arr)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        build = os.path.join(self.cache_dir, os.path.basename(tmp)[len(".tmp_"):])    # unique: v.<mkdtemp id>
+        os.rename(tmp, build)
+
+        # the pointer is the only thing swapped, and os.replace of a file is atomic
+        pointer = os.path.join(self.cache_dir, self.POINTER)
+        pointer_tmp = f"{pointer}.{os.getpid()}.tmp"
+        with open(pointer_tmp, "w") as f:
+            json.dump({"build": os.path.basename(build)}, f)
+        os.replace(pointer_tmp, pointer)
+
+        # drop superseded builds: older than the current one (re-read, a concurrent refresh may have won)
+        current = os.path.join(self.cache_dir, self._read_meta()["build"])
+        cutoff = os.path.getmtime(current)
+        for old in glob.glob(os.path.join(self.cache_dir, "v.*")):
+            if os.path.isdir(old) and old != current and os.path.getmtime(old) <= cutoff:
+                shutil.rmtree(old, ignore_errors=True)
+
+    def _read_meta(self):
+        """meta.json of the current build (its folder name under "build"), or None when not converted yet."""
+        try:
+            with open(os.path.join(self.cache_dir, self.POINTER)) as f:
+                build = json.load(f)["build"]
+        except FileNotFoundError:
+            return None
+        with open(os.path.join(self.cache_dir, build, "meta.json")) as f:
+            meta = json.load(f)
+        meta["build"] = build
+        return meta
+
+    def _open(self, meta: dict):
+        self.meta = meta
+        build = os.path.join(self.cache_dir, meta["build"])
+        load = lambda name: np.load(os.path.join(build, f"{name}.npy"), mmap_mode="r")
+        self.ordinals, self.values = load("ordinals"), load("values")
+        self.by_day, self.asof = load("by_day"), load("asof")
+        self._date_strings = None
+
+
+_stores = {}
+
+
+def signal_store(csv_path: str = SIGNALS_CSV) -> SignalStore:
+    """Process-wide store per CSV (opened once, refreshed on demand)."""
+    store = _stores.get(csv_path)
+    if store is None:
+        store = _stores[csv_path] = SignalStore(csv_path)
+    return store
@@ -0,0 +1 @@
+"""Offline throughput benchmarks of the strategy algorithms (see benchmarks/run.py)."""
@@ -0,0 +1,204 @@
+"""
+Local event loop that runs the repo's real algorithm classes on the AlgorithmImports stand-in
+(benchmarks/lean_stub) and synthetic bars (benchmarks/synthetic.py), timing only the algorithm's code.
+
+- load_algorithm(path, class_name) imports an algorithm file as uploaded to QC: its own folder, the
+  stand-in and common/ are importable, and `profiling` / `journal` / `metrics` resolve to their
+  common/ files (the "copy next to the algorithm" modules)
+- run_minute(): per minute 09:31 ... 16:00 -> scheduled events, then prices, then on_data(Slice)
+- run_daily() : per day coarse selection (previous day's bars) -> on_securities_changed ->
+                scheduled events (e.g. 10 min before close) -> on_data with the day's bars at 16:00
+
+Callback wall time is accumulated per name in a Timings object; building slices, bars and coarse
+lists is the engine's own cost and is not counted.
+"""
+import importlib.util
+import os
+import sys
+import time as _time
+from datetime import timedelta
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+STUB = os.path.join(HERE, "lean_stub")
+for path in (STUB, REPO_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import AlgorithmImports as qc  # noqa: E402
+import common.journal  # noqa: E402
+import common.metrics  # noqa: E402
+import common.profiling  # noqa: E402
+
+sys.modules.setdefault("profiling", common.profiling)
+sys.modules.setdefault("journal", common.journal)
+sys.modules.setdefault("metrics", common.metrics)
+
+from benchmarks.synthetic import BARS_PER_DAY, DailyMarket, MinuteMarket  # noqa: E402
+
+
+def load_algorithm(path: str, class_name: str):
+    """The algorithm class from a strategy file, imported with its folder on sys.path."""
+    folder = os.path.dirname(os.path.abspath(path))
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    name = "bench_" + "".join(c if c.isalnum() else "_" for c in os.path.relpath(path, REPO_ROOT))[:-3]
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return getattr(module, class_name)
+
+
+class Timings:
+    """Seconds and calls per callback name."""
+
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+
+    def call(self, name: str, fn, *args):
+        t0 = _time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + (_time.perf_counter() - t0)
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+
+def _create(algorithm_cls, params: dict):
+    algo = algorithm_cls()
+    algo.parameters = {k: str(v) for k, v in params.items()}
+    algo.algorithm_id = "benchmark"
+    return algo
+
+
+def _events_at(algo, tod) -> list:
+    return [fn for t, fn in algo.schedule.events if t == tod]
+
+
+def run_minute(algorithm_cls, params: dict, n_days: int, market: MinuteMarket = None) -> dict:
+    """Minute-resolution run over `n_days` synthetic sessions; returns timings and work counts."""
+    market = market or MinuteMarket()
+    timings = Timings()
+    algo = _create(algorithm_cls, params)
+    timings.call("initialize", algo.initialize)
+
+    symbols = list(algo.securities)
+    tickers = [s.Value for s in symbols]
+    securities = [algo.securities[s] for s in symbols]
+    events: dict = {}
+    for t, fn in algo.schedule.events:
+        events.setdefault(t, []).append(fn)
+    bars_delivered = 0
+
+    for day_index, day in enumerate(market.days(n_days)):
+        o, h, l, c, v = (a.tolist() for a in market.day_bars(tickers, day_index))
+        for slot in range(BARS_PER_DAY):
+            start = market.bar_start(day, slot)
+            end = start + timedelta(minutes=1)
+            algo.time = end
+            for fn in events.get(end.time(), ()):
+                timings.call(fn.__name__, fn)
+            bars = qc.TradeBars()
+            os_, hs, ls, cs, vs = o[slot], h[slot], l[slot], c[slot], v[slot]
+            for j, sym in enumerate(symbols):
+                bars[sym] = qc.TradeBar(sym, start, end, os_[j], hs[j], ls[j], cs[j], vs[j])
+                securities[j].price = cs[j]
+            bars_delivered += len(bars)
+            timings.call("on_data", algo.on_data, qc.Slice(end, bars))
+
+    timings.call("on_end_of_algorithm", algo.on_end_of_algorithm)
+    return {"timings": timings, "bars": bars_delivered, "symbols": len(symbols), "algorithm": algo}
+
+
+class _DailyHistory:
+    """history(symbols, n, DAILY) over a DailyMarket: the n bars ending before `now`'s trading day."""
+
+    def __init__(self, market: DailyMarket, index_of: dict):
+        self.market = market
+        self.index_of = index_of        # Symbol -> column
+
+    def __call__(self, symbols: list, periods: int, resolution: int, now):
+        import pandas as pd
+
+        m = self.market
+        day = int(np.searchsorted(m.days, np.datetime64(now.date(), "D"), "left"))
+        lo = max(0, day - periods)
+        symbols = [s for s in symbols if s in self.index_of]
+        if day <= lo or not symbols:
+            return pd.DataFrame()
+        cols = np.array([self.index_of[s] for s in symbols])
+        ends = pd.to_datetime(m.days[lo:day]) + pd.Timedelta(hours=16)
+        n = day - lo
+        index = pd.MultiIndex.from_arrays([np.repeat(np.array(symbols, dtype=object), n), np.tile(ends, len(symbols))],
+                                          names=["symbol", "time"])
+        frame = {name: getattr(m, name)[lo:day][:, cols].T.ravel() for name in ("open", "high", "low", "close", "volume")}
+        return pd.DataFrame(frame, index=index)
+
+
+def run_daily(algorithm_cls, params: dict, n_days: int, market: DailyMarket, warmup_days: int = 0) -> dict:
+    """
+    Daily-resolution universe run over the last `n_days` of `market` (earlier days serve history
+    requests only); returns timings, work counts and the universe sizes seen by the scheduled events.
+    """
+    timings = Timings()
+    algo = _create(algorithm_cls, params)
+    timings.call("initialize", algo.initialize)
+
+    symbols = [qc.Symbol(t) for t in market.tickers]
+    index_of = {s: j for j, s in enumerate(symbols)}
+    algo.history_provider = _DailyHistory(market, index_of)
+    first = max(warmup_days, market.n_days - n_days, 1)
+
+    members: set = set()
+    bars_delivered = 0
+    event_symbols = 0
+    for d in range(first, market.n_days):
+        day = market.day(d)
+        prev_close = market.close[d - 1].tolist()
+        prev_volume = market.volume[d - 1].tolist()
+
+        # ---- coarse universe at midnight (previous day's bars) ----
+        algo.time = day
+        coarse = [qc.CoarseFundamental(s, prev_close[j], prev_volume[j]) for j, s in enumerate(symbols)]
+        selected = set()
+        for selector in algo.universe_selectors:
+            selected |= set(timings.call(selector.__name__, selector, coarse))
+        added = [s for s in selected if s not in members]
+        removed = [s for s in members if s not in selected]
+        for s in added:
+            algo.add_equity(s.Value, qc.Resolution.DAILY).price = prev_close[index_of[s]]
+        members = selected
+        if added or removed:
+            timings.call("on_securities_changed", algo.on_securities_changed,
+                         qc.SecurityChanges([algo.securities[s] for s in added],
+                                            [algo.securities[s] for s in removed]))
+
+        # ---- scheduled events during the session ----
+        for tod, fn in sorted(algo.schedule.events, key=lambda e: e[0]):
+            algo.time = day.replace(hour=tod.hour, minute=tod.minute)
+            event_symbols += len(members)
+            timings.call(fn.__name__, fn)
+
+        # ---- the day's bars at the close (daily precise end time) ----
+        end = day.replace(hour=16)
+        algo.time = end
+        o, h, l, c, v = (getattr(market, name)[d] for name in ("open", "high", "low", "close", "volume"))
+        bars = qc.TradeBars()
+        for s in members | {s for s, sec in algo.securities.items() if sec.invested}:
+            j = index_of.get(s)
+            if j is None:
+                continue
+            bars[s] = qc.TradeBar(s, day, end, float(o[j]), float(h[j]), float(l[j]), float(c[j]), float(v[j]))
+            algo.securities[s].price = float(c[j])
+        bars_delivered += len(bars)
+        timings.call("on_data", algo.on_data, qc.Slice(end, bars))
+
+    timings.call("on_end_of_algorithm", algo.on_end_of_algorithm)
+    return {"timings": timings, "bars": bars_delivered, "event_symbols": event_symbols,
+            "symbols": len(symbols), "algorithm": algo}
@@ -0,0 +1,482 @@
+"""
+Minimal local stand-in for Lean's `AlgorithmImports`, enough to run the repo's algorithms offline
+under benchmarks/engine.py (no Lean, no cloud). Only the API surface the algorithms use is modelled:
+- Data       : Symbol, TradeBar, Slice (.bars / [] / in), CoarseFundamental, SecurityChanges
+- Algorithm  : QCAlgorithm with parameters, add_equity / add_universe, schedule (every_day + at /
+               before_market_close), history (pandas frame, index (symbol, end_time)), object_store
+- Orders     : market_order / liquidate / set_holdings / calculate_order_quantity fill immediately at the
+               security's last price with the IB equity fee; on_order_event fires synchronously
+- Indicators : RelativeStrengthIndex (Wilder), RollingWindow[T](n), IndicatorDataPoint
+
+Behaviour that does not affect the algorithms' own work (margin, settlement, slippage, order types)
+is intentionally absent: the stand-in exists to time the algorithm code, not to reproduce Lean results.
+"""
+from datetime import date, datetime, time, timedelta  # noqa: F401  (re-exported like Lean's AlgorithmImports)
+from typing import Dict, List  # noqa: F401
+
+__all__ = [
+    "date", "datetime", "time", "timedelta", "Dict", "List",
+    "Symbol", "TradeBar", "TradeBars", "Slice", "Resolution", "BrokerageName", "AccountType",
+    "OrderStatus", "OrderEvent", "OrderFee", "CashAmount", "Security", "SecurityHolding",
+    "SecurityChanges", "CoarseFundamental", "IndicatorDataPoint", "MovingAverageType",
+    "RelativeStrengthIndex", "RollingWindow", "QCAlgorithm",
+]
+
+FREE_PORTFOLIO_PCT = 0.0025       # Lean Settings.free_portfolio_value_percentage default
+
+
+# ---- enums ----
+class Resolution:
+    TICK, SECOND, MINUTE, HOUR, DAILY = range(5)
+
+
+class BrokerageName:
+    DEFAULT, INTERACTIVE_BROKERS = range(2)
+
+
+class AccountType:
+    MARGIN, CASH = range(2)
+
+
+class OrderStatus:
+    NEW, SUBMITTED, PARTIALLY_FILLED, FILLED, CANCELED = 0, 1, 2, 3, 5
+
+
+class MovingAverageType:
+    SIMPLE, EXPONENTIAL, WILDERS = 0, 1, 2
+
+
+# ---- data ----
+class Symbol:
+    """Interned ticker handle: one object per ticker, so dict lookups hash by identity like Lean's Symbol."""
+    __slots__ = ("Value", "value", "__weakref__")
+    _interned: dict = {}
+
+    def __new__(cls, ticker: str):
+        ticker = ticker.upper()
+        sym = cls._interned.get(ticker)
+        if sym is None:
+            sym = super().__new__(cls)
+            sym.Value = sym.value = ticker
+            cls._interned[ticker] = sym
+        return sym
+
+    @classmethod
+    def create(cls, ticker: str, *args) -> "Symbol":
+        return cls(ticker)
+
+    def __repr__(self):
+        return self.Value
+
+    __str__ = __repr__
+
+    def __lt__(self, other):
+        return self.Value < other.Value
+
+
+class TradeBar:
+    __slots__ = ("symbol", "time", "end_time", "open", "high", "low", "close", "volume")
+
+    def __init__(self, symbol: Symbol, time_: datetime, end_time: datetime, open_: float, high: float,
+                 low: float, close: float, volume: float):
+        self.symbol = symbol
+        self.time = time_
+        self.end_time = end_time
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @property
+    def price(self) -> float:
+        return self.close
+
+    @property
+    def value(self) -> float:
+        return self.close
+
+
+class TradeBars(dict):
+    def contains_key(self, symbol) -> bool:
+        return symbol in self
+
+
+class Slice:
+    __slots__ = ("time", "bars")
+
+    def __init__(self, time_: datetime, bars: TradeBars):
+        self.time = time_
+        self.bars = bars
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self.bars
+
+    def __getitem__(self, symbol):
+        return self.bars[symbol]
+
+    def contains_key(self, symbol) -> bool:
+        return symbol in self.bars
+
+    def get(self, symbol, default=None):
+        return self.bars.get(symbol, default)
+
+
+class CoarseFundamental:
+    __slots__ = ("symbol", "price", "volume", "dollar_volume", "has_fundamental_data")
+
+    def __init__(self, symbol: Symbol, price: float, volume: float, has_fundamental_data: bool = True):
+        self.symbol = symbol
+        self.price = price
+        self.volume = volume
+        self.dollar_volume = price * volume
+        self.has_fundamental_data = has_fundamental_data
+
+
+# ---- securities / portfolio ----
+class SecurityHolding:
+    __slots__ = ("symbol", "quantity", "average_price")
+
+    def __init__(self, symbol: Symbol):
+        self.symbol = symbol
+        self.quantity = 0.0
+        self.average_price = 0.0
+
+    @property
+    def invested(self) -> bool:
+        return self.quantity != 0
+
+
+class Security:
+    __slots__ = ("symbol", "resolution", "price", "holdings")
+
+    def __init__(self, symbol: Symbol, resolution: int):
+        self.symbol = symbol
+        self.resolution = resolution
+        self.price = 0.0
+        self.holdings = SecurityHolding(symbol)
+
+    @property
+    def is_tradable(self) -> bool:
+        return self.price > 0
+
+    @property
+    def invested(self) -> bool:
+        return self.holdings.quantity != 0
+
+
+class SecurityChanges:
+    def __init__(self, added: list, removed: list):
+        self.added_securities = added
+        self.removed_securities = removed
+
+
+class Portfolio(dict):
+    """symbol -> SecurityHolding, plus cash and the portfolio value at the securities' last prices."""
+
+    def __init__(self, securities: dict):
+        super().__init__()
+        self._securities = securities
+        self.cash = 0.0
+
+    def __missing__(self, symbol):
+        return self._securities[symbol].holdings
+
+    @property
+    def total_portfolio_value(self) -> float:
+        return self.cash + sum(s.holdings.quantity * s.price for s in self._securities.values() if s.holdings.quantity)
+
+
+# ---- orders ----
+class CashAmount:
+    __slots__ = ("amount", "currency")
+
+    def __init__(self, amount: float, currency: str = "USD"):
+        self.amount = amount
+        self.currency = currency
+
+
+class OrderFee:
+    __slots__ = ("value",)
+
+    def __init__(self, amount: float):
+        self.value = CashAmount(amount)
+
+
+class OrderEvent:
+    __slots__ = ("order_id", "symbol", "utc_time", "status", "fill_quantity", "fill_price", "order_fee")
+
+    def __init__(self, order_id: int, symbol: Symbol, utc_time: datetime, status: int, fill_quantity: float,
+                 fill_price: float, fee: float):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.utc_time = utc_time
+        self.status = status
+        self.fill_quantity = fill_quantity
+        self.fill_price = fill_price
+        self.order_fee = OrderFee(fee)
+
+
+def ib_equity_fee(qty: float, price: float) -> float:
+    """InteractiveBrokers US equity fee: $0.005/share, min $1, max 0.5% of trade value."""
+    q = abs(qty)
+    if q == 0:
+        return 0.0
+    return min(max(1.0, 0.005 * q), 0.005 * q * price)
+
+
+# ---- indicators ----
+class IndicatorDataPoint:
+    __slots__ = ("time", "end_time", "value")
+
+    def __init__(self, time_: datetime, value: float):
+        self.time = time_
+        self.end_time = time_
+        self.value = value
+
+    @property
+    def price(self) -> float:
+        return self.value
+
+
+class RelativeStrengthIndex:
+    """Lean RSI with Wilder averages: simple mean of the first `period` changes, Wilder smoothing after."""
+
+    def __init__(self, period: int, moving_average_type: int = MovingAverageType.WILDERS):
+        self.period = period
+        self.moving_average_type = moving_average_type
+        self.reset()
+
+    def reset(self):
+        self.samples = 0
+        self._prev = None
+        self._gain = 0.0
+        self._loss = 0.0
+        self.current = IndicatorDataPoint(datetime.min, 0.0)
+
+    @property
+    def is_ready(self) -> bool:
+        return self.samples > self.period
+
+    def update(self, time_: datetime, value: float) -> bool:
+        self.samples += 1
+        prev, self._prev = self._prev, value
+        if prev is None:
+            return False
+        change = value - prev
+        n = min(self.samples - 1, self.period)
+        self._gain += (max(change, 0.0) - self._gain) / n
+        self._loss += (max(-change, 0.0) - self._loss) / n
+        rsi = 100.0 if self._loss == 0 else 100.0 - 100.0 / (1.0 + self._gain / self._loss)
+        self.current = IndicatorDataPoint(time_, rsi)
+        return self.is_ready
+
+
+class RollingWindow:
+    """RollingWindow[T](size): index 0 is the most recent item."""
+
+    def __class_getitem__(cls, item):
+        return cls
+
+    def __init__(self, size: int):
+        self.size = size
+        self._items = []
+
+    def add(self, item):
+        self._items.insert(0, item)
+        if len(self._items) > self.size:
+            self._items.pop()
+
+    def reset(self):
+        self._items.clear()
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+    @property
+    def is_ready(self) -> bool:
+        return len(self._items) >= self.size
+
+    def __getitem__(self, i: int):
+        return self._items[i]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# ---- scheduling ----
+class _DateRules:
+    def every_day(self, *symbols):
+        return "every_day"
+
+
+class _TimeRules:
+    def at(self, hour: int, minute: int, second: int = 0) -> time:
+        return time(hour, minute, second)
+
+    def before_market_close(self, symbol=None, minutes_before_close: float = 0) -> time:
+        t = datetime.combine(date.min, time(16, 0)) - timedelta(minutes=minutes_before_close)
+        return t.time()
+
+    def after_market_open(self, symbol=None, minutes_after_open: float = 0) -> time:
+        t = datetime.combine(date.min, time(9, 30)) + timedelta(minutes=minutes_after_open)
+        return t.time()
+
+
+class _Schedule:
+    def __init__(self):
+        self.events: list = []      # (time of day, callback), every day
+
+    def on(self, date_rule, time_rule: time, callback):
+        self.events.append((time_rule, callback))
+
+
+class _UniverseSettings:
+    def __init__(self):
+        self.resolution = Resolution.MINUTE
+
+
+class _ObjectStore(dict):
+    def save(self, key: str, value) -> bool:
+        self[key] = value
+        return True
+
+    def read(self, key: str):
+        return self[key]
+
+    def contains_key(self, key: str) -> bool:
+        return key in self
+
+    def delete(self, key: str) -> bool:
+        return self.pop(key, None) is not None
+
+
+# ---- algorithm ----
+class QCAlgorithm:
+    """
+    Algorithm base with the Lean methods the strategies call. The local engine (benchmarks/engine.py)
+    sets `time`, feeds prices through `securities` and calls the callbacks; `history_provider` is set
+    by the engine for algorithms that request history.
+    """
+
+    def __init__(self):
+        self.time = datetime(1998, 1, 1)
+        self.algorithm_id = "local"
+        self.parameters: dict = {}
+        self.securities: dict = {}
+        self.portfolio = Portfolio(self.securities)
+        self.schedule = _Schedule()
+        self.date_rules = _DateRules()
+        self.time_rules = _TimeRules()
+        self.universe_settings = _UniverseSettings()
+        self.object_store = _ObjectStore()
+        self.universe_selectors: list = []
+        self.history_provider = None
+        self.logs: list = []
+        self.start_date = self.end_date = None
+        self.account_type = AccountType.MARGIN
+        self._order_id = 0
+
+    # ---- setup ----
+    def get_parameter(self, name: str, default=None):
+        value = self.parameters.get(name)
+        return default if value is None else str(value)
+
+    def set_start_date(self, year: int, month: int, day: int):
+        self.start_date = date(year, month, day)
+
+    def set_end_date(self, year: int, month: int, day: int):
+        self.end_date = date(year, month, day)
+
+    def set_cash(self, cash: float):
+        self.portfolio.cash = float(cash)
+
+    def set_brokerage_model(self, brokerage: int, account_type: int = AccountType.MARGIN):
+        self.account_type = account_type
+
+    def add_equity(self, ticker: str, resolution: int = Resolution.MINUTE, *args, **kwargs) -> Security:
+        symbol = Symbol(ticker)
+        security = self.securities.get(symbol)
+        if security is None:
+            security = self.securities[symbol] = Security(symbol, resolution)
+        return security
+
+    def add_universe(self, selector, *args):
+        self.universe_selectors.append(selector)
+
+    def history(self, symbols, periods: int, resolution: int = Resolution.DAILY):
+        if self.history_provider is None:
+            raise NotImplementedError("no history provider attached to this algorithm")
+        if isinstance(symbols, Symbol):
+            symbols = [symbols]
+        return self.history_provider(list(symbols), periods, resolution, self.time)
+
+    # ---- logging ----
+    def log(self, message: str):
+        self.logs.append(message)
+
+    def debug(self, message: str):
+        self.logs.append(message)
+
+    def error(self, message: str):
+        self.logs.append(message)
+
+    # ---- orders ----
+    def market_order(self, symbol: Symbol, quantity: float, *args, **kwargs) -> int:
+        if quantity == 0:
+            return 0
+        security = self.securities[symbol]
+        price = security.price
+        fee = ib_equity_fee(quantity, price)
+        holding = security.holdings
+        new_qty = holding.quantity + quantity
+        if new_qty != 0 and (holding.quantity == 0 or (new_qty > 0) != (holding.quantity > 0)):
+            holding.average_price = price
+        elif new_qty != 0 and abs(new_qty) > abs(holding.quantity):
+            holding.average_price = (holding.average_price * holding.quantity + price * quantity) / new_qty
+        holding.quantity = new_qty
+        self.portfolio.cash -= quantity * price + fee
+        self._order_id += 1
+        self.on_order_event(OrderEvent(self._order_id, symbol, self.time, OrderStatus.FILLED, quantity, price, fee))
+        return self._order_id
+
+    def liquidate(self, symbol: Symbol = None, *args, **kwargs):
+        symbols = [symbol] if symbol is not None else [s for s, sec in self.securities.items() if sec.invested]
+        for s in symbols:
+            qty = self.securities[s].holdings.quantity
+            if qty:
+                self.market_order(s, -qty)
+
+    def calculate_order_quantity(self, symbol: Symbol, target: float) -> float:
+        security = self.securities[symbol]
+        price = security.price
+        if price <= 0:
+            return 0.0
+        tpv = self.portfolio.total_portfolio_value
+        delta = target * tpv * (1.0 - FREE_PORTFOLIO_PCT) - security.holdings.quantity * price
+        qty = float(int(delta / price))
+        if qty > 0 and self.account_type == AccountType.CASH:
+            qty = min(qty, float(int(max(0.0, self.portfolio.cash - 1.0) / (price + 0.005))))
+        return qty
+
+    def set_holdings(self, symbol: Symbol, target: float, *args, **kwargs):
+        qty = self.calculate_order_quantity(symbol, target)
+        if qty:
+            self.market_order(symbol, qty)
+
+    # ---- callbacks (overridden by the algorithm) ----
+    def initialize(self):
+        pass
+
+    def on_data(self, data: Slice):
+        pass
+
+    def on_order_event(self, order_event: OrderEvent):
+        pass
+
+    def on_securities_changed(self, changes: SecurityChanges):
+        pass
+
+    def on_end_of_algorithm(self):
+        pass
@@ -0,0 +1 @@
+from AlgorithmImports import IndicatorDataPoint, MovingAverageType, RelativeStrengthIndex, RollingWindow  # noqa: F401
@@ -0,0 +1 @@
+"""Namespace stand-in for `from QuantConnect.<module> import ...` (see benchmarks/lean_stub/AlgorithmImports.py)."""
@@ -0,0 +1,189 @@
+"""
+Throughput benchmarks of the real algorithm classes on the local Lean stand-in, with regression checks.
+
+Cases
+- Intraday : LeveragedETFIntradayV1 / V2 (their fixed 3 pairs) and LeveragedETFIntradayMulti
+             (version 1 and 2) at 3 / 30 / 300 pairs -> on_data bars/sec
+- Daily    : GapBreakoutVolumeWithYesterdayRSI with a 100 / 1000 / 5000 symbol universe (market of
+             1.5x that many names) -> selection_step symbols/sec and on_data bars/sec
+
+Baselines (benchmarks/baselines.json) store each metric together with a CPU calibration score measured
+on the same machine; a run compares against baseline x (calibration now / calibration then) and fails
+(exit code 1) when a metric falls more than --tolerance below it. Each case runs --repeat times and keeps
+the median per metric; the calibration is the median of its readings taken before and after the cases.
+
+    python -m benchmarks.run                      # all cases, compare against baselines.json
+    python -m benchmarks.run --only multi         # cases whose name contains "multi"
+    python -m benchmarks.run --update-baselines   # re-record baselines after an intended change
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.engine import load_algorithm, run_daily, run_minute  # noqa: E402
+from benchmarks.synthetic import DailyMarket, MinuteMarket  # noqa: E402
+
+BASELINES = os.path.join(HERE, "baselines.json")
+INTRADAY = os.path.join(REPO_ROOT, "Leveraged ETF Intraday Strategy")
+GAP = os.path.join(REPO_ROOT, "GapBreakoutVolumeWithYesterdayRSI", "Algorithm.py")
+
+
+def synthetic_pairs(n: int) -> str:
+    """`pairs` parameter for n synthetic ETF / underlier pairs (the first three are the real ones)."""
+    real = ["SPXL:SPY", "NVDL:NVDA", "TMF:TLT"]
+    return ",".join(real[:n] + [f"L{i:04d}:U{i:04d}" for i in range(max(0, n - len(real)))])
+
+
+@dataclass
+class Case:
+    name: str
+    kind: str                       # "minute" | "daily"
+    path: str
+    class_name: str
+    params: dict = field(default_factory=dict)
+    days: int = 3                   # simulated sessions
+    universe: int = 0               # daily: universe_count (market has 1.5x names)
+
+    def run(self) -> dict:
+        algorithm_cls = load_algorithm(self.path, self.class_name)
+        if self.kind == "minute":
+            res = run_minute(algorithm_cls, self.params, self.days, MinuteMarket())
+            t = res["timings"]
+            return {"on_data_bars_per_sec": res["bars"] / t.seconds["on_data"]}
+        history = 40
+        market = DailyMarket(self.universe * 3 // 2, self.days + history)
+        res = run_daily(algorithm_cls, dict(self.params, universe_count=self.universe), self.days, market, history)
+        t = res["timings"]
+        return {"selection_symbols_per_sec": res["event_symbols"] / t.seconds["selection_step"],
+                "on_data_bars_per_sec": res["bars"] / t.seconds["on_data"]}
+
+
+def cases() -> list:
+    out = [
+        Case("v1_3_pairs", "minute", os.path.join(INTRADAY, "LeveragedETFIntradayV1.py"), "LeveragedETFIntradayV1",
+             days=20),
+        Case("v2_3_pairs", "minute", os.path.join(INTRADAY, "LeveragedETFIntradayV2.py"), "LeveragedETFIntradayV2",
+             days=20),
+    ]
+    # sessions per case sized so on_data runs for a few hundred ms (timer noise stays small)
+    for version in (1, 2):
+        for n, days in ((3, 10), (30, 5), (300, 2)):
+            out.append(Case(f"multi_v{version}_{n}_pairs", "minute",
+                            os.path.join(INTRADAY, "LeveragedETFIntradayMulti.py"), "LeveragedETFIntradayMulti",
+                            {"version": version, "pairs": synthetic_pairs(n)}, days=days))
+    # the first day seeds every member's history, so short runs measure warm-up instead of the daily step
+    for n, days in ((100, 200), (1000, 30), (5000, 10)):
+        out.append(Case(f"gap_{n}_symbols", "daily", GAP, "GapBreakoutVolumeWithYesterdayRSI", days=days, universe=n))
+    return out
+
+
+def calibrate(repeat: int = 7, n: int = 500000) -> list:
+    """Fixed pure-Python workload (dict / float work like the callbacks), in Mops/s; one reading per run."""
+    readings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        d, acc = {}, 0.0
+        for i in range(n):
+            k = i & 1023
+            acc += d.get(k, 0.5) * 1.0001
+            d[k] = acc % 7.0
+        readings.append(n / 1e6 / (time.perf_counter() - t0))
+    return readings
+
+
+def measure(selected: list, repeat: int) -> dict:
+    results = {}
+    for case in selected:
+        runs = {}
+        for _ in range(repeat):
+            gc.collect()
+            for metric, value in case.run().items():
+                runs.setdefault(metric, []).append(value)
+        # median: one slow (first import, page faults) or lucky run does not move the result
+        results[case.name] = {metric: statistics.median(values) for metric, values in runs.items()}
+        print(f"[bench] {case.name:<24} " + " ".join(f"{k}={v:,.0f}" for k, v in results[case.name].items()),
+              flush=True)
+    return results
+
+
+def compare(results: dict, baselines: dict, calibration: float, tolerance: float) -> list:
+    """Regression messages (empty when every measured metric is within tolerance of its baseline)."""
+    scale = calibration / baselines["calibration"] if baselines.get("calibration") else 1.0
+    failures = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baselines.get("cases", {}).get(name, {}).get(metric)
+            if base is None:
+                print(f"[bench] {name}.{metric}: no baseline")
+                continue
+            expected = base * scale
+            ratio = value / expected
+            status = "ok" if ratio >= 1.0 - tolerance else "REGRESSION"
+            print(f"[bench] {name:<24} {metric:<26} {value:>12,.0f} vs {expected:>12,.0f} ({ratio:.2f}x) {status}")
+            if status != "ok":
+                failures.append(f"{name}.{metric}: {value:,.0f} < {expected:,.0f} x {1.0 - tolerance:.2f}")
+    return failures
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Algorithm throughput benchmarks on the local Lean stand-in.")
+    ap.add_argument("--only", default=None, help="run cases whose name contains this text")
+    ap.add_argument("--repeat", type=int, default=5, help="runs per case, median kept")
+    ap.add_argument("--baselines", default=BASELINES)
+    ap.add_argument("--tolerance", type=float, default=0.30, help="allowed relative slowdown")
+    ap.add_argument("--update-baselines", action="store_true", help="store this run as the new baselines")
+    ap.add_argument("--json", default=None, help="also write the measured metrics here")
+    args = ap.parse_args(argv)
+
+    selected = [c for c in cases() if args.only is None or args.only in c.name]
+    if not selected:
+        ap.error(f"no case matches {args.only!r}")
+    readings = calibrate()
+    results = measure(selected, args.repeat)
+    readings += calibrate()     # before and after, so a clock change during the run shows up in the median
+    calibration = statistics.median(readings)
+    print(f"[bench] calibration={calibration:.2f} Mops/s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"calibration": calibration, "cases": results}, f, indent=2, sort_keys=True)
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    if args.update_baselines:
+        if baselines.get("calibration"):
+            # keep untouched cases comparable: express the new numbers on the stored calibration
+            scale = baselines["calibration"] / calibration
+            results = {n: {k: v * scale for k, v in m.items()} for n, m in results.items()}
+        else:
+            baselines["calibration"] = calibration
+        baselines.setdefault("cases", {}).update(
+            {n: {k: round(v, 1) for k, v in m.items()} for n, m in results.items()})
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"[bench] baselines updated: {args.baselines}")
+        return 0
+    if not baselines:
+        print(f"[bench] no baselines at {args.baselines} (run with --update-baselines)")
+        return 0
+
+    failures = compare(results, baselines, calibration, args.tolerance)
+    for line in failures:
+        print(f"[bench] FAIL {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
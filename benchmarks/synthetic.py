@@ -0,0 +1,90 @@
+"""
+Seeded synthetic market data for the benchmarks: same seed -> same bars on every machine.
+
+- MinuteMarket : per (day, ticker) RTH minute bars (390 per day, 09:30 ... 15:59 bar starts), random walk
+                 around a per-ticker base price; generated per day so 600 tickers do not sit in memory
+- DailyMarket  : one (days x symbols) OHLCV panel with per-symbol price level, volatility and liquidity,
+                 including gaps and volume bursts so the gap-breakout conditions actually fire
+"""
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+BARS_PER_DAY = 390
+
+
+def trading_days(start: str, n: int) -> np.ndarray:
+    """n weekdays from `start` (datetime64[D]); holidays are not modelled."""
+    return np.busday_offset(np.datetime64(start, "D"), np.arange(n), roll="forward")
+
+
+def _ticker_seed(ticker: str) -> int:
+    return zlib.crc32(ticker.encode("ascii"))
+
+
+class MinuteMarket:
+    """Minute OHLCV for any set of tickers; bars of (day, ticker) depend only on the seed."""
+
+    def __init__(self, seed: int = 7, start: str = "2024-01-02", minute_vol: float = 0.0012):
+        self.seed = seed
+        self.start = start
+        self.minute_vol = minute_vol
+
+    def days(self, n: int) -> list:
+        return [datetime.fromisoformat(str(d)) for d in trading_days(self.start, n)]
+
+    def day_bars(self, tickers: list, day_index: int) -> tuple:
+        """(open, high, low, close, volume), each (390, n_tickers), for trading day `day_index`."""
+        n = len(tickers)
+        base = np.array([20.0 + _ticker_seed(t) % 400 for t in tickers])
+        rng = np.random.default_rng([self.seed, day_index])
+        gap = np.exp(rng.normal(0.0, 0.01, n))
+        steps = rng.normal(0.0, self.minute_vol, (BARS_PER_DAY, n))
+        close = base * gap * np.exp(np.cumsum(steps, axis=0))
+        open_ = np.empty_like(close)
+        open_[0] = base * gap
+        open_[1:] = close[:-1]
+        wick = np.abs(rng.normal(0.0, self.minute_vol / 2, (2, BARS_PER_DAY, n)))
+        high = np.maximum(open_, close) * (1.0 + wick[0])
+        low = np.minimum(open_, close) * (1.0 - wick[1])
+        volume = rng.integers(100, 50000, (BARS_PER_DAY, n)).astype(np.float64)
+        return open_, high, low, close, volume
+
+    @staticmethod
+    def bar_start(day: datetime, slot: int) -> datetime:
+        return day + timedelta(hours=9, minutes=30 + slot)
+
+
+class DailyMarket:
+    """
+    Daily panel of `n_symbols` synthetic equities ("S00001", ...) over `n_days` trading days.
+    Dollar volume differs by orders of magnitude across symbols and drifts over time, so a top-N
+    universe has daily entrants and leavers like a real coarse universe.
+    """
+
+    def __init__(self, n_symbols: int, n_days: int, seed: int = 11, start: str = "2023-01-02"):
+        rng = np.random.default_rng([seed, n_symbols, n_days])
+        self.tickers = [f"S{i:05d}" for i in range(n_symbols)]
+        self.days = trading_days(start, n_days)
+        level = np.exp(rng.uniform(np.log(12.0), np.log(400.0), n_symbols))
+        vol = rng.uniform(0.01, 0.04, n_symbols)
+        ret = rng.normal(0.0004, 1.0, (n_days, n_symbols)) * vol
+        gaps = rng.normal(0.0, 0.6, (n_days, n_symbols)) * vol
+        self.close = level * np.exp(np.cumsum(ret, axis=0))
+        prev = np.vstack([self.close[:1], self.close[:-1]])
+        self.open = prev * np.exp(gaps)
+        wick = np.abs(rng.normal(0.0, 0.5, (2, n_days, n_symbols))) * vol
+        self.high = np.maximum(self.open, self.close) * (1.0 + wick[0])
+        self.low = np.minimum(self.open, self.close) * (1.0 - wick[1])
+        liquidity = np.exp(rng.normal(13.0, 1.5, n_symbols))
+        drift = np.exp(np.cumsum(rng.normal(0.0, 0.05, (n_days, n_symbols)), axis=0))
+        burst = np.where(rng.random((n_days, n_symbols)) < 0.05, 3.0, 1.0)
+        self.volume = np.round(liquidity * drift * burst * np.exp(rng.normal(0.0, 0.3, (n_days, n_symbols))))
+
+    @property
+    def n_days(self) -> int:
+        return int(self.days.size)
+
+    def day(self, i: int) -> datetime:
+        return datetime.fromisoformat(str(self.days[i]))
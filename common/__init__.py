@@ -0,0 +1,4 @@
+"""
+Shared helpers used across the strategy folders (sweeps, metrics, result post-processing).
+Strategy algorithms stay single-file uploadable; these modules are for local/offline tooling.
+"""
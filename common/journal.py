@@ -0,0 +1,246 @@
+"""
+Buffered columnar trade journal and rate-limited debug output (copy next to the algorithm as journal.py).
+
+TradeJournal
+- fill(time, symbol, qty, price, fee, order_id) / event(time, symbol, kind, value): one slot write into
+  preallocated NumPy columns (symbols and event kinds are interned to small ints), no string formatting
+- Batches are formatted and handed to a sink when the trading day changes, when a buffer is full and
+  at flush() (end of run); each batch is one compact CSV text per table. flush() also closes the sink
+- Sinks: ObjectStoreSink (algorithm object store; batches are collected in memory and saved as one key
+  per table, rolling to a new key only past a size cap) or FolderSink (local files, appended)
+
+RateLimitedLog
+- note(key, detail): the first `per_key` occurrences of a key are emitted, the rest are only counted;
+  flush() emits one "N more" line per key and resets, so a noisy loop costs one line per key per day
+
+Offline: read_journal(folder) loads a FolderSink / downloaded object-store folder back into columns.
+"""
+import glob
+import os
+from datetime import datetime
+
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+
+FILL_COLUMNS = ("time", "symbol", "qty", "price", "fee", "order_id")
+EVENT_COLUMNS = ("time", "symbol", "kind", "value")
+
+
+class ObjectStoreSink:
+    """
+    Collects a table's batches in memory and saves them as {prefix}/{table}/{part:03d}.csv: at close()
+    (end of run) and whenever a part reaches `max_bytes`, which then starts the next part. The object
+    store has no append, so a key per batch would mean a save per table per day.
+    """
+
+    def __init__(self, object_store, prefix: str, max_bytes: int = 8 << 20):
+        self.object_store = object_store
+        self.prefix = prefix.rstrip("/")
+        self.max_bytes = max_bytes
+        self._parts: dict[str, int] = {}
+        self._pending: dict[str, list] = {}     # table -> CSV texts of the open part (one header)
+        self._size: dict[str, int] = {}
+        self._unsaved: set = set()
+
+    def __call__(self, table: str, batch: int, text: str):
+        pending = self._pending.setdefault(table, [])
+        if pending:
+            text = text.split("\n", 1)[1]     # drop the repeated header
+        pending.append(text)
+        self._unsaved.add(table)
+        self._size[table] = self._size.get(table, 0) + len(text)
+        if self._size[table] >= self.max_bytes:
+            self._save(table)
+            self._parts[table] = self._parts.get(table, 0) + 1
+            self._pending[table] = []
+            self._size[table] = 0
+
+    def _save(self, table: str):
+        pending = self._pending.get(table)
+        if pending:
+            self.object_store.save(f"{self.prefix}/{table}/{self._parts.get(table, 0):03d}.csv", "".join(pending))
+        self._unsaved.discard(table)
+
+    def close(self):
+        """Save every open part; later batches extend it and a later close() saves it again."""
+        for table in list(self._unsaved):
+            self._save(table)
+
+
+class FolderSink:
+    """Appends every batch of a table to {folder}/{table}.csv (header written once)."""
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def __call__(self, table: str, batch: int, text: str):
+        path = os.path.join(self.folder, f"{table}.csv")
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            text = text.split("\n", 1)[1]     # drop the repeated header
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+
+class _Table:
+    """Preallocated columns of one journal table plus its fill position."""
+
+    def __init__(self, name: str, columns: tuple, dtypes: tuple, capacity: int):
+        self.name = name
+        self.columns = columns
+        self.data = [np.empty(capacity, dtype=dt) for dt in dtypes]
+        self.capacity = capacity
+        self.n = 0
+        self.batches = 0
+        self.rows = 0
+
+
+class TradeJournal:
+    """Fill and signal-event journal for one run; see the module docstring."""
+
+    def __init__(self, sink, capacity: int = 4096):
+        self.sink = sink
+        self._names: list[str] = []         # interned symbol / kind strings
+        self._ids: dict = {}
+        self._day = None
+        self.fills = _Table("fills", FILL_COLUMNS, (np.float64, np.int32, np.float64, np.float64, np.float64, np.int64),
+                            capacity)
+        self.events = _Table("events", EVENT_COLUMNS, (np.float64, np.int32, np.int32, np.float64), capacity)
+
+    def _intern(self, key) -> int:
+        i = self._ids.get(key)
+        if i is None:
+            i = self._ids[key] = len(self._names)
+            self._names.append(key if isinstance(key, str) else getattr(key, "Value", str(key)))
+        return i
+
+    def _stamp(self, time: datetime) -> float:
+        day = time.toordinal()
+        if day != self._day:
+            if self._day is not None:
+                self._flush_tables()    # end of day: hand the day's rows to the sink
+            self._day = day
+        return (time - _EPOCH).total_seconds()
+
+    def fill(self, time: datetime, symbol, qty: float, price: float, fee: float = 0.0, order_id: int = 0):
+        t = self._stamp(time)
+        tab = self.fills
+        if tab.n == tab.capacity:
+            self._flush_table(tab)
+        i = tab.n
+        c = tab.data
+        c[0][i] = t
+        c[1][i] = self._intern(symbol)
+        c[2][i] = qty
+        c[3][i] = price
+        c[4][i] = fee
+        c[5][i] = order_id
+        tab.n = i + 1
+
+    def event(self, time: datetime, symbol, kind: str, value: float = 0.0):
+        t = self._stamp(time)
+        tab = self.events
+        if tab.n == tab.capacity:
+            self._flush_table(tab)
+        i = tab.n
+        c = tab.data
+        c[0][i] = t
+        c[1][i] = self._intern(symbol) if symbol is not None else -1
+        c[2][i] = self._intern(kind)
+        c[3][i] = value
+        tab.n = i + 1
+
+    # ---- output ----
+    def flush(self):
+        """Hand the buffered rows to the sink and close it (end of run)."""
+        self._flush_tables()
+        close = getattr(self.sink, "close", None)
+        if close is not None:
+            close()
+
+    def _flush_tables(self):
+        self._flush_table(self.fills)
+        self._flush_table(self.events)
+
+    def _flush_table(self, tab: _Table):
+        n = tab.n
+        if n == 0:
+            return
+        names = np.array(self._names + [""], dtype=object)      # id -1 -> ""
+        times = np.round(tab.data[0][:n]).astype(np.int64).astype("datetime64[s]").astype(str)
+        cols = [times]
+        for name, col in zip(tab.columns[1:], tab.data[1:]):
+            col = col[:n]
+            if name in ("symbol", "kind"):
+                cols.append(names[col])
+            elif col.dtype.kind == "f":
+                cols.append(np.char.mod("%.10g", col))
+            else:
+                cols.append(col.astype(str))
+        lines = [",".join(tab.columns)]
+        lines.extend(",".join(row) for row in zip(*cols))
+        self.sink(tab.name, tab.batches, "\n".join(lines) + "\n")
+        tab.batches += 1
+        tab.rows += n
+        tab.n = 0
+
+    def summary(self) -> str:
+        return (f"fills={self.fills.rows + self.fills.n} events={self.events.rows + self.events.n} "
+                f"batches={self.fills.batches + self.events.batches} symbols/kinds={len(self._names)}")
+
+
+class RateLimitedLog:
+    """
+    Aggregating front for self.debug / self.log: at most `per_key` lines per key between flushes,
+    the remainder is counted and reported once by flush().
+    """
+
+    def __init__(self, emit, per_key: int = 1):
+        self.emit = emit
+        self.per_key = per_key
+        self.counts: dict[str, int] = {}
+        self.suppressed = 0
+
+    def note(self, key: str, detail: str = ""):
+        n = self.counts.get(key, 0) + 1
+        self.counts[key] = n
+        if n <= self.per_key:
+            self.emit(f"{key} {detail}" if detail else key)
+        else:
+            self.suppressed += 1
+
+    def flush(self):
+        for key, n in self.counts.items():
+            if n > self.per_key:
+                self.emit(f"{key} x{n - self.per_key} more (suppressed)")
+        self.counts.clear()
+
+
+def read_journal(folder: str, table: str = "fills") -> dict:
+    """Columns of a journal table from a FolderSink folder or a downloaded object-store prefix."""
+    paths = [os.path.join(folder, f"{table}.csv")]
+    if not os.path.exists(paths[0]):
+        paths = sorted(glob.glob(os.path.join(folder, table, "*.csv")))
+    rows, header = [], None
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        if not lines:
+            continue
+        header = header or lines[0].split(",")
+        rows.extend(line.split(",") for line in lines[1:] if line)
+    if header is None:
+        return {}
+    cols = dict(zip(header, map(list, zip(*rows)))) if rows else {h: [] for h in header}
+    out = {}
+    for name, values in cols.items():
+        if name == "time":
+            out[name] = np.array(values, dtype="datetime64[s]")
+        elif name in ("symbol", "kind"):
+            out[name] = np.array(values, dtype=object)
+        elif name == "order_id":
+            out[name] = np.array(values, dtype=np.int64)
+        else:
+            out[name] = np.array(values, dtype=np.float64)
+    return out
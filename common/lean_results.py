@@ -0,0 +1,387 @@
+"""
+Streaming reader for `lean backtest` result JSON files.
+
+Minute-resolution runs write every order, order event and chart point into one large JSON.
+This reader walks the file in fixed-size chunks and only decodes what was asked for:
+- equity     : "Strategy Equity" / "Equity" chart points      -> {name}_equity.csv  (time, equity)
+- orders     : the "orders" map, one order at a time           -> {name}_orders.csv
+- fills      : filled / partially filled "orderEvents"         -> {name}_fills.csv   (time, order_id, symbol, qty, price, fee)
+- statistics : "statistics" + "runtimeStatistics" blocks, plus the common/metrics.py standard set
+                                                               -> {name}_statistics.json
+Everything else (other charts, rolling windows, logs) is skipped without being decoded, so memory
+stays bounded by the chunk size and the largest single order / point, not by the file size.
+Rows are written as they are parsed; no section is held in memory.
+
+CLI:
+    python -m common.lean_results backtests/2025-01-01_12-00-00/123456.json --out results --name v1
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+from common.metrics import StreamingMetrics
+
+SECTIONS = ("equity", "orders", "fills", "statistics")
+
+ORDER_COLUMNS = ("id", "time", "symbol", "type", "direction", "status", "quantity", "price", "tag")
+FILL_COLUMNS = ("time", "order_id", "symbol", "qty", "price", "fee")
+
+_WS = re.compile(r"[ \t\r\n]*")
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|["{}\[\]]', re.S)     # a whole string, a bracket, or a lone quote
+_STRING_TAIL = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_NUMBER_CHARS = re.compile(r"[0-9.eE+\-]*")
+
+
+class JsonStream:
+    """
+    Pull parser over a text file: navigate objects / arrays with items() / elements(),
+    then decode a value with value() or jump over it with skip().
+    """
+
+    def __init__(self, fh, chunk_size: int = 1 << 20):
+        self._fh = fh
+        self._chunk = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._eof = False
+        self.buf = ""
+        self.pos = 0
+
+    def _more(self) -> bool:
+        """Append the next chunk, dropping everything before `pos`."""
+        if self._eof:
+            return False
+        data = self._fh.read(self._chunk)
+        if not data:
+            self._eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                raise ValueError("unexpected end of JSON")
+
+    def _take(self, ch: str):
+        if self.peek() != ch:
+            raise ValueError(f"expected {ch!r}, got {self.buf[self.pos:self.pos + 20]!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next value (meant for small ones: a key, an order, a chart point)."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._more():
+                    continue
+                raise
+            if _NUMBER_CHARS.match(self.buf, end).end() == len(self.buf) and self._more():
+                continue    # a number may go on in the next chunk ("1." / "1e" decode as 1)
+            self.pos = end
+            return obj
+
+    def skip(self):
+        """Jump over the next value without decoding it."""
+        ch = self.peek()
+        if ch == '"':
+            self.pos += 1
+            self._skip_string()
+            return
+        if ch not in "{[":
+            self.value()
+            return
+        depth = 0
+        while True:
+            m = _TOKEN.search(self.buf, self.pos)
+            if m is None or m.group() == '"':
+                # no token left in the buffer, or a string running past its end
+                self.pos = len(self.buf) if m is None else m.start()
+                if not self._more():
+                    raise ValueError("unexpected end of JSON")
+                continue
+            self.pos = m.end()
+            c = m.group()
+            if c in "{[":
+                depth += 1
+            elif c in "}]":
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _skip_string(self):
+        # pos is just past the opening quote
+        while True:
+            m = _STRING_TAIL.match(self.buf, self.pos)
+            if m is not None:
+                self.pos = m.end()
+                return
+            if not self._more():
+                raise ValueError("unterminated string")
+
+    def items(self):
+        """
+        Iterate an object: yields each key with the stream positioned at its value.
+        The caller consumes the value (value(), skip(), or a nested items() / elements()).
+        """
+        self._take("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self._take(":")
+            yield key
+            ch = self.peek()
+            self.pos += 1
+            if ch == "}":
+                return
+            if ch != ",":
+                raise ValueError(f"expected ',' or '}}' after value of {key!r}")
+
+    def elements(self):
+        """Iterate an array: yields once per element with the stream positioned at it."""
+        self._take("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        i = 0
+        while True:
+            yield i
+            i += 1
+            ch = self.peek()
+            self.pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError("expected ',' or ']' in array")
+
+
+# ---- Lean result layout ----
+def _field(d: dict, name: str, default=None):
+    """Lean writes camelCase keys; older result files use PascalCase."""
+    if name in d:
+        return d[name]
+    return d.get(name[0].upper() + name[1:], default)
+
+
+def _iso(unix_seconds) -> str:
+    return datetime.fromtimestamp(float(unix_seconds), timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _point(raw):
+    """Chart point -> (unix seconds, value): [t, o, h, l, c] candles or legacy {"x": t, "y": v}."""
+    if isinstance(raw, list):
+        return raw[0], raw[-1]
+    return _field(raw, "x"), _field(raw, "y")
+
+
+def _symbol_value(sym) -> str:
+    if isinstance(sym, dict):
+        return _field(sym, "value", "")
+    return str(sym or "")
+
+
+class _Writer:
+    """Lazily opened CSV writer, so sections that were not found leave no empty file."""
+
+    def __init__(self, path: str, columns: tuple):
+        self.path = path
+        self.columns = columns
+        self.rows = 0
+        self._fh = None
+        self._w = None
+
+    def write(self, row):
+        if self._fh is None:
+            self._fh = open(self.path, "w", newline="", encoding="utf-8")
+            self._w = csv.writer(self._fh)
+            self._w.writerow(self.columns)
+        self._w.writerow(row)
+        self.rows += 1
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+
+
+class ResultExtractor:
+    """
+    One pass over a result file. Rows go straight to the writers (or are only counted when
+    out_dir is None); fills and equity points also feed StreamingMetrics.
+    Trade statistics use order events (they carry fees) and fall back to filled orders
+    for result files written without events.
+    """
+
+    def __init__(self, out_dir: str = None, name: str = "backtest", sections=SECTIONS,
+                 equity_chart: str = "Strategy Equity", equity_series: str = "Equity"):
+        unknown = set(sections) - set(SECTIONS)
+        if unknown:
+            raise ValueError(f"unknown section(s) {sorted(unknown)}; known: {list(SECTIONS)}")
+        self.sections = set(sections)
+        self.equity_chart = equity_chart
+        self.equity_series = equity_series
+        self.out_dir = out_dir
+        self.name = name
+        self.statistics = {}
+        self.runtime_statistics = {}
+        # equity goes into both engines; the one with the better fill source is reported
+        self._by_events = StreamingMetrics()
+        self._by_orders = StreamingMetrics()
+        self._writers = {}
+        if out_dir is not None:
+            os.makedirs(out_dir, exist_ok=True)
+            for section, columns in (("equity", ("time", "equity")), ("orders", ORDER_COLUMNS),
+                                     ("fills", FILL_COLUMNS)):
+                if section in self.sections:
+                    self._writers[section] = _Writer(os.path.join(out_dir, f"{name}_{section}.csv"), columns)
+        self.counts = {"equity": 0, "orders": 0, "fills": 0}
+
+    def _emit(self, section: str, row):
+        self.counts[section] += 1
+        w = self._writers.get(section)
+        if w is not None:
+            w.write(row)
+
+    # ---- sections ----
+    def _charts(self, js: JsonStream):
+        for chart in js.items():
+            if chart != self.equity_chart:
+                js.skip()
+                continue
+            for key in js.items():
+                if key.lower() != "series":
+                    js.skip()
+                    continue
+                for series in js.items():
+                    if series != self.equity_series:
+                        js.skip()
+                        continue
+                    for skey in js.items():
+                        if skey.lower() != "values":
+                            js.skip()
+                            continue
+                        for _ in js.elements():
+                            t, equity = _point(js.value())
+                            if equity is None:
+                                continue
+                            equity = float(equity)
+                            day = int(t) // 86400
+                            self._by_events.on_equity(equity, day)
+                            self._by_orders.on_equity(equity, day)
+                            self._emit("equity", (_iso(t), equity))
+
+    def _orders(self, js: JsonStream):
+        for _ in js.items():
+            order = js.value()
+            qty = float(_field(order, "quantity", 0.0))
+            price = float(_field(order, "price", 0.0))
+            status = _field(order, "status")
+            symbol = _symbol_value(_field(order, "symbol"))
+            if status == 3:     # OrderStatus.Filled
+                self._by_orders.on_fill(symbol, qty, price)
+            if "orders" in self.sections:
+                self._emit("orders", (_field(order, "id"), _field(order, "time"), symbol,
+                                      _field(order, "type"), _field(order, "direction"), status,
+                                      qty, price, _field(order, "tag", "")))
+
+    def _order_events(self, js: JsonStream):
+        for _ in js.elements():
+            ev = js.value()
+            status = str(_field(ev, "status", "")).lower()
+            if status not in ("filled", "partiallyfilled"):
+                continue
+            qty = float(_field(ev, "fillQuantity", 0.0))
+            if qty == 0:
+                continue
+            price = float(_field(ev, "fillPrice", 0.0))
+            fee = float(_field(ev, "orderFeeAmount", 0.0) or 0.0)
+            symbol = _field(ev, "symbolValue") or _symbol_value(_field(ev, "symbol"))
+            self._by_events.on_fill(symbol, qty, price, fee)
+            if "fills" in self.sections:
+                self._emit("fills", (_iso(_field(ev, "time", 0)), _field(ev, "orderId"), symbol, qty, price, fee))
+
+    # ---- driver ----
+    def run(self, path: str, chunk_size: int = 1 << 20) -> dict:
+        want_trades = bool(self.sections & {"orders", "fills", "statistics"})
+        try:
+            with open(path, "r", encoding="utf-8-sig") as fh:
+                js = JsonStream(fh, chunk_size)
+                for key in js.items():
+                    k = key.lower()
+                    if k == "charts" and self.sections & {"equity", "statistics"}:
+                        self._charts(js)
+                    elif k == "orders" and want_trades:
+                        self._orders(js)
+                    elif k == "orderevents" and want_trades:
+                        self._order_events(js)
+                    elif k == "statistics" and "statistics" in self.sections:
+                        self.statistics = js.value() or {}
+                    elif k == "runtimestatistics" and "statistics" in self.sections:
+                        self.runtime_statistics = js.value() or {}
+                    else:
+                        js.skip()
+        finally:
+            for w in self._writers.values():
+                w.close()
+
+        engine = self._by_events if self._by_events.n_fills else self._by_orders
+        summary = {"source": os.path.basename(path), "counts": dict(self.counts, trades=engine.n_fills),
+                   "statistics": self.statistics, "runtimeStatistics": self.runtime_statistics,
+                   "metrics": engine.result()}
+        if self.out_dir is not None and "statistics" in self.sections:
+            out = os.path.join(self.out_dir, f"{self.name}_statistics.json")
+            with open(out, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2, default=str)
+        return summary
+
+
+def extract(path: str, out_dir: str = None, name: str = None, sections=SECTIONS, **kwargs) -> dict:
+    """Stream one result file into `{name}_*.csv/json` under out_dir; returns the statistics summary."""
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    return ResultExtractor(out_dir, name, sections, **kwargs).run(path)
+
+
+def read_statistics(path: str):
+    """The top-level "statistics" block of a result file, or None; everything else is skipped."""
+    with open(path, "r", encoding="utf-8-sig") as fh:
+        js = JsonStream(fh)
+        if js.peek() != "{":
+            return None
+        for key in js.items():
+            if key.lower() == "statistics":
+                stats = js.value()
+                return stats if isinstance(stats, dict) else None
+            js.skip()
+    return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Extract compact summaries from lean backtest result JSON files.")
+    ap.add_argument("results", nargs="+", help="result JSON file(s) written by `lean backtest`")
+    ap.add_argument("--out", default="results", help="output folder")
+    ap.add_argument("--name", default=None, help="file prefix (single input only; default: input file name)")
+    ap.add_argument("--sections", default=",".join(SECTIONS), help=f"comma list out of {','.join(SECTIONS)}")
+    args = ap.parse_args(argv)
+
+    if args.name and len(args.results) > 1:
+        ap.error("--name only works with a single result file")
+    sections = [s.strip() for s in args.sections.split(",") if s.strip()]
+    for path in args.results:
+        summary = extract(path, args.out, args.name, sections)
+        m = summary["metrics"]
+        print(f"[results] {path}: {summary['counts']} -> {args.out} "
+              f"(sharpe={m['sharpe']:.2f} max_dd={m['max_dd']:.2%} trades={m['n_trades']})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Standard strategy metrics: CAGR, Sharpe, MaxDD, HitRatio, AvgWin, AvgLoss, Turnover.
+
+StreamingMetrics is O(1) per update and keeps no curves:
+- Sharpe    : running mean / variance of daily returns (Welford)
+- MaxDD     : running equity peak and deepest drawdown from it
+- CAGR      : first / last equity and the number of daily observations
+- Round trip: per-symbol net position and cost basis; a trip closes when the position returns to
+              flat (or flips), its P&L (fees included) feeds the win/loss counters
+- Turnover  : traded notional vs running mean equity, annualized
+
+Inside an algorithm (copy this file next to the algorithm as metrics.py):
+    self.metrics = StreamingMetrics(self.portfolio.total_portfolio_value)
+    on_order_event : self.metrics.on_fill(order_event.symbol, order_event.fill_quantity,
+                                          order_event.fill_price, order_event.order_fee.value.amount)
+    daily close    : self.metrics.on_equity(self.portfolio.total_portfolio_value, self.time.date())
+    end            : self.log(format_metrics(self.metrics.result()))
+
+Batch mode runs the same engine over iterables, so exported results or sweep workers never
+need to hold a full equity curve:
+    compute(equity_values, fills=[(symbol, qty, price, fee), ...], initial_equity=100000)
+"""
+import copy
+import math
+
+TRADING_DAYS = 252
+
+# the headline set every strategy reports (README "Conventions")
+STANDARD_METRICS = ("cagr", "sharpe", "max_dd", "hit_ratio", "avg_win", "avg_loss", "turnover")
+
+
+class _Trip:
+    __slots__ = ("position", "cost", "pnl")
+
+    def __init__(self):
+        self.position = 0.0     # signed shares
+        self.cost = 0.0         # signed cost basis of the open shares (qty * price)
+        self.pnl = 0.0          # realized P&L of the trip so far, net of fees
+
+
+class StreamingMetrics:
+    """
+    Incremental metrics for one strategy run; every update is O(1) time and memory
+    (plus one small record per symbol with an open round trip).
+    - on_equity(equity, day): daily equity; with `day`, repeated calls on the same day overwrite
+                              each other, so it can be fed from on_data or a scheduled event alike
+    - on_fill(symbol, qty, price, fee): signed fill quantity
+    - result(): metrics dict, callable at any time
+    """
+
+    def __init__(self, initial_equity: float = None, periods_per_year: int = TRADING_DAYS):
+        # initial_equity=None: the first on_equity() observation is the starting equity
+        self.initial_equity = None if initial_equity is None else float(initial_equity)
+        self.periods_per_year = periods_per_year
+        # equity / returns
+        self.last_equity = self.initial_equity
+        self.n = 0                  # committed daily observations
+        self.mean = 0.0             # running mean of daily returns
+        self.m2 = 0.0               # running sum of squared deviations
+        self.peak = self.initial_equity
+        self.max_dd = 0.0
+        self.equity_sum = 0.0       # for the mean equity (turnover denominator)
+        self._pending = None        # (day, equity) not yet committed
+        # trades
+        self.n_fills = 0
+        self.fees = 0.0
+        self.traded_value = 0.0
+        self.n_trades = 0
+        self.n_wins = 0
+        self.win_sum = 0.0
+        self.loss_sum = 0.0
+        self._trips = {}
+
+    # ---- equity ----
+    def on_equity(self, equity: float, day=None):
+        if self.initial_equity is None:
+            self.initial_equity = self.last_equity = self.peak = float(equity)
+            return
+        if day is None:
+            self._commit(float(equity))
+            return
+        if self._pending is not None and self._pending[0] != day:
+            self._commit(self._pending[1])
+        self._pending = (day, float(equity))
+
+    def _commit(self, equity: float):
+        r = equity / self.last_equity - 1.0 if self.last_equity else 0.0
+        self.n += 1
+        delta = r - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (r - self.mean)
+        self.last_equity = equity
+        self.equity_sum += equity
+        if equity > self.peak:
+            self.peak = equity
+        elif self.peak > 0:
+            dd = 1.0 - equity / self.peak
+            if dd > self.max_dd:
+                self.max_dd = dd
+
+    def flush(self):
+        """Commit the pending same-day equity (end of run)."""
+        if self._pending is not None:
+            self._commit(self._pending[1])
+            self._pending = None
+
+    # ---- fills / round trips ----
+    def on_fill(self, symbol, qty: float, price: float, fee: float = 0.0):
+        qty, price, fee = float(qty), float(price), float(fee)
+        if qty == 0:
+            return
+        self.n_fills += 1
+        self.fees += fee
+        self.traded_value += abs(qty) * price
+
+        trip = self._trips.get(symbol)
+        if trip is None:
+            trip = self._trips[symbol] = _Trip()
+        trip.pnl -= fee
+
+        pos = trip.position
+        if pos == 0 or (pos > 0) == (qty > 0):
+            trip.position += qty
+            trip.cost += qty * price
+            return
+
+        # reducing / closing (and possibly flipping) the position
+        close = math.copysign(min(abs(qty), abs(pos)), qty)
+        avg = trip.cost / pos
+        trip.pnl += (avg - price) * close
+        trip.cost += avg * close
+        trip.position = pos + close
+        if abs(trip.position) < 1e-9:
+            self._close_trip(trip.pnl)
+            rest = qty - close
+            if rest:
+                trip.position, trip.cost, trip.pnl = rest, rest * price, 0.0
+            else:
+                del self._trips[symbol]
+
+    def _close_trip(self, pnl: float):
+        self.n_trades += 1
+        if pnl > 0:
+            self.n_wins += 1
+            self.win_sum += pnl
+        else:
+            self.loss_sum += pnl
+
+    # ---- output ----
+    def result(self) -> dict:
+        if self._pending is not None:
+            # fold the pending day into a copy, this engine keeps accepting same-day updates
+            snap = copy.copy(self)
+            snap.flush()
+            return snap.result()
+
+        n, mean, last, max_dd = self.n, self.mean, self.last_equity, self.max_dd
+        if self.initial_equity is None:
+            n, last = 0, 0.0
+        ppy = self.periods_per_year
+        sd = math.sqrt(self.m2 / (n - 1)) if n > 1 else 0.0
+        total = last / self.initial_equity - 1.0 if n and self.initial_equity else 0.0
+        years = n / ppy
+        if n and last > 0 and total > -1.0:
+            cagr = (last / self.initial_equity) ** (1.0 / years) - 1.0
+        else:
+            cagr = 0.0
+        mean_equity = self.equity_sum / n if n else 0.0
+        losses = self.n_trades - self.n_wins
+        return {
+            "cagr": cagr,
+            "sharpe": math.sqrt(ppy) * mean / sd if sd > 0 else 0.0,
+            "max_dd": max_dd,
+            "hit_ratio": self.n_wins / self.n_trades if self.n_trades else 0.0,
+            "avg_win": self.win_sum / self.n_wins if self.n_wins else 0.0,
+            "avg_loss": self.loss_sum / losses if losses else 0.0,
+            # one-way: half the traded notional per unit of mean equity, per year
+            "turnover": self.traded_value / 2.0 / mean_equity / years if years and mean_equity else 0.0,
+            "final_equity": last,
+            "total_return": total,
+            "volatility": sd * math.sqrt(ppy),
+            "n_days": n,
+            "n_fills": self.n_fills,
+            "n_trades": self.n_trades,
+            "fees": self.fees,
+        }
+
+
+def compute(equity, fills=(), initial_equity: float = None, periods_per_year: int = TRADING_DAYS) -> dict:
+    """
+    Batch mode over iterables (lists, arrays, generators, a streaming result parser):
+    - equity : daily equity values, or (day, equity) pairs
+    - fills  : (symbol, signed qty, price, fee) tuples
+    - initial_equity : starting equity; default = the first equity value (which is then not a return)
+    Fills only feed the trade counters, so their order relative to the equity stream does not matter.
+    """
+    engine = StreamingMetrics(initial_equity, periods_per_year)
+    for item in equity:
+        engine.on_equity(item[1] if isinstance(item, tuple) else item)
+    for symbol, qty, price, fee in fills:
+        engine.on_fill(symbol, qty, price, fee)
+    return engine.result()
+
+
+def format_metrics(metrics: dict) -> str:
+    """One log line with the standard set, e.g. for on_end_of_algorithm."""
+    m = metrics
+    return (f"CAGR={m['cagr']:.2%} Sharpe={m['sharpe']:.2f} MaxDD={m['max_dd']:.2%} "
+            f"HitRatio={m['hit_ratio']:.2%} AvgWin={m['avg_win']:.2f} AvgLoss={m['avg_loss']:.2f} "
+            f"Turnover={m['turnover']:.2f} Trades={m['n_trades']} Fees={m['fees']:.2f}")
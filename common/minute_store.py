@@ -0,0 +1,303 @@
+"""
+Memory-mapped minute-bar store built from Lean's zipped minute trade files.
+
+Source : {data}/equity/usa/minute/{ticker}/{YYYYMMDD}_trade.zip, one CSV per day with
+         ms-since-midnight (exchange time), open, high, low, close (deci-cents, x10000), volume
+Store  : {root}/{TICKER}/{YEAR}.json names the current build of a year, {root}/{TICKER}/{YEAR}.<id>/,
+         which holds one .npy per column
+         - time      : int64 minutes since 1970-01-01 in exchange time, bar START (end = time + 1)
+         - open/high/low/close : float64 prices,  volume : int64
+         - days      : datetime64[D] trading days in the year
+         - day_start : int64 row offsets, day i = rows [day_start[i], day_start[i + 1])
+         - sources.json : zip names + sizes + mtimes the year was built from
+Reader : MinuteStore opens the .npy files with mmap_mode="r"; day / range slices inside one year
+         are views, so parallel readers share the page-cached files instead of parsing zips per run.
+
+Conversion is per (ticker, year) across a process pool, and a year is only rebuilt when its
+source zips changed. A rebuild writes a new build folder and then replaces {YEAR}.json in one
+os.replace, so a reader always finds either the old or the new year, never a gap or a half-written
+one. Superseded builds are removed afterwards (open memory maps stay valid on POSIX; a reader that
+lost the race re-reads the pointer).
+
+CLI:
+    python -m common.minute_store ~/lean/data data/minute_store SPY NVDA TLT SPXL NVDL TMF --years 2023,2024
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+COLUMNS = ("time", "open", "high", "low", "close", "volume")
+PRICE_SCALE = 10000.0
+MS_PER_MINUTE = 60000
+
+
+def lean_minute_folder(data_root: str, ticker: str, market: str = "usa") -> str:
+    return os.path.join(data_root, "equity", market, "minute", ticker.lower())
+
+
+def _source_files(data_root: str, ticker: str, market: str = "usa") -> dict:
+    """{year: [(yyyymmdd, path), ...]} of the Lean minute trade zips for one ticker."""
+    by_year = {}
+    for path in glob.glob(os.path.join(lean_minute_folder(data_root, ticker, market), "*_trade.zip")):
+        stamp = os.path.basename(path)[:8]
+        if not stamp.isdigit():
+            continue
+        by_year.setdefault(int(stamp[:4]), []).append((stamp, path))
+    for files in by_year.values():
+        files.sort()
+    return by_year
+
+
+def _fingerprint(files: list) -> list:
+    out = []
+    for stamp, path in files:
+        st = os.stat(path)
+        out.append([os.path.basename(path), st.st_size, int(st.st_mtime)])
+    return out
+
+
+def read_lean_minute_zip(path: str, stamp: str):
+    """One Lean minute zip -> (time minutes since epoch, open, high, low, close, volume) arrays."""
+    with zipfile.ZipFile(path) as zf:
+        names = [n for n in zf.namelist() if n.endswith(".csv")]
+        if not names:
+            return None
+        raw = zf.read(names[0])
+    if not raw.strip():
+        return None
+    # all six fields are integers; one vectorized parse instead of a csv row loop
+    values = np.loadtxt(io.BytesIO(raw), delimiter=",", dtype=np.int64, ndmin=2)
+    if values.shape[1] < 6:
+        raise ValueError(f"{path}: expected 6 columns, got {values.shape[1]}")
+    day_minute = np.datetime64(f"{stamp[:4]}-{stamp[4:6]}-{stamp[6:8]}", "m").astype(np.int64)
+    time = day_minute + values[:, 0] // MS_PER_MINUTE
+    prices = values[:, 1:5] / PRICE_SCALE
+    return time, prices[:, 0], prices[:, 1], prices[:, 2], prices[:, 3], values[:, 5]
+
+
+def _pointer(year_path: str) -> str:
+    return year_path + ".json"
+
+
+def _current_build(year_path: str):
+    """Folder of the current build of a ticker-year ({TICKER}/{YEAR}), or None when not built."""
+    try:
+        with open(_pointer(year_path), "r", encoding="utf-8") as f:
+            name = json.load(f)["build"]
+    except FileNotFoundError:
+        return None
+    return os.path.join(os.path.dirname(year_path), name)
+
+
+def _write_year(year_path: str, files: list):
+    parts = [p for p in (read_lean_minute_zip(path, stamp) for stamp, path in files) if p is not None]
+    if parts:
+        cols = [np.concatenate(c) for c in zip(*parts)]
+    else:
+        cols = [np.empty(0, np.int64)] + [np.empty(0)] * 4 + [np.empty(0, np.int64)]
+    order = np.argsort(cols[0], kind="stable")
+    if np.any(order != np.arange(order.size)):
+        cols = [c[order] for c in cols]
+
+    day = (cols[0] // (24 * 60)).astype("datetime64[D]")
+    days, start = np.unique(day, return_index=True)
+    day_start = np.append(start, day.size).astype(np.int64)
+
+    parent, year = os.path.split(year_path)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".tmp_{year}.", dir=parent)
+    for name, col in zip(COLUMNS, cols):
+        np.save(os.path.join(tmp, f"{name}.npy"), col)
+    np.save(os.path.join(tmp, "days.npy"), days)
+    np.save(os.path.join(tmp, "day_start.npy"), day_start)
+    with open(os.path.join(tmp, "sources.json"), "w", encoding="utf-8") as f:
+        json.dump(_fingerprint(files), f)
+    build = os.path.join(parent, os.path.basename(tmp)[len(".tmp_"):])     # unique: {year}.<mkdtemp id>
+    os.rename(tmp, build)
+
+    # the pointer is the only thing swapped, and os.replace of a file is atomic
+    pointer_tmp = f"{_pointer(year_path)}.{os.getpid()}.tmp"
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        json.dump({"build": os.path.basename(build)}, f)
+    os.replace(pointer_tmp, _pointer(year_path))
+
+    # drop superseded builds: older than the current one (re-read, a concurrent writer may have won)
+    current = _current_build(year_path)
+    cutoff = os.path.getmtime(current)
+    for old in glob.glob(os.path.join(parent, f"{year}.*")):
+        if os.path.isdir(old) and old != current and os.path.getmtime(old) <= cutoff:
+            shutil.rmtree(old, ignore_errors=True)
+    return int(day.size)
+
+
+def _convert_one(task):
+    ticker, year, files, year_path = task
+    return ticker, year, _write_year(year_path, files)
+
+
+def convert(data_root: str, store_root: str, tickers, years=None, market: str = "usa",
+            workers: int = None, force: bool = False) -> dict:
+    """
+    Build / refresh the store for `tickers` (optionally only `years`).
+    Returns {(ticker, year): bars written}; unchanged years are skipped and not listed.
+    """
+    tasks = []
+    for ticker in tickers:
+        for year, files in sorted(_source_files(data_root, ticker, market).items()):
+            if years and year not in years:
+                continue
+            year_path = os.path.join(store_root, ticker.upper(), str(year))
+            if not force and _up_to_date(year_path, files):
+                continue
+            tasks.append((ticker.upper(), year, files, year_path))
+
+    done = {}
+    if not tasks:
+        return done
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers == 1:
+        results = map(_convert_one, tasks)
+        for ticker, year, n in results:
+            done[(ticker, year)] = n
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            for ticker, year, n in pool.map(_convert_one, tasks):
+                done[(ticker, year)] = n
+    return done
+
+
+def _up_to_date(year_path: str, files: list) -> bool:
+    folder = _current_build(year_path)
+    try:
+        with open(os.path.join(folder, "sources.json"), "r", encoding="utf-8") as f:
+            return json.load(f) == _fingerprint(files)
+    except (TypeError, FileNotFoundError):
+        return False
+
+
+class MinuteYear:
+    """Memory-mapped columns of one ticker-year (see module docstring for the layout)."""
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        for name in COLUMNS:
+            setattr(self, name, np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r"))
+        self.days = np.load(os.path.join(folder, "days.npy"))
+        self.day_start = np.load(os.path.join(folder, "day_start.npy"))
+
+    def __len__(self) -> int:
+        return int(self.time.shape[0])
+
+    def rows(self, start_day=None, end_day=None) -> slice:
+        """Row slice covering trading days in [start_day, end_day] (inclusive, None = open-ended)."""
+        lo = 0 if start_day is None else int(np.searchsorted(self.days, np.datetime64(start_day, "D"), "left"))
+        hi = self.days.size if end_day is None else int(np.searchsorted(self.days, np.datetime64(end_day, "D"), "right"))
+        return slice(int(self.day_start[lo]), int(self.day_start[hi]))
+
+    def columns(self, rows: slice = slice(None)) -> dict:
+        """{column: view} for a row slice; no data is copied or read until touched."""
+        return {name: getattr(self, name)[rows] for name in COLUMNS}
+
+
+class MinuteStore:
+    """Read side of the store; ticker-years are opened lazily and kept open (mmap)."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._years = {}
+
+    def tickers(self) -> list:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root)
+                      if not d.startswith(".") and os.path.isdir(os.path.join(self.root, d)))
+
+    def years(self, ticker: str) -> list:
+        folder = os.path.join(self.root, ticker.upper())
+        if not os.path.isdir(folder):
+            return []
+        return sorted(int(f[:-5]) for f in os.listdir(folder) if f.endswith(".json") and f[:-5].isdigit())
+
+    def build(self, ticker: str, year: int):
+        """Name of the current build folder of a ticker-year (changes on every rebuild), or None."""
+        folder = _current_build(os.path.join(self.root, ticker.upper(), str(int(year))))
+        return None if folder is None else os.path.basename(folder)
+
+    def year(self, ticker: str, year: int) -> MinuteYear:
+        key = (ticker.upper(), int(year))
+        if key not in self._years:
+            year_path = os.path.join(self.root, key[0], str(key[1]))
+            for _ in range(3):
+                folder = _current_build(year_path)
+                if folder is None:
+                    raise KeyError(f"{key[0]} {key[1]} not in minute store {self.root}")
+                try:
+                    self._years[key] = MinuteYear(folder)
+                    break
+                except FileNotFoundError:
+                    continue        # superseded between reading the pointer and opening it
+            else:
+                raise KeyError(f"{key[0]} {key[1]} kept changing while being opened from {self.root}")
+        return self._years[key]
+
+    def day(self, ticker: str, day) -> dict:
+        """Columns of one trading day (views); empty arrays if the day has no bars."""
+        d = np.datetime64(day, "D")
+        y = self.year(ticker, int(str(d)[:4]))
+        return y.columns(y.rows(d, d))
+
+    def bars(self, ticker: str, start=None, end=None) -> dict:
+        """
+        Columns for trading days in [start, end] (inclusive dates, None = all stored).
+        Views when the range falls inside one year; a range across years concatenates (copies).
+        """
+        years = self.years(ticker)
+        if start is not None:
+            years = [y for y in years if y >= int(str(np.datetime64(start, "D"))[:4])]
+        if end is not None:
+            years = [y for y in years if y <= int(str(np.datetime64(end, "D"))[:4])]
+        parts = []
+        for y in years:
+            my = self.year(ticker, y)
+            parts.append(my.columns(my.rows(start, end)))
+        if not parts:
+            return {name: np.empty(0, np.int64 if name in ("time", "volume") else np.float64) for name in COLUMNS}
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+
+
+def end_times(time_minutes: np.ndarray) -> np.ndarray:
+    """Stored bar start minutes -> datetime64[m] bar end times (what Lean stamps on a TradeBar)."""
+    return (np.asarray(time_minutes, dtype=np.int64) + 1).astype("datetime64[m]")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Convert Lean zipped minute trade files into a memory-mapped store.")
+    ap.add_argument("data", help="Lean data folder (contains equity/usa/minute/<ticker>/)")
+    ap.add_argument("store", help="output store folder")
+    ap.add_argument("tickers", nargs="+")
+    ap.add_argument("--years", default=None, help="comma list, default: every year found")
+    ap.add_argument("--market", default="usa")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--force", action="store_true", help="rebuild years whose sources did not change")
+    args = ap.parse_args(argv)
+
+    years = {int(y) for y in args.years.split(",")} if args.years else None
+    done = convert(args.data, args.store, args.tickers, years, args.market, args.workers, args.force)
+    for (ticker, year), n in sorted(done.items()):
+        print(f"[minute_store] {ticker} {year}: {n} bars")
+    print(f"[minute_store] {len(done)} ticker-year(s) written to {args.store}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Low-overhead run profiler for the algorithms (copy next to the algorithm as profiling.py).
+
+- Timers    : @profiled("name") on algorithm methods (on_data, scheduled events, universe selection)
+              records each call's wall time into a log2-bucket latency histogram (O(1), no per-call storage)
+- Counters  : profiler.add("orders") next to order calls, profiler.history(df) after history requests
+              (calls + rows returned)
+- Per call  : counters named in @profiled(..., per_call=("orders",)) are also histogrammed per call,
+              e.g. orders submitted per on_data bar
+- Report    : profiler.report() -> compact lines for self.log at on_end_of_algorithm, to_dict() for files
+
+The decorated method looks the profiler up on `self.profiler`, so it must be created in initialize()
+before the first callback. With `enabled=False` the timers cost one attribute check per call.
+"""
+import functools
+import time
+
+_BUCKETS = 40       # bucket i holds values in [2^(i-1), 2^i) base units (us for timers)
+
+
+class Histogram:
+    """Count / total / max plus log2 buckets; quantiles are reported as bucket upper bounds."""
+    __slots__ = ("n", "total", "max", "buckets")
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * _BUCKETS
+
+    def add(self, value: float, unit: float = 1.0):
+        self.n += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        i = int(value / unit).bit_length()
+        self.buckets[i if i < _BUCKETS else _BUCKETS - 1] += 1
+
+    def quantile(self, q: float, unit: float = 1.0) -> float:
+        if not self.n:
+            return 0.0
+        rank = q * self.n
+        seen = 0
+        for i, c in enumerate(self.buckets):
+            seen += c
+            if seen >= rank:
+                return min(float(2 ** i) * unit, self.max)
+        return self.max
+
+    def to_dict(self, unit: float = 1.0) -> dict:
+        return {"n": self.n, "total": self.total, "mean": self.total / self.n if self.n else 0.0,
+                "p50": self.quantile(0.5, unit), "p99": self.quantile(0.99, unit), "max": self.max}
+
+
+class RunProfiler:
+    """Timers, counters and value histograms for one backtest run."""
+
+    def __init__(self, enabled: bool = True, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self.started = clock()
+        self.timers: dict[str, Histogram] = {}
+        self.values: dict[str, Histogram] = {}
+        self.counters: dict[str, int] = {}
+
+    # ---- recording ----
+    def record(self, name: str, seconds: float):
+        h = self.timers.get(name)
+        if h is None:
+            h = self.timers[name] = Histogram()
+        h.add(seconds, 1e-6)
+
+    def add(self, name: str, n: int = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, value: float):
+        if self.enabled:
+            h = self.values.get(name)
+            if h is None:
+                h = self.values[name] = Histogram()
+            h.add(value)
+
+    def history(self, frame):
+        """Count one history() request and the rows it returned (frame may be None / empty)."""
+        rows = 0 if frame is None else len(frame)
+        self.add("history_calls")
+        self.add("history_rows", rows)
+        self.observe("history_rows/call", rows)
+        return frame
+
+    def section(self, name: str):
+        """Context manager timer for a block that is not its own method."""
+        return _Section(self, name)
+
+    # ---- output ----
+    def to_dict(self) -> dict:
+        return {"wall": self.clock() - self.started,
+                "timers": {k: h.to_dict(1e-6) for k, h in self.timers.items()},
+                "values": {k: h.to_dict() for k, h in self.values.items()},
+                "counters": dict(self.counters)}
+
+    def report(self) -> list:
+        """Compact report lines, slowest timer first."""
+        wall = self.clock() - self.started
+        lines = [f"[profile] wall={wall:.2f}s"]
+        for name, h in sorted(self.timers.items(), key=lambda kv: -kv[1].total):
+            share = h.total / wall if wall > 0 else 0.0
+            lines.append(f"[profile] {name:<28} n={h.n:<8} total={h.total:.3f}s ({share:.0%}) "
+                         f"mean={_us(h.total / h.n)} p50<={_us(h.quantile(0.5, 1e-6))} "
+                         f"p99<={_us(h.quantile(0.99, 1e-6))} max={_us(h.max)}")
+        for name, h in sorted(self.values.items()):
+            lines.append(f"[profile] {name:<28} n={h.n:<8} mean={h.total / h.n:.2f} "
+                         f"p99<={h.quantile(0.99):.0f} max={h.max:.0f}")
+        if self.counters:
+            lines.append("[profile] " + " ".join(f"{k}={v}" for k, v in sorted(self.counters.items())))
+        return lines
+
+
+class _Section:
+    __slots__ = ("prof", "name", "t0")
+
+    def __init__(self, prof: RunProfiler, name: str):
+        self.prof = prof
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = self.prof.clock()
+        return self
+
+    def __exit__(self, *exc):
+        if self.prof.enabled:
+            self.prof.record(self.name, self.prof.clock() - self.t0)
+
+
+def _us(seconds: float) -> str:
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.0f}us"
+
+
+def profiled(name: str = None, per_call: tuple = ()):
+    """
+    Method decorator: time every call into `self.profiler` under `name` (default: method name).
+    per_call: counters whose increase during the call is histogrammed as "<counter>/<name>".
+    """
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            prof = self.profiler
+            if not prof.enabled:
+                return fn(self, *args, **kwargs)
+            counters = prof.counters
+            before = [counters.get(c, 0) for c in per_call]
+            t0 = prof.clock()
+            try:
+                return fn(self, *args, **kwargs)
+            finally:
+                prof.record(label, prof.clock() - t0)
+                for c, b in zip(per_call, before):
+                    prof.observe(f"{c}/{label}", counters.get(c, 0) - b)
+        return wrapper
+    return decorate
@@ -0,0 +1,288 @@
+"""
+Process-pool parameter sweeps with a resumable on-disk result store.
+
+- Grid     : {knob: [values]} over the same names the algorithms read via get_parameter
+- Fan-out  : multiprocessing.Pool(imap_unordered) across all cores, evaluator built once per worker
+- Store    : append-only JSON Lines, one row per finished combination, flushed as it lands;
+             a killed sweep re-reads the store and only runs the missing combinations. The first row
+             records the run-level context (data, date range, version, cash, ...); resuming with a
+             different context is refused instead of mixing results of different setups
+- Export   : write_summary_csv() flattens the store into the summary CSV kept under results/
+
+Evaluators are plain callables `params -> dict of metrics`:
+- offline : e.g. `Leveraged ETF Intraday Strategy/sweep_intraday.py` (NumPy replay)
+- Lean    : LeanBacktest(project) shells out to `lean backtest --parameter ...` (any strategy)
+
+CLI (Lean evaluator):
+    python -m common.sweep GapBreakoutVolumeWithYesterdayRSI results/sweep.jsonl \
+        --grid lookback_days=10,20,30 --grid holding_days=5,10 --workers 4
+"""
+import argparse
+import csv
+import glob
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+from common.lean_results import read_statistics
+
+# knobs each strategy reads through get_parameter (used to validate grids)
+STRATEGY_KNOBS = {
+    "LeveragedETFIntradayV1": ("entry", "sl", "tp", "target_pct", "eod_liq", "profile"),
+    "LeveragedETFIntradayV2": ("entry", "sl", "tp", "target_pct", "eod_liq", "profile"),
+    "LeveragedETFIntradayMulti": ("version", "entry", "sl", "tp", "target_pct", "eod_liq", "profile",
+                                  "pairs", "pairs_key"),
+    "GapBreakoutVolumeWithYesterdayRSI": ("lookback_days", "volume_ma_days", "holding_days",
+                                          "rsi_period", "universe_count", "max_positions", "min_price",
+                                          "symbol_grace_days", "max_symbol_data", "profile"),
+}
+
+
+def expand_grid(grid: dict) -> list:
+    """{name: [v1, v2], ...} -> [{name: v1, ...}, ...] in deterministic (itertools.product) order."""
+    names = sorted(grid)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(grid[n] for n in names))]
+
+
+def param_key(params: dict) -> str:
+    """Canonical, order-independent identity of a parameter combination."""
+    return json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def check_knobs(strategy: str, grid: dict):
+    known = STRATEGY_KNOBS.get(strategy)
+    if known is None:
+        return
+    unknown = sorted(set(grid) - set(known))
+    if unknown:
+        raise ValueError(f"{strategy} does not read parameter(s) {unknown}; known: {list(known)}")
+
+
+class ResultStore:
+    """
+    Append-only JSON Lines store: {"key": ..., "params": {...}, "metrics": {...}, "error": ..., "elapsed": s}.
+    A truncated last line (process killed mid-write) is ignored on load and recomputed.
+    With `context` (run-level settings that are not grid knobs) the store starts with a
+    {"context": {...}} row; opening it again with a different context raises ValueError.
+    """
+
+    def __init__(self, path: str, context: dict = None):
+        self.path = path
+        self.rows: dict[str, dict] = {}
+        self.context = None
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "context" in row and "key" not in row:
+                        self.context = row["context"]
+                    else:
+                        self.rows[row["key"]] = row
+        if context is not None:
+            context = json.loads(json.dumps(context, default=str))     # compare as stored
+            if self.context is None and self.rows:
+                raise ValueError(f"{path} has results but no recorded context; use a new store")
+            if self.context is not None and self.context != context:
+                raise ValueError(f"{path} was written for {self.context}, not {context}; use a new store")
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self._fh = open(path, "a", encoding="utf-8")
+        if context is not None and self.context is None:
+            self.context = context
+            self._fh.write(json.dumps({"context": context}) + "\n")
+            self._fh.flush()
+
+    def __contains__(self, key: str) -> bool:
+        row = self.rows.get(key)
+        return row is not None and row.get("error") is None
+
+    def append(self, row: dict):
+        self.rows[row["key"]] = row
+        self._fh.write(json.dumps(row, default=str) + "\n")
+        self._fh.flush()
+
+    def close(self):
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---- worker side ----
+_evaluator = None
+
+
+def _init_worker(factory, factory_args):
+    global _evaluator
+    _evaluator = factory(*factory_args)
+
+
+def _run_one(params: dict) -> dict:
+    t0 = time.perf_counter()
+    row = {"key": param_key(params), "params": params, "metrics": None, "error": None}
+    try:
+        row["metrics"] = _evaluator(params)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["elapsed"] = round(time.perf_counter() - t0, 6)
+    return row
+
+
+def run_sweep(grid: dict, store_path: str, factory, factory_args: tuple = (),
+              workers: int = None, chunksize: int = None, progress_every: int = 100,
+              context: dict = None) -> ResultStore:
+    """
+    Evaluate every combination of `grid` not yet in `store_path`.
+
+    factory(*factory_args) is called once per worker process and must return the evaluator
+    callable; heavy state (bars, grids) is loaded there instead of being pickled per task.
+    Failed combinations are recorded with their error and retried on the next run.
+    context: run-level settings the results depend on besides the grid (see ResultStore).
+    """
+    combos = expand_grid(grid)
+    with ResultStore(store_path, context) as store:
+        pending = [p for p in combos if param_key(p) not in store]
+        print(f"[sweep] {len(combos)} combinations, {len(combos) - len(pending)} already stored, "
+              f"{len(pending)} to run")
+        if not pending:
+            return store
+
+        workers = workers or os.cpu_count() or 1
+        chunksize = chunksize or max(1, min(64, len(pending) // (workers * 8)))
+        t0 = time.perf_counter()
+        if workers == 1:
+            _init_worker(factory, factory_args)
+            results = map(_run_one, pending)
+            pool = None
+        else:
+            pool = Pool(workers, initializer=_init_worker, initargs=(factory, factory_args))
+            results = pool.imap_unordered(_run_one, pending, chunksize)
+        try:
+            for done, row in enumerate(results, 1):
+                store.append(row)
+                if row["error"] is not None:
+                    print(f"[sweep] {row['key']} failed: {row['error']}")
+                if done % progress_every == 0 or done == len(pending):
+                    rate = done / max(1e-9, time.perf_counter() - t0)
+                    print(f"[sweep] {done}/{len(pending)} done ({rate:.1f}/s)")
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return store
+
+
+def _metric_number(value):
+    """A metric as float: plain numbers, or strings like "1.5", "-12.3%", "$1,234.50"; None otherwise."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.strip().replace(",", "").replace("$", "").rstrip("%").strip()
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number        # NaN sorts with the unparsable rows
+
+
+def write_summary_csv(store_path: str, csv_path: str, sort_by: str = None, descending: bool = True) -> int:
+    """Flatten a result store into one CSV row per successful combination; returns the row count."""
+    store = ResultStore(store_path)
+    store.close()
+    rows = [r for r in store.rows.values() if r.get("error") is None and r.get("metrics")]
+    if sort_by:
+        # Lean statistics are strings ("12.3%", "$1,234"): sort on their number, unparsable rows last
+        keyed = [(_metric_number(r["metrics"].get(sort_by)), r) for r in rows]
+        ranked = sorted((kr for kr in keyed if kr[0] is not None), key=lambda kr: kr[0], reverse=descending)
+        rows = [r for _, r in ranked] + [r for v, r in keyed if v is None]
+    param_cols = sorted({k for r in rows for k in r["params"]})
+    metric_cols = sorted({k for r in rows for k in r["metrics"]})
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(param_cols + metric_cols)
+        for r in rows:
+            w.writerow([r["params"].get(c) for c in param_cols] + [r["metrics"].get(c) for c in metric_cols])
+    return len(rows)
+
+
+# ---- Lean CLI evaluator ----
+class LeanBacktest:
+    """
+    Evaluator that runs `lean backtest <project> --parameter k v ...` and returns the
+    run's `statistics` block. Works for any strategy folder set up as a Lean CLI project.
+    """
+
+    def __init__(self, project: str, lean: str = "lean", extra_args: tuple = ()):
+        self.project = project
+        self.lean = lean
+        self.extra_args = tuple(extra_args)
+
+    def __call__(self, params: dict) -> dict:
+        with tempfile.TemporaryDirectory(prefix="sweep_") as out:
+            cmd = [self.lean, "backtest", self.project, "--output", out, *self.extra_args]
+            for name, value in params.items():
+                cmd += ["--parameter", name, str(value).lower() if isinstance(value, bool) else str(value)]
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+            if proc.returncode != 0:
+                tail = (proc.stderr or proc.stdout).strip().splitlines()[-1:] or [""]
+                raise RuntimeError(f"lean exited with {proc.returncode}: {tail[0]}")
+            return self._read_statistics(out)
+
+    @staticmethod
+    def _read_statistics(folder: str) -> dict:
+        for path in sorted(glob.glob(os.path.join(folder, "*.json")), key=os.path.getsize):
+            if path.endswith(("config.json", "-log.json")):
+                continue
+            stats = read_statistics(path)     # streamed: orders / charts are skipped, not loaded
+            if stats is not None:
+                return dict(stats)
+        raise FileNotFoundError(f"no backtest result with statistics in {folder}")
+
+
+def _make_lean_evaluator(project: str, lean: str):
+    return LeanBacktest(project, lean)
+
+
+def _parse_grid(items: list) -> dict:
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if not values:
+            raise ValueError(f"--grid expects name=v1,v2,...; got {item!r}")
+        grid[name.strip()] = [v.strip() for v in values.split(",") if v.strip()]
+    return grid
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run a Lean CLI parameter sweep with a resumable result store.")
+    ap.add_argument("project", help="Lean CLI project folder (e.g. GapBreakoutVolumeWithYesterdayRSI)")
+    ap.add_argument("store", help="JSON Lines result store (created or resumed)")
+    ap.add_argument("--grid", action="append", default=[], help="name=v1,v2,... (repeatable)")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--lean", default="lean", help="lean executable")
+    ap.add_argument("--csv", default=None, help="also write a summary CSV here")
+    ap.add_argument("--sort-by", default=None, help="statistic to sort the summary CSV by")
+    args = ap.parse_args(argv)
+
+    grid = _parse_grid(args.grid)
+    check_knobs(os.path.basename(os.path.normpath(args.project)), grid)
+    run_sweep(grid, args.store, _make_lean_evaluator, (args.project, args.lean), workers=args.workers,
+              context={"evaluator": "lean", "project": os.path.abspath(args.project)})
+    if args.csv:
+        n = write_summary_csv(args.store, args.csv, sort_by=args.sort_by)
+        print(f"[sweep] wrote {n} rows to {args.csv}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""Make common/ and the strategy folders importable the way their scripts import each other."""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, "QQQ_sentiment_signal_analysis"),
+             os.path.join(REPO_ROOT, "Leveraged ETF Intraday Strategy")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
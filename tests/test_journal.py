@@ -0,0 +1,55 @@
+import os
+from datetime import datetime, timedelta
+
+from common.journal import ObjectStoreSink, TradeJournal, read_journal
+
+
+class _ObjectStore(dict):
+    def __init__(self):
+        super().__init__()
+        self.saves = 0
+
+    def save(self, key: str, text: str):
+        self.saves += 1
+        self[key] = text
+
+
+def _run(max_bytes: int, days: int = 30):
+    store = _ObjectStore()
+    journal = TradeJournal(ObjectStoreSink(store, "journal/algo/1", max_bytes), capacity=16)
+    start = datetime(2024, 1, 2, 9, 31)
+    for d in range(days):
+        for i in range(40):
+            t = start + timedelta(days=d, minutes=i)
+            journal.fill(t, "SPY", i + 1, 100.5, 0.35, i)
+            journal.event(t, "SPY", "entry", 1.0)
+    journal.flush()
+    return store
+
+
+def _download(store: dict, folder) -> str:
+    for key, text in store.items():
+        path = os.path.join(folder, *key.split("/")[3:])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return str(folder)
+
+
+def test_object_store_sink_saves_one_key_per_table(tmp_path):
+    store = _run(max_bytes=8 << 20)
+    assert sorted(store) == ["journal/algo/1/events/000.csv", "journal/algo/1/fills/000.csv"]
+    assert store.saves == 2
+    fills = read_journal(_download(store, tmp_path))
+    assert len(fills["qty"]) == 30 * 40
+    assert list(fills["qty"][:3]) == [1.0, 2.0, 3.0]
+
+
+def test_object_store_sink_rolls_over_at_size_cap(tmp_path):
+    store = _run(max_bytes=2000)
+    fill_keys = sorted(k for k in store if "/fills/" in k)
+    assert len(fill_keys) > 1
+    assert fill_keys[-1] == f"journal/algo/1/fills/{len(fill_keys) - 1:03d}.csv"
+    folder = _download(store, tmp_path)
+    assert len(read_journal(folder)["qty"]) == 30 * 40
+    assert len(read_journal(folder, "events")["kind"]) == 30 * 40
@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+
+from common.lean_results import JsonStream, ResultExtractor, _iso, read_statistics
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SAMPLES = ("lean_result_camel.json", "lean_result_pascal.json")
+CHUNKS = (1, 7, 64, 1 << 20)     # 1 and 7 split every string, escape and number across reads
+
+
+def _load(name: str) -> dict:
+    with open(os.path.join(DATA, name), "r", encoding="utf-8-sig") as f:
+        return json.load(f)
+
+
+def _stream(name: str, chunk: int) -> JsonStream:
+    with open(os.path.join(DATA, name), "r", encoding="utf-8-sig") as f:
+        return JsonStream(io.StringIO(f.read()), chunk)
+
+
+def _rebuild(js: JsonStream):
+    """Walk every container with items() / elements() and decode only the leaves."""
+    ch = js.peek()
+    if ch == "{":
+        return {key: _rebuild(js) for key in js.items()}
+    if ch == "[":
+        return [_rebuild(js) for _ in js.elements()]
+    return js.value()
+
+
+def _get(d: dict, name: str, default=None):
+    return d.get(name, d.get(name[0].upper() + name[1:], default))
+
+
+def _rows(path: str) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))[1:]
+
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+@pytest.mark.parametrize("name", SAMPLES)
+def test_stream_rebuilds_document(name, chunk):
+    assert _rebuild(_stream(name, chunk)) == _load(name)
+
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+@pytest.mark.parametrize("name", SAMPLES)
+def test_skip_lands_on_next_key(name, chunk):
+    doc = _load(name)
+    for wanted in doc:
+        js = _stream(name, chunk)
+        found = None
+        for key in js.items():
+            if key == wanted:
+                found = js.value()
+            else:
+                js.skip()
+        assert found == doc[wanted], wanted
+
+
+@pytest.mark.parametrize("name", SAMPLES)
+def test_read_statistics(name):
+    assert read_statistics(os.path.join(DATA, name)) == _get(_load(name), "statistics")
+
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+@pytest.mark.parametrize("name", SAMPLES)
+def test_extractor_matches_json_load(tmp_path, name, chunk):
+    doc = _load(name)
+    summary = ResultExtractor(str(tmp_path), "r").run(os.path.join(DATA, name), chunk)
+
+    equity = _get(_get(_get(_get(doc, "charts"), "Strategy Equity"), "series"), "Equity")
+    points = [p if isinstance(p, list) else [p["x"], p["y"]] for p in _get(equity, "values")]
+    assert [(t, float(e)) for t, e in _rows(tmp_path / "r_equity.csv")] == [(_iso(p[0]), float(p[-1])) for p in points]
+
+    orders = list(_get(doc, "orders").values())
+    got = _rows(tmp_path / "r_orders.csv")
+    assert [int(r[0]) for r in got] == [_get(o, "id") for o in orders]
+    assert [r[2] for r in got] == [_get(_get(o, "symbol"), "value") for o in orders]
+    assert [float(r[6]) for r in got] == [_get(o, "quantity") for o in orders]
+    assert [r[8] for r in got] == [_get(o, "tag") for o in orders]
+
+    events = [e for e in _get(doc, "orderEvents", [])
+              if e["status"].lower() in ("filled", "partiallyfilled") and e["fillQuantity"]]
+    fills = [(_iso(e["time"]), str(e["orderId"]), e["symbolValue"], e["fillQuantity"], e["fillPrice"],
+              e.get("orderFeeAmount", 0.0)) for e in events]
+    got = [(r[0], r[1], r[2], float(r[3]), float(r[4]), float(r[5])) for r in _rows(tmp_path / "r_fills.csv")] \
+        if events else []
+    assert got == fills
+
+    assert summary["statistics"] == _get(doc, "statistics")
+    assert summary["runtimeStatistics"] == _get(doc, "runtimeStatistics")
+    n_filled_orders = sum(_get(o, "status") == 3 for o in orders)
+    assert summary["counts"] == {"equity": len(points), "orders": len(orders), "fills": len(fills),
+                                 "trades": len(fills) or n_filled_orders}
+    with open(tmp_path / "r_statistics.json", encoding="utf-8") as f:
+        assert json.load(f)["statistics"] == summary["statistics"]
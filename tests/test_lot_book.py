@@ -0,0 +1,64 @@
+import os
+import random
+
+import pytest
+
+from benchmarks.engine import REPO_ROOT, load_algorithm
+
+LotBook = load_algorithm(os.path.join(REPO_ROOT, "Leveraged ETF Intraday Strategy", "LeveragedETFIntradayV1.py"),
+                         "LotBook")
+SL, TP = 0.993, 1.015
+
+
+def _book_lots(book) -> list:
+    return sorted((book.entry[i], book.qty[i]) for i in range(len(book.entry)) if book.qty[i] != 0.0)
+
+
+def _pop_reference(lots: list, px: float):
+    stopped = [lot for lot in lots if px <= lot[0] * SL]
+    taken = [lot for lot in lots if px >= lot[0] * TP]
+    lots[:] = [lot for lot in lots if lot not in stopped and lot not in taken]
+    return sum(q for _, q in stopped + taken), len(stopped), len(taken)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pop_crossed_matches_lot_list(seed):
+    rng = random.Random(seed)
+    book, lots = LotBook(SL, TP), []
+    px = 100.0
+    for step in range(3000):
+        px *= 1.0 + rng.gauss(0.0, 0.004)
+        if rng.random() < 0.4:
+            lot = (round(px * rng.uniform(0.995, 1.005), 4), float(rng.choice([-1, 1]) * rng.randint(1, 500)))
+            book.add(*lot)
+            lots.append(lot)
+        total, n_sl, n_tp = book.pop_crossed(px)
+        ref_total, ref_sl, ref_tp = _pop_reference(lots, px)
+        assert (n_sl, n_tp) == (ref_sl, ref_tp), step
+        assert total == pytest.approx(ref_total, abs=1e-9), step
+        assert len(book) == len(lots)
+        if step % 500 == 499:
+            book._compact()
+            assert _book_lots(book) == sorted(lots)
+            assert len(book.stops) == len(book.targets) == len(lots)
+    # compaction ran on its own too: the heaps never hold much more than the live lots
+    assert len(book.stops) + len(book.targets) <= 4 * len(book) + 64
+
+
+def test_compact_and_clear_keep_state_consistent():
+    book = LotBook(SL, TP)
+    for k in range(200):
+        book.add(100.0 + k * 0.01, 10.0)
+    top = 100.0 + 199 * 0.01
+    assert book.pop_crossed(top * SL) == (10.0, 1, 0)     # only the highest entry's stop is crossed
+    book._compact()
+    assert len(book) == 199 and len(book.stops) == len(book.targets) == 199
+    assert book.pop_crossed(top * TP) == (199 * 10.0, 0, 199)
+    assert len(book) == 0 and _book_lots(book) == []
+
+    book.add(50.0, 3.0)
+    book.clear()
+    assert len(book) == 0 and not book.stops and not book.targets and not book.free
+    assert book.pop_crossed(1.0) == (0.0, 0, 0)
+    assert book.add(80.0, 5.0) == 0
+    assert book.pop_crossed(80.0 * TP) == (5.0, 0, 1)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from common.metrics import StreamingMetrics, compute
+
+INITIAL = 100000.0
+EQUITY = [100500.0, 99800.0, 101200.0, 100900.0, 98700.0, 99900.0, 102300.0, 101800.0, 103100.0, 102950.0]
+FILLS = [
+    ("A", 10, 100.0, 1.0), ("A", -10, 110.0, 1.0),                          # win: 100 - 2 fees
+    ("B", 5, 50.0, 1.0), ("B", 5, 60.0, 1.0),                               # avg cost 55
+    ("B", -4, 50.0, 1.0), ("B", -6, 70.0, 1.0),                             # win: -20 + 90 - 4 fees
+    ("C", -10, 20.0, 1.0), ("C", 15, 25.0, 1.0),                            # short closed by a flip: -50 - 2
+    ("C", -5, 24.0, 1.0),                                                   # the flipped long: -5 - 1
+]
+
+
+def _reference(equity: list) -> dict:
+    e = np.array(equity)
+    prev = np.concatenate(([INITIAL], e[:-1]))
+    r = e / prev - 1.0
+    peak = np.maximum.accumulate(np.concatenate(([INITIAL], e)))[1:]
+    years = e.size / 252
+    notional = sum(abs(q) * p for _, q, p, _ in FILLS)
+    return {
+        "sharpe": np.sqrt(252) * r.mean() / r.std(ddof=1),
+        "volatility": r.std(ddof=1) * np.sqrt(252),
+        "max_dd": float(np.max(1.0 - e / peak)),
+        "cagr": (e[-1] / INITIAL) ** (1.0 / years) - 1.0,
+        "total_return": e[-1] / INITIAL - 1.0,
+        "turnover": notional / 2.0 / e.mean() / years,
+        "final_equity": e[-1],
+        "n_days": e.size,
+    }
+
+
+def _check(m: dict, equity: list):
+    for name, value in _reference(equity).items():
+        assert m[name] == pytest.approx(value, rel=1e-12), name
+    assert (m["n_trades"], m["hit_ratio"]) == (4, 0.5)
+    assert m["avg_win"] == pytest.approx((98.0 + 66.0) / 2)
+    assert m["avg_loss"] == pytest.approx((-52.0 - 6.0) / 2)
+    assert (m["n_fills"], m["fees"]) == (len(FILLS), len(FILLS) * 1.0)
+
+
+def test_streaming_matches_numpy():
+    engine = StreamingMetrics(INITIAL)
+    for value in EQUITY:
+        engine.on_equity(value)
+    for fill in FILLS:
+        engine.on_fill(*fill)
+    _check(engine.result(), EQUITY)
+    _check(compute(EQUITY, FILLS, INITIAL), EQUITY)
+    _check(compute([INITIAL] + EQUITY, FILLS), EQUITY)      # first value as the starting equity
+
+
+def test_same_day_updates_and_pending_result():
+    engine = StreamingMetrics(INITIAL)
+    for fill in FILLS:
+        engine.on_fill(*fill)
+    for day, value in enumerate(EQUITY[:-1]):
+        engine.on_equity(value * 0.9, day)          # intraday marks, overwritten by the close
+        engine.on_equity(value, day)
+    # the last day is still pending: result() includes it without committing it
+    engine.on_equity(50000.0, len(EQUITY) - 1)
+    _check(engine.result(), EQUITY[:-1] + [50000.0])
+    engine.on_equity(EQUITY[-1], len(EQUITY) - 1)
+    _check(engine.result(), EQUITY)
+    assert engine.n == len(EQUITY) - 1 and engine.max_dd < 0.5
+    engine.flush()
+    assert engine.n == len(EQUITY)
+    _check(engine.result(), EQUITY)
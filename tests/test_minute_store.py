@@ -0,0 +1,103 @@
+import os
+import zipfile
+
+import numpy as np
+
+from common.minute_store import MinuteStore, convert
+from replay import SessionGrid
+from sweep_intraday import load_grid, store_grid
+
+DAYS = ("20231228", "20231229", "20240102", "20240103")
+OPEN_MS = (9 * 60 + 30) * 60000
+
+
+def _write_zip(data_root: str, ticker: str, stamp: str, n: int, base: float):
+    folder = os.path.join(data_root, "equity", "usa", "minute", ticker.lower())
+    os.makedirs(folder, exist_ok=True)
+    rows = [f"{OPEN_MS + i * 60000},{int((base + i) * 10000)},{int((base + i + 0.5) * 10000)},"
+            f"{int((base + i - 0.5) * 10000)},{int((base + i + 0.25) * 10000)},{100 + i}" for i in range(n)]
+    with zipfile.ZipFile(os.path.join(folder, f"{stamp}_trade.zip"), "w") as zf:
+        zf.writestr(f"{stamp}_{ticker.lower()}_minute_trade.csv", "\n".join(rows) + "\n")
+
+
+def _lean_data(root: str, bars: int = 5) -> str:
+    data = os.path.join(root, "data")
+    for k, stamp in enumerate(DAYS):
+        _write_zip(data, "SPY", stamp, bars, 100.0 + 10 * k)
+        _write_zip(data, "SPXL", stamp, bars, 50.0 + 10 * k)
+    return data
+
+
+def test_convert_skips_unchanged_years(tmp_path):
+    data, store = _lean_data(str(tmp_path)), str(tmp_path / "store")
+    done = convert(data, store, ["SPY", "SPXL"], workers=1)
+    assert done == {("SPY", 2023): 10, ("SPY", 2024): 10, ("SPXL", 2023): 10, ("SPXL", 2024): 10}
+    assert convert(data, store, ["SPY", "SPXL"], workers=1) == {}
+
+    # a changed source zip rebuilds only its ticker-year and leaves one build folder behind
+    before = MinuteStore(store).build("SPY", 2024)
+    _write_zip(data, "SPY", "20240103", 7, 200.0)
+    os.utime(os.path.join(data, "equity", "usa", "minute", "spy", "20240103_trade.zip"), (1, 1))
+    assert convert(data, store, ["SPY", "SPXL"], workers=1) == {("SPY", 2024): 12}
+    after = MinuteStore(store).build("SPY", 2024)
+    assert after != before
+    assert sorted(d for d in os.listdir(os.path.join(store, "SPY")) if d.startswith("2024")) == sorted([after, "2024.json"])
+
+
+def test_bars_and_day_slicing(tmp_path):
+    data, store = _lean_data(str(tmp_path)), str(tmp_path / "store")
+    convert(data, store, ["SPY"], workers=1)
+    ms = MinuteStore(store)
+    assert ms.tickers() == ["SPY"] and ms.years("SPY") == [2023, 2024]
+
+    day = ms.day("SPY", "2023-12-29")
+    np.testing.assert_allclose(day["open"], 110.0 + np.arange(5))
+    np.testing.assert_allclose(day["close"], 110.25 + np.arange(5))
+    np.testing.assert_array_equal(day["volume"], 100 + np.arange(5))
+    start = np.datetime64("2023-12-29T09:30", "m").astype(np.int64)
+    np.testing.assert_array_equal(day["time"], start + np.arange(5))
+    assert ms.day("SPY", "2023-12-30")["time"].size == 0
+
+    inside = ms.bars("SPY", "2023-12-29", "2023-12-31")
+    year = ms.year("SPY", 2023)
+    assert np.shares_memory(inside["close"], year.close)        # one year: a view of the mmap
+    np.testing.assert_array_equal(inside["close"], day["close"])
+
+    across = ms.bars("SPY", "2023-12-29", "2024-01-02")
+    assert across["time"].size == 10
+    np.testing.assert_allclose(across["open"][5:], 120.0 + np.arange(5))
+    assert ms.bars("SPY")["time"].size == 20
+
+
+def test_reader_survives_rebuild(tmp_path):
+    data, store = _lean_data(str(tmp_path)), str(tmp_path / "store")
+    convert(data, store, ["SPY"], workers=1)
+    old = MinuteStore(store)
+    closes = np.array(old.bars("SPY", "2024-01-01")["close"])
+    convert(data, store, ["SPY"], years={2024}, workers=1, force=True)
+    np.testing.assert_array_equal(old.bars("SPY", "2024-01-01")["close"], closes)
+    np.testing.assert_array_equal(MinuteStore(store).bars("SPY", "2024-01-01")["close"], closes)
+
+
+def test_store_grid_is_cached_and_memory_mapped(tmp_path):
+    data, store = _lean_data(str(tmp_path)), str(tmp_path / "store")
+    convert(data, store, ["SPY", "NVDA", "TLT", "SPXL", "NVDL", "TMF"], workers=1)
+    path = store_grid(store, "2023-12-29", "2024-01-02")
+    assert store_grid(store, "2023-12-29", "2024-01-02") == path
+    assert len(os.listdir(os.path.join(store, ".grids"))) == 1
+    assert MinuteStore(store).tickers() == ["SPXL", "SPY"]
+
+    grid = load_grid(store, "2023-12-29", "2024-01-02")
+    direct = SessionGrid.from_store(MinuteStore(store), ["SPXL", "SPY"], "2023-12-29", "2024-01-02")
+    np.testing.assert_array_equal(grid.days, direct.days)
+    for ticker in ("SPXL", "SPY"):
+        assert isinstance(grid.closes[ticker], np.memmap)
+        np.testing.assert_array_equal(grid.closes[ticker], direct.closes[ticker])
+        np.testing.assert_array_equal(grid.opens[ticker], direct.opens[ticker])
+
+    # a grid folder loads the same way, and --start / --end slices stay views
+    grid.save(str(tmp_path / "grid"))
+    cut = load_grid(str(tmp_path / "grid"), "2024-01-02")
+    assert cut.n_days == 1
+    np.testing.assert_array_equal(cut.closes["SPY"], direct.closes["SPY"][-1:])
+    assert isinstance(cut.closes["SPY"], np.memmap)
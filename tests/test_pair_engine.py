@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from pair_engine import PairEngine, parse_pairs
+
+# SPY drives two ETFs; the engine sees one price column per pair
+PAIRS = {"SPXL": "SPY", "UPRO": "SPY", "NVDL": "NVDA", "TMF": "TLT"}
+ENTRY, SL, TP = 0.998, 0.985, 1.02
+
+
+class _Reference:
+    """Per-pair loop with the rules of LeveragedETFIntradayV1 (lot list) / V2 (one position)."""
+
+    def __init__(self, n: int, version: int):
+        self.version = version
+        self.open_ref = [np.nan] * n
+        self.last_day = [-1] * n
+        self.lots = [[] for _ in range(n)]
+
+    def bar(self, px: np.ndarray, day: int, size) -> tuple:
+        exits, entries = {}, []
+        for i, p in enumerate(px.tolist()):
+            if np.isnan(p):
+                continue
+            crossed = [lot for lot in self.lots[i] if p <= lot[0] * SL or p >= lot[0] * TP]
+            if crossed:
+                exits[i] = sum(q for _, q in crossed)
+                self.lots[i] = [lot for lot in self.lots[i] if lot not in crossed]
+            if (self.last_day[i] != day and p < self.open_ref[i] * ENTRY
+                    and (self.version == 1 or not self.lots[i])):
+                entries.append(i)
+                self.lots[i].append((p, size(i)))
+                self.last_day[i] = day
+        return exits, entries
+
+
+def _prices(rng, n_days: int, bars: int) -> dict:
+    out = {}
+    for k, ticker in enumerate(sorted(set(PAIRS.values()))):
+        steps = rng.normal(0.0, 0.003, (n_days, bars))
+        px = 100.0 * (k + 1) * np.exp(np.cumsum(steps, axis=None).reshape(n_days, bars))
+        px[rng.random((n_days, bars)) < 0.05] = np.nan      # missing bars
+        out[ticker] = px
+    return out
+
+
+@pytest.mark.parametrize("version", (1, 2))
+@pytest.mark.parametrize("eod_clear", (True, False))
+def test_engine_matches_per_pair_loop(version, eod_clear):
+    rng = np.random.default_rng(version * 10 + eod_clear)
+    etfs = list(PAIRS)
+    n, n_days, bars = len(etfs), 40, 60
+    prices = _prices(rng, n_days, bars)
+    engine = PairEngine(n, version, ENTRY, SL, TP, lot_capacity=2)
+    ref = _Reference(n, version)
+    grew, n_exits, n_entries = False, 0, 0
+
+    for day in range(n_days):
+        for i, etf in enumerate(etfs):
+            first = prices[PAIRS[etf]][day]
+            open_px = first[np.isfinite(first)][0]
+            engine.set_open(i, open_px)
+            ref.open_ref[i], ref.last_day[i] = open_px, -1
+        for b in range(bars):
+            px = np.array([prices[PAIRS[etf]][day, b] for etf in etfs])
+            size = lambda i: float(1 + (day * bars + b + 3 * i) % 7)    # noqa: E731
+
+            idx = engine.exit_candidates(px)
+            qty = engine.close_crossed(idx, px)
+            entries = engine.entries(px, day)
+            for i in entries.tolist():
+                engine.open_lot(i, float(px[i]), size(i), day)
+            grew |= engine.lot_entry.shape[1] > 2
+
+            ref_exits, ref_entries = ref.bar(px, day, size)
+            n_exits += len(ref_exits)
+            n_entries += len(ref_entries)
+            got = {int(i): q for i, q in zip(idx.tolist(), qty.tolist()) if q != 0}
+            assert got.keys() == ref_exits.keys(), (day, b)
+            for i, q in ref_exits.items():
+                assert got[i] == pytest.approx(q)
+            assert entries.tolist() == ref_entries, (day, b)
+            np.testing.assert_allclose(engine.held(), [sum(q for _, q in lots) for lots in ref.lots])
+            assert engine.n_lots.tolist() == [len(lots) for lots in ref.lots]
+        if eod_clear:
+            engine.clear()
+            ref.lots = [[] for _ in range(n)]
+    assert n_exits > 20 and n_entries > 20
+    if version == 1 and not eod_clear:
+        assert grew      # lots piled up past lot_capacity, so _grow() ran
+
+
+def test_grow_keeps_lots_and_triggers():
+    engine = PairEngine(2, 1, ENTRY, SL, TP, lot_capacity=2)
+    for day, px in enumerate((100.0, 101.0, 102.0, 103.0, 104.0)):
+        engine.open_lot(0, px, 1.0 + day, day)
+    assert engine.lot_entry.shape[1] == 8
+    assert sorted(engine.lot_entry[0][np.isfinite(engine.lot_entry[0])].tolist()) == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert engine.stop_at[0] == pytest.approx(104.0 * SL) and engine.take_at[0] == pytest.approx(100.0 * TP)
+    assert engine.n_lots.tolist() == [5, 0] and np.isnan(engine.lot_entry[1]).all()
+    px = np.array([103.0 * SL, np.nan])
+    assert engine.close_crossed(engine.exit_candidates(px), px).tolist() == [4.0 + 5.0]
+    assert engine.stop_at[0] == pytest.approx(102.0 * SL)
+
+
+def test_parse_pairs_skips_csv_header():
+    text = "# pairs\netf,underlier\nSPXL,SPY\nupro,spy\n"
+    assert parse_pairs(text) == {"SPXL": "SPY", "UPRO": "SPY"}
+    assert parse_pairs("ETF,Underlying\nTMF,TLT") == {"TMF": "TLT"}
+    assert parse_pairs("SPXL:SPY,NVDL:NVDA") == {"SPXL": "SPY", "NVDL": "NVDA"}
+    with pytest.raises(ValueError):
+        parse_pairs("etf,underlier\n")
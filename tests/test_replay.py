@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+from day_shards import sharded_replay
+from replay import (BARS_PER_DAY, ENTRY, EOD, EOD_SLOT, EXIT, FILL_DTYPE, LAST_ON_DATA_SLOT, ReplayParams,
+                    SessionGrid, ib_equity_fee, order_quantity, replay)
+
+PAIRS = {"SPXL": "SPY", "NVDL": "NVDA", "TMF": "TLT"}
+
+
+def _grid(seed: int, n_days: int = 8) -> SessionGrid:
+    """Seeded random walks (volatile enough for many sl / tp hits) with a few missing bars."""
+    rng = np.random.default_rng(seed)
+    days = np.datetime64("2024-03-04") + np.arange(n_days)
+    opens, closes = {}, {}
+    for k, ticker in enumerate(list(PAIRS) + list(PAIRS.values())):
+        steps = rng.normal(0.0, 0.0015, n_days * BARS_PER_DAY)
+        close = (20.0 + 15.0 * k) * np.exp(np.cumsum(steps))
+        open_ = np.concatenate(([close[0]], close[:-1])) * (1 + rng.normal(0.0, 0.0003, close.size))
+        missing = rng.random(close.size) < 0.03
+        close[missing] = open_[missing] = np.nan
+        opens[ticker], closes[ticker] = open_.reshape(n_days, -1), close.reshape(n_days, -1)
+    return SessionGrid(days, opens, closes)
+
+
+def _per_bar(grid: SessionGrid, p: ReplayParams) -> tuple:
+    """Minute-by-minute loop in the order Lean runs V1 / V2: 15:59 event, prices, then on_data per pair."""
+    etfs = list(PAIRS)
+    target, multi_lot = p.resolved_target(), p.version == 1
+    cash = p.cash
+    price = [np.nan] * len(etfs)            # Securities[etf].Price
+    last_sig = {}                           # previous close of each signal (open_ref="prev_close")
+    lots = [[] for _ in etfs]               # [entry_px, qty]
+    traded = [None] * len(etfs)
+    fills, equity = [], []
+
+    def fill(d, s, i, qty, px, kind):
+        nonlocal cash
+        fee = ib_equity_fee(qty, px)
+        cash -= qty * px + fee
+        fills.append((grid.days[d], s, i, kind, qty, px, fee))
+
+    for d in range(grid.n_days):
+        open_ref = {}
+        if p.open_ref == "prev_close":
+            open_ref = {sig: last_sig.get(sig, np.nan) for sig in PAIRS.values()}
+        for s in range(BARS_PER_DAY):
+            if p.eod_liq and s == EOD_SLOT:
+                for i in range(len(etfs)):
+                    net = sum(q for _, q in lots[i])
+                    lots[i] = []
+                    if net != 0:
+                        fill(d, s, i, -net, price[i], EOD)
+            for i, etf in enumerate(etfs):
+                c = grid.closes[etf][d, s]
+                if np.isfinite(c):
+                    price[i] = c
+            for sig in PAIRS.values():
+                if p.open_ref == "open" and sig not in open_ref and np.isfinite(grid.opens[sig][d, s]):
+                    open_ref[sig] = grid.opens[sig][d, s]
+            if s > LAST_ON_DATA_SLOT:
+                continue
+            for i, etf in enumerate(etfs):
+                px = grid.closes[PAIRS[etf]][d, s]
+                if not np.isfinite(px) or not np.isfinite(open_ref.get(PAIRS[etf], np.nan)):
+                    continue
+                crossed = [lot for lot in lots[i] if px <= lot[0] * p.sl or px >= lot[0] * p.tp]
+                if crossed:
+                    lots[i] = [lot for lot in lots[i] if lot not in crossed]
+                    fill(d, s, i, -sum(q for _, q in crossed), price[i], EXIT)
+                if traded[i] == d or (not multi_lot and lots[i]) or not px < open_ref[PAIRS[etf]] * p.entry:
+                    continue
+                if not np.isfinite(price[i]) or price[i] <= 0:
+                    continue
+                tpv = cash + sum(q * price[j] for j in range(len(etfs)) for _, q in lots[j])
+                qty = order_quantity(target, tpv, sum(q for _, q in lots[i]), price[i], cash)
+                if qty != 0:
+                    fill(d, s, i, qty, price[i], ENTRY)
+                    lots[i].append([px, qty])
+                    traded[i] = d
+        for sig in PAIRS.values():
+            row = grid.closes[sig][d]
+            if np.isfinite(row).any():
+                last_sig[sig] = row[np.isfinite(row)][-1]
+        equity.append(cash + sum(q * price[j] for j in range(len(etfs)) for _, q in lots[j]))
+    return np.array(fills, dtype=FILL_DTYPE), np.array(equity)
+
+
+@pytest.mark.parametrize("version", (1, 2))
+@pytest.mark.parametrize("eod_liq", (True, False))
+@pytest.mark.parametrize("open_ref", ("open", "prev_close"))
+def test_replay_matches_per_bar_loop(version, eod_liq, open_ref):
+    grid = _grid(version)
+    params = ReplayParams(version=version, entry=0.998, sl=0.985, tp=1.02, eod_liq=eod_liq, open_ref=open_ref)
+    res = replay(grid, params, PAIRS)
+    fills, equity = _per_bar(grid, params)
+
+    assert fills.size > 20 and (fills["kind"] == EXIT).any()
+    assert (fills["kind"] == EOD).any() == eod_liq
+    for name in ("day", "slot", "pair", "kind"):
+        np.testing.assert_array_equal(res.fills[name], fills[name], err_msg=name)
+    for name in ("qty", "price", "fee"):
+        np.testing.assert_allclose(res.fills[name], fills[name], rtol=1e-12, err_msg=name)
+    np.testing.assert_allclose(res.equity, equity, rtol=1e-12)
+
+
+@pytest.mark.parametrize("version", (1, 2))
+def test_sharded_replay_matches_replay(tmp_path, version):
+    grid = _grid(10 + version, n_days=12)
+    params = ReplayParams(version=version, entry=0.998, sl=0.985, tp=1.02, eod_liq=True)
+    full = replay(grid, params, PAIRS)
+    assert (full.fills["kind"] == EOD).any()
+
+    cache = str(tmp_path / "shards")
+    # a cold cache over the first days, then the full range re-using those shards, then all cached
+    for g, ref in ((grid.window(0, 7), replay(grid.window(0, 7), params, PAIRS)), (grid, full), (grid, full)):
+        res = sharded_replay(g, params, PAIRS, cache_dir=cache, workers=1)
+        np.testing.assert_array_equal(res.days, ref.days)
+        for name in ("day", "slot", "pair", "kind"):
+            np.testing.assert_array_equal(res.fills[name], ref.fills[name], err_msg=name)
+        for name in ("qty", "price", "fee"):
+            np.testing.assert_allclose(res.fills[name], ref.fills[name], rtol=1e-12, err_msg=name)
+        np.testing.assert_allclose(res.equity, ref.equity, rtol=1e-12)
+    # a different sizing knob re-uses the same timing shards
+    sized = ReplayParams(version=version, entry=0.998, sl=0.985, tp=1.02, eod_liq=True, target_pct=0.1)
+    np.testing.assert_allclose(sharded_replay(grid, sized, PAIRS, cache_dir=cache).equity,
+                               replay(grid, sized, PAIRS).equity, rtol=1e-12)
+
+
+def test_sharded_replay_matches_replay_with_overnight_lot():
+    # flat prices except one SPY dip in the 15:59 bar: that entry comes after the liquidation and is
+    # held overnight, so the shard chain falls back to an exact single-day replay for the next day
+    grid = _grid(3, n_days=5)
+    for ticker in grid.closes:
+        grid.opens[ticker][:] = grid.closes[ticker][:] = 100.0
+    grid.closes["SPY"][2, EOD_SLOT] = 99.0
+    grid.closes["SPY"][3, 100] = 102.5      # next day's take-profit
+    params = ReplayParams(version=1, eod_liq=True)
+    full = replay(grid, params, PAIRS)
+    assert [(int(f["slot"]), int(f["kind"])) for f in full.fills] == [(EOD_SLOT, ENTRY), (100, EXIT)]
+    res = sharded_replay(grid, params, PAIRS)
+    np.testing.assert_array_equal(res.fills, full.fills)
+    np.testing.assert_allclose(res.equity, full.equity, rtol=1e-12)
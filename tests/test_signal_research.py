@@ -0,0 +1,28 @@
+import numpy as np
+
+from signal_research import _rank, ic, rolling_ic
+
+
+def _average_ranks(col: np.ndarray) -> np.ndarray:
+    # 0-based mean rank of each value among its ties
+    return np.array([(col < v).sum() + ((col == v).sum() - 1) / 2 for v in col])
+
+
+def test_rank_averages_ties_per_column():
+    rng = np.random.default_rng(0)
+    x = rng.integers(0, 5, (40, 3)).astype(float)
+    expected = np.column_stack([_average_ranks(x[:, j]) for j in range(x.shape[1])])
+    np.testing.assert_allclose(_rank(x), expected)
+    np.testing.assert_allclose(_rank(x[:, 0]), expected[:, 0])
+
+
+def test_rolling_ic_matches_ic_on_tied_signal():
+    rng = np.random.default_rng(1)
+    signal = np.round(rng.normal(size=400), 1)      # heavily tied, like the sentiment score
+    fwd = 0.1 * signal + rng.normal(size=400)
+    window = 252
+    rolled = rolling_ic(signal, fwd, window)
+    last = ic(signal[-window:], fwd[-window:, None])["spearman"][0]
+    assert abs(rolled[-1] - last) < 1e-12
+    mid = ic(signal[100:100 + window], fwd[100:100 + window, None])["spearman"][0]
+    assert abs(rolled[100 + window - 1] - mid) < 1e-12
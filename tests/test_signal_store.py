@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+from signal_store import SignalStore
+
+ROWS = [(np.datetime64("2024-01-02") + 3 * k // 2, round(0.37 * k - 2.0, 4) if k % 9 else "") for k in range(120)]
+
+
+def _csv(rows) -> str:
+    return "".join(f"{day},{value}\n" for day, value in rows)
+
+
+def _assert_same(a: SignalStore, b: SignalStore):
+    assert len(a) == len(b)
+    for name in ("ordinals", "values", "by_day", "asof"):
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
+    assert {k: v for k, v in a.meta.items() if k != "build"} == {k: v for k, v in b.meta.items() if k != "build"}
+
+
+def test_incremental_refresh_equals_full_rebuild(tmp_path):
+    path = str(tmp_path / "signals.csv")
+    with open(path, "w") as f:
+        f.write("date,signal\n" + _csv(ROWS[:50]))
+    store = SignalStore(path)
+    assert len(store) == 50
+    first = store.meta["build"]
+
+    with open(path, "a") as f:
+        f.write(_csv(ROWS[50:100]) + str(ROWS[100][0]))     # a partial last line is left for later
+    assert store.refresh() == 50
+    _assert_same(store, SignalStore(path, cache_dir=str(tmp_path / "full_a")))
+    with open(path, "a") as f:
+        f.write(f",{ROWS[100][1]}\n" + _csv(ROWS[101:]))
+    assert store.refresh() == 20
+    assert store.refresh() == 0
+    full = SignalStore(path, cache_dir=str(tmp_path / "full_b"))
+    _assert_same(store, full)
+
+    day = ROWS[64][0]
+    assert store.get(day) == full.get(day) and store.as_of(day + 1) == full.as_of(day + 1)
+    # each refresh swapped in a new build and removed the superseded one
+    assert store.meta["build"] != first
+    assert sorted(os.listdir(store.cache_dir)) == ["current.json", store.meta["build"]]
+
+
+def test_rewritten_csv_rebuilds_and_old_maps_stay_valid(tmp_path):
+    path = str(tmp_path / "signals.csv")
+    with open(path, "w") as f:
+        f.write(_csv(ROWS[:80]))
+    store = SignalStore(path)
+    reader = SignalStore(path)          # another process with the old build memory-mapped
+    before = np.array(reader.values)
+
+    with open(path, "w") as f:
+        f.write(_csv([(day, 1.0) for day, _ in ROWS[:30]]))
+    assert store.refresh() == 30
+    np.testing.assert_array_equal(reader.values, before)
+    assert reader.refresh() == 0 and len(reader) == 30 and reader.get(ROWS[10][0]) == 1.0
+    _assert_same(reader, SignalStore(path, cache_dir=str(tmp_path / "full")))
@@ -0,0 +1,32 @@
+import csv
+
+from common.sweep import ResultStore, param_key, write_summary_csv
+
+SHARPE = ["9.1", "10.5", "-0.3", "1,234.5", 2.5, "n/a", None, "12.3%", "$7", "nan"]
+
+
+def _write_store(path: str):
+    with ResultStore(path) as store:
+        for i, sharpe in enumerate(SHARPE):
+            params = {"i": i}
+            metrics = {"Total Orders": str(i)}
+            if sharpe is not None:
+                metrics["Sharpe Ratio"] = sharpe
+            store.append({"key": param_key(params), "params": params, "metrics": metrics, "error": None})
+
+
+def _order(path) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [int(row["i"]) for row in csv.DictReader(f)]
+
+
+def test_summary_sorts_lean_statistics_as_numbers(tmp_path):
+    store, out = str(tmp_path / "s.jsonl"), str(tmp_path / "s.csv")
+    _write_store(store)
+
+    assert write_summary_csv(store, out, sort_by="Sharpe Ratio") == len(SHARPE)
+    # 1234.5, 12.3, 10.5, 9.1, 7, 2.5, -0.3, then "n/a", missing and "nan" in store order
+    assert _order(out) == [3, 7, 1, 0, 8, 4, 2, 5, 6, 9]
+
+    write_summary_csv(store, out, sort_by="Sharpe Ratio", descending=False)
+    assert _order(out) == [2, 4, 8, 0, 1, 7, 3, 5, 6, 9]